@@ -1,8 +1,18 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 import os
 import json
+import queue
+import threading
 from pathlib import Path
-import fnmatch
+from directory_index import get_directory_index, scan_workers
+from exclusion_matcher import get_exclusion_matcher
+from context_files import (ContextOptions, read_context_files, stream_context_json, count_file_lines,
+                           context_request_params, context_etag, build_context_result, read_file_result,
+                           read_file_window, BinaryFileError)
+from content_cache import content_cache
+from file_watcher import get_watcher
+from response_compression import init_compression, choose_encoding
+from conditional_requests import matching_etag, not_modified
 
 
 app = Flask(__name__)
@@ -11,38 +21,40 @@ app = Flask(__name__)
 from custom_instructions_routes import custom_instructions_bp
 from prompt_builder_routes import prompt_builder_bp
 from exclusion_manager_routes import exclusion_manager_bp
+from directory_tree_routes import directory_tree_bp
+from file_search_routes import file_search_bp
+from async_context_routes import async_context_bp
+from import_graph_routes import import_graph_bp
 
 app.register_blueprint(custom_instructions_bp)
 app.register_blueprint(prompt_builder_bp)
 app.register_blueprint(exclusion_manager_bp)
+app.register_blueprint(directory_tree_bp)
+app.register_blueprint(file_search_bp)
+app.register_blueprint(async_context_bp)
+app.register_blueprint(import_graph_bp)
+init_compression(app)
 app.secret_key = 'your-secret-key-change-this'
 
-# Utility function to load exclude patterns
-def load_exclude_patterns():
-    exclude_file = os.path.join(os.path.dirname(__file__), 'file_exclude_patterns.json')
-    if not os.path.exists(exclude_file):
-        return {'exclude_dirs': [], 'exclude_files': [], 'exclude_patterns': []}
-    with open(exclude_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def is_excluded(path, filename, rel_root, patterns):
-    # Check directory exclusion
-    for ex_dir in patterns.get('exclude_dirs', []):
-        if ex_dir and ex_dir in rel_root.split(os.sep):
-            return True
-    # Check file exclusion
-    if filename in patterns.get('exclude_files', []):
-        return True
-    # Check pattern exclusion
-    for pat in patterns.get('exclude_patterns', []):
-        if fnmatch.fnmatch(filename, pat):
-            return True
-    return False
+# Target size of each chunk written by streaming responses
+STREAM_CHUNK_SIZE = 64 * 1024
+# Idle Server-Sent Events connections get a comment this often so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+# Each open /events stream holds one request thread of a WSGI server (waitress, gunicorn gthread)
+# for as long as the browser tab stays open; past this many, further streams are refused with a 503
+app.config.setdefault('MAX_EVENT_STREAMS', 4)
+_event_streams = 0
+_event_streams_lock = threading.Lock()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def request_etag_match(etag):
+    """The If-None-Match tag naming etag for this request's negotiated encoding, or None."""
+    return matching_etag(etag, request.headers.get('If-None-Match'),
+                         choose_encoding(request.headers.get('Accept-Encoding')))
+
 @app.route('/api/browse-directory', methods=['POST'])
 def browse_directory():
     try:
@@ -52,35 +64,133 @@ def browse_directory():
         if not directory or not os.path.exists(directory):
             return jsonify({'error': 'Directory does not exist'}), 400
 
-        exclude_patterns = load_exclude_patterns()
-        files = []
         try:
-            for root, dirs, filenames in os.walk(directory):
-                # Filter directories in-place to skip excluded ones
-                rel_root = os.path.relpath(root, directory)
-                dirs[:] = [d for d in dirs if not is_excluded(os.path.join(root, d), d, os.path.join(rel_root, d), exclude_patterns)]
-                for filename in filenames:
-                    if is_excluded(os.path.join(root, filename), filename, rel_root, exclude_patterns):
-                        continue
-                    file_path = os.path.join(root, filename)
-                    relative_path = os.path.relpath(file_path, directory)
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        files.append({
-                            'name': filename,
-                            'path': file_path,
-                            'relative_path': relative_path,
-                            'size': file_size
-                        })
-                    except (OSError, PermissionError):
-                        continue
+            workers = scan_workers(data.get('scanner', 'sequential'), data.get('workers'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        matcher = get_exclusion_matcher()
+        index = get_directory_index(directory)
+        if data.get('stream'):
+            if not index.loaded:
+                # First walk: stream it as it happens, without a validator
+                return Response(stream_directory_listing(index, matcher, workers),
+                                mimetype='application/x-ndjson')
+            index.revalidate(matcher, workers)
+            snapshot = index.snapshot()
+            etag = snapshot[2]
+            matched = request_etag_match(etag)
+            if matched:
+                return not_modified(matched)
+            response = Response(stream_directory_listing(index, matcher, workers, snapshot),
+                                mimetype='application/x-ndjson')
+            response.set_etag(etag)
+            return response
+        try:
+            index.revalidate(matcher, workers)
         except PermissionError:
             return jsonify({'error': 'Permission denied'}), 403
+        snapshot = index.snapshot()
+        etag = snapshot[2]
+        matched = request_etag_match(etag)
+        if matched:
+            return not_modified(matched)
+        response = jsonify(index.listing(matcher, workers, snapshot))
+        response.set_etag(etag)
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def stream_directory_listing(index, matcher, workers, snapshot=None):
+    # One JSON record per line, flushed in ~64KB chunks while the walk is still running.
+    # With a snapshot the cached listing is served and reported in the state its ETag names.
+    buffer = []
+    buffered = 0
+    count = 0
+    try:
+        if snapshot is not None:
+            files = index.iter_files(snapshot[3])
+        else:
+            files = (f for rel_dir, node in index.iter_refresh(matcher, workers)
+                     for f in index.node_files(rel_dir, node))
+        for file_info in files:
+            line = json.dumps(file_info) + '\n'
+            buffer.append(line)
+            buffered += len(line)
+            count += 1
+            if buffered >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                buffered = 0
+        generation, refreshing = snapshot[:2] if snapshot is not None else (index.generation, index.refreshing)
+        buffer.append(json.dumps({
+            'end': True,
+            'count': count,
+            'generation': generation,
+            'refreshing': refreshing
+        }) + '\n')
+    except PermissionError:
+        buffer.append(json.dumps({'error': 'Permission denied'}) + '\n')
+    except Exception as e:
+        buffer.append(json.dumps({'error': str(e)}) + '\n')
+    yield ''.join(buffer)
 
-        return jsonify({'files': files})
+@app.route('/api/browse-directory/status', methods=['GET'])
+def browse_directory_status():
+    directory = request.args.get('directory', '')
+    if not directory or not os.path.exists(directory):
+        return jsonify({'error': 'Directory does not exist'}), 400
+    index = get_directory_index(directory)
+    return jsonify({'generation': index.generation, 'refreshing': index.refreshing})
 
+@app.route('/api/browse-directory/events', methods=['GET'])
+def browse_directory_events():
+    """Server-Sent Events stream of listing changes, from a watcher running while anyone listens."""
+    directory = request.args.get('directory', '')
+    if not directory or not os.path.isdir(directory):
+        return jsonify({'error': 'Directory does not exist'}), 400
+    global _event_streams
+    with _event_streams_lock:
+        if _event_streams >= app.config['MAX_EVENT_STREAMS']:
+            return jsonify({'error': 'Too many open event streams'}), 503
+        _event_streams += 1
+    try:
+        watcher = get_watcher(directory)
+        subscriber = watcher.subscribe()
     except Exception as e:
+        release_event_stream()
         return jsonify({'error': str(e)}), 500
+    response = Response(stream_directory_events(watcher, subscriber), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def close():
+        watcher.unsubscribe(subscriber)
+        release_event_stream()
+
+    # Runs even when the client goes away before the stream starts
+    response.call_on_close(close)
+    return response
+
+def release_event_stream():
+    global _event_streams
+    with _event_streams_lock:
+        _event_streams -= 1
+
+def stream_directory_events(watcher, subscriber):
+    yield 'event: ready\ndata: ' + json.dumps({
+        'backend': watcher.backend,
+        'generation': watcher.index.generation
+    }) + '\n\n'
+    while True:
+        try:
+            event = subscriber.get(timeout=SSE_KEEPALIVE_SECONDS)
+        except queue.Empty:
+            yield ': keepalive\n\n'
+            continue
+        if event is None:
+            return
+        yield 'event: change\ndata: ' + json.dumps(event) + '\n\n'
 
 @app.route('/api/read-file', methods=['POST'])
 def read_file():
@@ -91,17 +201,14 @@ def read_file():
         if not file_path or not os.path.exists(file_path):
             return jsonify({'error': 'File does not exist'}), 400
         
+        # Byte range (offset/length) or head/tail window, in bytes
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            return jsonify({
-                'content': content,
-                'filename': os.path.basename(file_path),
-                'path': file_path
-            })
-        
-        except UnicodeDecodeError:
+            window = read_file_window(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        try:
+            return jsonify(read_file_result(file_path, window))
+        except (BinaryFileError, UnicodeDecodeError):
             return jsonify({'error': 'File is not a text file or uses unsupported encoding'}), 400
         except PermissionError:
             return jsonify({'error': 'Permission denied'}), 403
@@ -126,64 +233,71 @@ def get_line_count():
         if not os.path.isfile(norm_file):
             return jsonify({'error': 'File does not exist'}), 404
         try:
-            with open(norm_file, 'r', encoding='utf-8', errors='ignore') as f:
-                line_count = sum(1 for _ in f)
+            line_count = count_file_lines(norm_file)
             return jsonify({'line_count': line_count})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/get-context', methods=['POST'])
-def get_context():
+@app.route('/api/get-line-counts', methods=['POST'])
+def get_line_counts():
     try:
         data = request.get_json()
-        file_paths = data.get('file_paths', [])
+        file_paths = data.get('file_paths')
         selected_directory = data.get('selected_directory')
-        
-        files_data = [] # Changed from context_parts
-        
+        if not isinstance(file_paths, list) or not selected_directory:
+            return jsonify({'error': 'Missing file_paths or selected_directory'}), 400
+        norm_dir = os.path.abspath(selected_directory)
+        line_counts = {}
+        errors = {}
         for file_path in file_paths:
-            if not os.path.exists(file_path):
+            norm_file = os.path.abspath(file_path)
+            # Security: file must be inside selected_directory
+            if not os.path.commonpath([norm_file, norm_dir]) == norm_dir:
+                errors[file_path] = 'Unauthorized file access'
                 continue
-            
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f: # Added errors='ignore'
-                    content = f.read()
-                
-                display_path = os.path.basename(file_path) # Default to basename
-                if selected_directory:
-                    norm_selected_dir = os.path.normpath(selected_directory)
-                    norm_file_path = os.path.normpath(file_path)
-                    if os.path.commonpath([norm_file_path, norm_selected_dir]) == norm_selected_dir:
-                        display_path = os.path.relpath(norm_file_path, norm_selected_dir)
-
-                display_path = display_path.replace('\\', '/')
-                
-                # Append a dictionary for each file
-                files_data.append({
-                    'path': display_path,
-                    'content': content
-                })
-            
-            except PermissionError:
-                # Optionally, log this error or notify the user about skipped files due to permissions
-                print(f"Permission denied for file: {file_path}")
-                files_data.append({
-                    'path': display_path, 
-                    'content': f"Error: Could not read file {display_path} due to permissions."
-                })
-                continue
+                line_counts[file_path] = count_file_lines(norm_file)
+            except FileNotFoundError:
+                errors[file_path] = 'File does not exist'
             except Exception as e:
-                # Handle other potential errors during file reading for a specific file
-                print(f"Error reading file {file_path}: {e}")
-                files_data.append({
-                    'path': display_path, 
-                    'content': f"Error: Could not read file {display_path}. {str(e)}"
-                })
-                continue
+                errors[file_path] = str(e)
+        return jsonify({'line_counts': line_counts, 'errors': errors})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/content-cache/stats', methods=['GET'])
+def content_cache_stats():
+    return jsonify(content_cache.stats())
+
+@app.route('/api/get-context', methods=['POST'])
+def get_context():
+    try:
+        data = request.get_json()
+        file_paths = data.get('file_paths', [])
+        selected_directory = data.get('selected_directory')
         
-        return jsonify({'files': files_data}) # Return list of file objects
+        try:
+            concurrency, token_budget, budget_strategy = context_request_params(data)
+            options = ContextOptions.from_request(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if data.get('stream') and token_budget is not None:
+            return jsonify({'error': 'token_budget is not supported with stream'}), 400
+        # Unchanged files and options: the client's copy is current, skip reading anything
+        etag = context_etag(data)
+        matched = request_etag_match(etag)
+        if matched:
+            return not_modified(matched)
+        if data.get('stream'):
+            response = Response(stream_context_json(file_paths, selected_directory, options),
+                                mimetype='application/json')
+        else:
+            files_data = read_context_files(file_paths, selected_directory, options, concurrency)
+            response = jsonify(build_context_result(files_data, options, token_budget, budget_strategy))
+        response.set_etag(etag)
+        return response
     
     except Exception as e:
         # General error for the endpoint
@@ -191,4 +305,5 @@ def get_context():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Debugger and reloader only on request; see run.py for the production server
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
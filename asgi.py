@@ -0,0 +1,84 @@
+"""
+ASGI entry point. browse-directory, read-file and get-context are served
+natively async, with their filesystem calls on a bounded thread pool, so
+one process can hold many concurrent context builds without a thread per
+request. Every other route, and streamed requests, go to the Flask app
+through asgiref's WSGI adapter. Run with, for example:
+    uvicorn asgi:application --port 5000
+or: python run.py --mode production --server uvicorn
+"""
+
+import json
+from asgiref.wsgi import WsgiToAsgi
+from app import app
+from async_context_routes import ASYNC_HANDLERS
+from async_io import run_io
+from response_compression import MIN_COMPRESS_BYTES, choose_encoding, compress_body
+from conditional_requests import encoded_etag
+
+wsgi_application = WsgiToAsgi(app)
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def request_header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def application(scope, receive, send):
+    handler = None
+    if scope['type'] == 'http' and scope['method'] == 'POST':
+        handler = ASYNC_HANDLERS.get(scope['path'])
+    if handler is None:
+        await wsgi_application(scope, receive, send)
+        return
+
+    body = await read_body(receive)
+    try:
+        result = await handler(json.loads(body or b'{}'), request_header(scope, b'if-none-match'),
+                               choose_encoding(request_header(scope, b'accept-encoding')))
+    except ValueError:
+        result = {'error': 'Invalid JSON body'}, 400, None
+    if result is None:
+        # Replay the consumed body for the synchronous (streaming) endpoint
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await wsgi_application(scope, replay, send)
+        return
+
+    payload, status, etag = result
+    if status == 304:
+        await send({'type': 'http.response.start', 'status': 304,
+                    'headers': [(b'etag', f'"{etag}"'.encode()), (b'vary', b'Accept-Encoding')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    data = app.json.dumps(payload).encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'vary', b'Accept-Encoding')]
+    encoding = choose_encoding(request_header(scope, b'accept-encoding'))
+    if encoding is not None and len(data) >= MIN_COMPRESS_BYTES:
+        level = app.config['COMPRESSION_LEVELS'][encoding]
+        data = await run_io(compress_body, data, encoding, level)
+        headers.append((b'content-encoding', encoding.encode()))
+        if etag:
+            etag = encoded_etag(etag, encoding)
+    if etag:
+        headers.append((b'etag', f'"{etag}"'.encode()))
+    headers.append((b'content-length', str(len(data)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': data})
@@ -0,0 +1,143 @@
+from flask import Blueprint, jsonify, request
+import os
+import functools
+from directory_index import get_directory_index, scan_workers
+from exclusion_matcher import get_exclusion_matcher
+from context_files import (ContextOptions, context_request_params, context_etag, build_context_result,
+                           read_file_result, read_file_window, BinaryFileError)
+from conditional_requests import matching_etag, not_modified
+from async_io import run_io, read_context_files_async
+from response_compression import choose_encoding
+
+async_context_bp = Blueprint('async_context_bp', __name__)
+
+# Handlers take the decoded JSON payload, the request's If-None-Match header and the
+# content coding it negotiates (see response_compression.choose_encoding), and
+# return (body, status, etag), or None for requests they leave to the synchronous
+# endpoints (streamed responses). A 304 has no body and carries the client's matching tag;
+# etag is None when there is no validator.
+
+
+def json_object_handler(handler):
+    """Answer 400 for payloads that are not JSON objects before the handler reads them."""
+    @functools.wraps(handler)
+    async def wrapper(data, if_none_match=None, encoding=None):
+        if not isinstance(data, dict):
+            return {'error': 'Request body must be a JSON object'}, 400, None
+        return await handler(data, if_none_match, encoding)
+    return wrapper
+
+
+@json_object_handler
+async def handle_browse_directory(data, if_none_match=None, encoding=None):
+    if data.get('stream'):
+        return None
+    try:
+        directory = data.get('directory', '')
+        if not directory or not await run_io(os.path.exists, directory):
+            return {'error': 'Directory does not exist'}, 400, None
+        try:
+            workers = scan_workers(data.get('scanner', 'sequential'), data.get('workers'))
+        except ValueError as e:
+            return {'error': str(e)}, 400, None
+        index = await run_io(get_directory_index, directory)
+        matcher = get_exclusion_matcher()
+        try:
+            await run_io(index.revalidate, matcher, workers)
+        except PermissionError:
+            return {'error': 'Permission denied'}, 403, None
+        snapshot = index.snapshot()
+        etag = snapshot[2]
+        matched = matching_etag(etag, if_none_match, encoding)
+        if matched:
+            return None, 304, matched
+        return await run_io(index.listing, matcher, workers, snapshot), 200, etag
+    except Exception as e:
+        return {'error': str(e)}, 500, None
+
+
+@json_object_handler
+async def handle_read_file(data, if_none_match=None, encoding=None):
+    try:
+        file_path = data.get('file_path', '')
+        if not file_path or not await run_io(os.path.exists, file_path):
+            return {'error': 'File does not exist'}, 400, None
+        # Byte range (offset/length) or head/tail window, in bytes
+        try:
+            window = read_file_window(data)
+        except ValueError as e:
+            return {'error': str(e)}, 400, None
+        try:
+            return await run_io(read_file_result, file_path, window), 200, None
+        except (BinaryFileError, UnicodeDecodeError):
+            return {'error': 'File is not a text file or uses unsupported encoding'}, 400, None
+        except PermissionError:
+            return {'error': 'Permission denied'}, 403, None
+    except Exception as e:
+        return {'error': str(e)}, 500, None
+
+
+@json_object_handler
+async def handle_get_context(data, if_none_match=None, encoding=None):
+    if data.get('stream'):
+        return None
+    try:
+        try:
+            concurrency, token_budget, budget_strategy = context_request_params(data)
+            options = ContextOptions.from_request(data)
+        except ValueError as e:
+            return {'error': str(e)}, 400, None
+        etag = await run_io(context_etag, data)
+        matched = matching_etag(etag, if_none_match, encoding)
+        if matched:
+            return None, 304, matched
+        files_data = await read_context_files_async(
+            data.get('file_paths', []), data.get('selected_directory'), options, concurrency)
+        return build_context_result(files_data, options, token_budget, budget_strategy), 200, etag
+    except Exception as e:
+        print(f"Error in async get_context endpoint: {e}")
+        return {'error': str(e)}, 500, None
+
+
+# Paths the ASGI entry point (asgi.py) serves natively; everything else goes to the Flask app
+ASYNC_HANDLERS = {
+    '/api/browse-directory': handle_browse_directory,
+    '/api/read-file': handle_read_file,
+    '/api/get-context': handle_get_context,
+    '/api/async/browse-directory': handle_browse_directory,
+    '/api/async/read-file': handle_read_file,
+    '/api/async/get-context': handle_get_context,
+}
+
+
+async def respond(handler):
+    result = await handler(request.get_json(silent=True), request.headers.get('If-None-Match'),
+                           choose_encoding(request.headers.get('Accept-Encoding')))
+    if result is None:
+        return jsonify({'error': 'stream is not supported by the async endpoints'}), 400
+    body, status, etag = result
+    if status == 304:
+        return not_modified(etag)
+    response = jsonify(body)
+    response.status_code = status
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+# Flask async views: reads overlap on the shared executor, though under a WSGI
+# server each request still occupies a worker thread; serve asgi.py to avoid that
+
+@async_context_bp.route('/api/async/browse-directory', methods=['POST'])
+async def browse_directory_async():
+    return await respond(handle_browse_directory)
+
+
+@async_context_bp.route('/api/async/read-file', methods=['POST'])
+async def read_file_async():
+    return await respond(handle_read_file)
+
+
+@async_context_bp.route('/api/async/get-context', methods=['POST'])
+async def get_context_async():
+    return await respond(handle_get_context)
@@ -0,0 +1,34 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from context_files import read_context_file, dedupe_context_files, CONTEXT_READ_WORKERS
+
+# Threads shared by every async request for blocking filesystem calls
+FILE_IO_WORKERS = 32
+
+_executor = ThreadPoolExecutor(max_workers=FILE_IO_WORKERS, thread_name_prefix='file-io')
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking filesystem call on the shared executor, leaving the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def read_context_files_async(file_paths, selected_directory, options, concurrency=CONTEXT_READ_WORKERS):
+    """Async read_context_files: records in request order, at most `concurrency` reads in flight.
+
+    The per-request limit keeps one large bundle from occupying the whole
+    shared executor while other requests wait.
+    """
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, CONTEXT_READ_WORKERS)))
+
+    async def read(file_path):
+        async with semaphore:
+            return await run_io(read_context_file, file_path, selected_directory, options)
+
+    results = await asyncio.gather(*(read(file_path) for file_path in file_paths))
+    records = [result for result in results if result is not None]
+    if options.dedupe:
+        records = list(dedupe_context_files(records, options))
+    return records
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of the compaction passes per file type, cold, and the
+per-request cost of a compacted context once the results are cached.
+Run from the repository root:
+    python benchmarks/bench_compaction.py [directory]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from compaction import compaction_kind, compact_text
+from context_files import ContextOptions, read_context_files
+
+
+def collect(directory):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('node_modules', '__pycache__')]
+        for name in files:
+            path = os.path.join(root, name)
+            if compaction_kind(path) in ('python', 'script', 'style', 'markup'):
+                paths.append(path)
+    return paths
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = collect(directory)
+    by_kind = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            by_kind.setdefault(compaction_kind(path), []).append(f.read())
+
+    for kind, texts in sorted(by_kind.items()):
+        size = sum(len(text) for text in texts)
+        for strip in (False, True):
+            start = time.perf_counter()
+            out = sum(len(compact_text(text, kind, strip)) for text in texts)
+            elapsed = time.perf_counter() - start
+            print(f'{kind:<7} strip_comments={strip!s:<5} {size / 1e6 / elapsed:>7.1f} MB/s  '
+                  f'{len(texts)} files  {100 * (1 - out / size):>5.1f}% smaller')
+
+    options = ContextOptions(strip_comments=True)
+    for label in ('cold', 'warm'):
+        start = time.perf_counter()
+        files = read_context_files(paths, directory, options)
+        elapsed = time.perf_counter() - start
+        saved = sum(f['saved']['tokens'] for f in files if 'saved' in f)
+        print(f'get_context {label:<5} {elapsed * 1000:>8.1f} ms  {len(files)} files  {saved} tokens saved')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: original os.walk + os.path.getsize listing vs. the index scanner,
+sequential and with a thread pool. Builds a synthetic tree unless a directory
+is given. Run from the repository root:
+    python benchmarks/bench_directory_scan.py [directory] [workers]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import directory_index
+from directory_index import DirectoryIndex
+from exclusion_matcher import ExclusionMatcher
+
+PATTERNS = {'exclude_dirs': ['.git', '__pycache__'], 'exclude_files': [],
+            'exclude_patterns': ['*.pyc', '*.pyo'], 'ignore_files': []}
+
+
+def make_tree(root, depth=3, fanout=8, files_per_dir=20):
+    dirs = [root]
+    for _ in range(depth):
+        next_dirs = []
+        for parent in dirs:
+            for i in range(fanout):
+                path = os.path.join(parent, f'd{i}')
+                os.mkdir(path)
+                next_dirs.append(path)
+        dirs = next_dirs
+    for parent in dirs:
+        for i in range(files_per_dir):
+            with open(os.path.join(parent, f'f{i}.py'), 'w') as f:
+                f.write('x = 1\n')
+
+
+def legacy_walk(directory):
+    files = []
+    for root, dirs, filenames in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in PATTERNS['exclude_dirs']]
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            files.append((file_path, os.path.getsize(file_path)))
+    return files
+
+
+def index_scan(directory, workers):
+    # A fresh index directory per run, so every run is a cold scan rather than
+    # a revalidation of the index the previous run saved
+    directory_index.INDEX_DIR = tempfile.mkdtemp()
+    try:
+        index = DirectoryIndex(directory)
+        index.refresh(ExclusionMatcher(PATTERNS), workers)
+        return list(index.iter_files())
+    finally:
+        shutil.rmtree(directory_index.INDEX_DIR, ignore_errors=True)
+
+
+def best_of(fn, runs=3):
+    best = None
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+
+def main():
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else directory_index.DEFAULT_SCAN_WORKERS
+    cleanup = []
+    if len(sys.argv) > 1:
+        directory = sys.argv[1]
+    else:
+        directory = tempfile.mkdtemp()
+        cleanup.append(directory)
+        make_tree(directory)
+    try:
+        for label, fn in (('os.walk + getsize', lambda: legacy_walk(directory)),
+                          ('scandir sequential', lambda: index_scan(directory, 1)),
+                          (f'scandir parallel x{workers}', lambda: index_scan(directory, workers))):
+            elapsed, count = best_of(fn)
+            print(f'{label:<24} {elapsed * 1000:>9.1f} ms  {count} files')
+    finally:
+        for path in cleanup:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
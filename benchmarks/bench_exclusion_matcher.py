@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-entry exclusion cost as the pattern list grows.
+Compares the original fnmatch loop with the compiled ExclusionMatcher.
+Run from the repository root: python benchmarks/bench_exclusion_matcher.py
+"""
+
+import os
+import sys
+import fnmatch
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from exclusion_matcher import ExclusionMatcher
+
+NAMES = ['app.py', 'index.html', 'style.css', 'module.cpython-311.pyc', 'README.md',
+         'bundle.min.js', 'data.tar.gz', 'notes.txt', 'Makefile', 'image.png']
+
+
+def legacy_is_excluded(path, filename, rel_root, patterns):
+    for ex_dir in patterns.get('exclude_dirs', []):
+        if ex_dir and ex_dir in rel_root.split(os.sep):
+            return True
+    if filename in patterns.get('exclude_files', []):
+        return True
+    for pat in patterns.get('exclude_patterns', []):
+        if fnmatch.fnmatch(filename, pat):
+            return True
+    return False
+
+
+def make_patterns(count):
+    # A realistic mix: mostly extensions, some literal names and a few general globs
+    exclude_patterns = []
+    for i in range(count):
+        kind = i % 10
+        if kind < 7:
+            exclude_patterns.append(f'*.ext{i}')
+        elif kind < 9:
+            exclude_patterns.append(f'generated_{i}.txt')
+        else:
+            exclude_patterns.append(f'tmp{i}_*.log')
+    return {
+        'exclude_dirs': [f'dir{i}' for i in range(count)],
+        'exclude_files': [f'file{i}.txt' for i in range(count)],
+        'exclude_patterns': exclude_patterns
+    }
+
+
+def main():
+    rel_root = os.path.join('src', 'package', 'sub')
+    print(f"{'patterns':>9} {'legacy us/entry':>16} {'compiled us/entry':>18}")
+    for count in (10, 50, 100, 250, 500):
+        patterns = make_patterns(count)
+        matcher = ExclusionMatcher(patterns)
+        loops = 200
+        legacy = timeit.timeit(
+            lambda: [legacy_is_excluded(None, n, rel_root, patterns) for n in NAMES], number=loops)
+        compiled = timeit.timeit(
+            lambda: [matcher.excludes_file(n) for n in NAMES], number=loops)
+        entries = loops * len(NAMES)
+        print(f"{count:>9} {legacy / entries * 1e6:>16.2f} {compiled / entries * 1e6:>18.2f}")
+
+
+if __name__ == '__main__':
+    main()
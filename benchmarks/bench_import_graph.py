@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: import-graph build time over a synthetic tree of Python packages
+and JS modules, the incremental refresh after a few edits, and expansion
+query latency.
+Run from the repository root:
+    python benchmarks/bench_import_graph.py [file_count]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from directory_index import DirectoryIndex
+from exclusion_matcher import ExclusionMatcher
+from import_graph import ImportGraph
+
+PACKAGES = 40
+IMPORTS_PER_FILE = 8
+
+
+def make_tree(root, count):
+    random.seed(0)
+    py_count = count * 3 // 4
+    modules = []
+    for i in range(py_count):
+        package = f'pkg{i % PACKAGES}'
+        modules.append((package, f'mod{i}'))
+    for package in {p for p, _ in modules}:
+        os.makedirs(os.path.join(root, 'src', package))
+        open(os.path.join(root, 'src', package, '__init__.py'), 'w').close()
+    for package, module in modules:
+        lines = ['"""Synthetic module."""']
+        for target_package, target in random.sample(modules, IMPORTS_PER_FILE):
+            if target_package == package and random.random() < 0.5:
+                lines.append(f'from . import {target}')
+            else:
+                lines.append(f'from {target_package}.{target} import thing')
+        lines.append('import os\n\n\ndef thing():\n    return os.sep\n' + '# filler\n' * 100)
+        with open(os.path.join(root, 'src', package, module + '.py'), 'w') as f:
+            f.write('\n'.join(lines))
+    js_dir = os.path.join(root, 'web')
+    os.makedirs(js_dir)
+    js_count = count - py_count
+    for i in range(js_count):
+        lines = [f"import {{ x{j} }} from './m{j}';" for j in random.sample(range(js_count), IMPORTS_PER_FILE)]
+        lines.append("const React = require('react');\nexport const x = 1;\n" + '// filler\n' * 100)
+        with open(os.path.join(js_dir, f'm{i}.js'), 'w') as f:
+            f.write('\n'.join(lines))
+    return [os.path.join('src', p, m + '.py') for p, m in modules]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    root = tempfile.mkdtemp(prefix='bench_import_graph_')
+    try:
+        py_files = make_tree(root, count)
+        index = DirectoryIndex(root)
+        index.index_file = os.path.join(root, '.index.json')
+        index.refresh(ExclusionMatcher({'exclude_dirs': [], 'exclude_files': ['.index.json'],
+                                        'exclude_patterns': [], 'ignore_files': []}))
+        graph = ImportGraph(root)
+
+        start = time.perf_counter()
+        parsed = graph.refresh(index)
+        print(f'build            {(time.perf_counter() - start) * 1000:>9.1f} ms  {parsed} files parsed')
+
+        start = time.perf_counter()
+        graph.expand(py_files[:1], 1)
+        print(f'first query      {(time.perf_counter() - start) * 1000:>9.1f} ms  (builds the module table)')
+
+        for name in random.sample(py_files, 5):
+            with open(os.path.join(root, name), 'a') as f:
+                f.write('\nimport json\n')
+        start = time.perf_counter()
+        parsed = graph.refresh(index, force=True)
+        print(f'refresh          {(time.perf_counter() - start) * 1000:>9.1f} ms  {parsed} files re-parsed')
+
+        for depth in (1, 2, 3, 5):
+            start = time.perf_counter()
+            found = graph.expand(random.sample(py_files, 3), depth)
+            print(f'expand depth {depth}   {(time.perf_counter() - start) * 1000:>9.1f} ms  {len(found)} files')
+        start = time.perf_counter()
+        found = graph.expand(['web/m0.js'], 2)
+        print(f'expand js d=2    {(time.perf_counter() - start) * 1000:>9.1f} ms  {len(found)} files')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
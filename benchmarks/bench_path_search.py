@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: index build time and per-query latency of the fuzzy path search
+over a synthetic listing.
+Run from the repository root:
+    python benchmarks/bench_path_search.py [file_count]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from path_search import PathSearchIndex
+
+FOLDERS = ['src', 'lib', 'components', 'utils', 'app', 'tests', 'models', 'views',
+           'controllers', 'api', 'core', 'server', 'client', 'common', 'static']
+STEMS = ['context', 'files', 'index', 'search', 'routes', 'manager', 'cache', 'token',
+         'prompt', 'builder', 'matcher', 'rules', 'reader', 'writer', 'helpers', 'config']
+EXTENSIONS = ['.py', '.js', '.ts', '.css', '.html', '.md']
+QUERIES = ['c', 'ctx', 'cfiles', 'context_files', 'srcapicache', 'zzq']
+
+
+def make_files(count):
+    random.seed(0)
+    files = []
+    for i in range(count):
+        folders = '/'.join(random.choice(FOLDERS) for _ in range(random.randint(1, 5)))
+        name = '_'.join(random.sample(STEMS, random.randint(1, 3))) + f'{i % 97}' + random.choice(EXTENSIONS)
+        files.append({'relative_path': f'{folders}/{name}'})
+    return files
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    files = make_files(count)
+    start = time.perf_counter()
+    index = PathSearchIndex(files, 1)
+    print(f'index build {(time.perf_counter() - start) * 1000:>9.1f} ms  {count} paths')
+    for query in QUERIES:
+        start = time.perf_counter()
+        matches = index.search(query, 50)
+        elapsed = time.perf_counter() - start
+        top = matches[0][1]['relative_path'] if matches else '-'
+        print(f'{query!r:<16} {elapsed * 1000:>7.1f} ms  {len(matches)} results  top: {top}')
+
+
+if __name__ == '__main__':
+    main()
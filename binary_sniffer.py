@@ -0,0 +1,71 @@
+import os
+from functools import lru_cache
+
+# Bytes read from the start of a file to decide whether it is binary
+SNIFF_BYTES = 8192
+# Share of non-text bytes above which a sample is treated as binary
+NON_TEXT_RATIO = 0.30
+
+# Extensions decided without opening the file
+TEXT_EXTENSIONS = {
+    '.py', '.pyi', '.js', '.mjs', '.cjs', '.jsx', '.ts', '.tsx', '.json', '.html', '.htm', '.css',
+    '.scss', '.less', '.md', '.rst', '.txt', '.csv', '.tsv', '.xml', '.yml', '.yaml', '.toml',
+    '.ini', '.cfg', '.conf', '.sh', '.bat', '.ps1', '.sql', '.java', '.kt', '.c', '.h', '.cpp',
+    '.hpp', '.cc', '.cs', '.go', '.rs', '.rb', '.php', '.swift', '.vue', '.svelte', '.lock', '.env'
+}
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tiff', '.psd', '.pdf', '.zip',
+    '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.jar', '.war', '.whl', '.exe', '.dll',
+    '.so', '.dylib', '.a', '.lib', '.o', '.obj', '.class', '.pyc', '.pyo', '.pyd', '.bin', '.dat',
+    '.db', '.sqlite', '.sqlite3', '.mp3', '.mp4', '.wav', '.ogg', '.flac', '.avi', '.mov', '.mkv',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx'
+}
+
+# Control characters that legitimately appear in text, plus everything printable and 8-bit (UTF-8)
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def is_binary_data(sample):
+    if not sample:
+        return False
+    if b'\0' in sample:
+        return True
+    non_text = sample.translate(None, _TEXT_BYTES)
+    return len(non_text) / len(sample) > NON_TEXT_RATIO
+
+
+def binary_by_extension(name):
+    """True/False when the extension decides it, None when the file has to be sniffed."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in TEXT_EXTENSIONS:
+        return False
+    if ext in BINARY_EXTENSIONS:
+        return True
+    return None
+
+
+def sniff_file(file_path):
+    with open(file_path, 'rb') as f:
+        return is_binary_data(f.read(SNIFF_BYTES))
+
+
+@lru_cache(maxsize=65536)
+def _is_binary_cached(file_path, mtime_ns, size):
+    return sniff_file(file_path)
+
+
+def is_binary_stat(file_path, st):
+    """is_binary_file for a path already stat'ed, e.g. by os.scandir while listing a directory."""
+    by_extension = binary_by_extension(file_path)
+    if by_extension is not None:
+        return by_extension
+    return _is_binary_cached(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+
+
+def is_binary_file(file_path):
+    """Decide from the extension, or from the first SNIFF_BYTES, memoised by (path, mtime, size)."""
+    by_extension = binary_by_extension(file_path)
+    if by_extension is not None:
+        return by_extension
+    st = os.stat(file_path)
+    return _is_binary_cached(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
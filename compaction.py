@@ -0,0 +1,234 @@
+import io
+import os
+import re
+import tokenize
+
+# Which passes apply to a file is decided by its extension
+PYTHON_EXTENSIONS = {'.py', '.pyw', '.pyi'}
+SCRIPT_EXTENSIONS = {'.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'}
+STYLE_EXTENSIONS = {'.css', '.scss', '.less'}
+MARKUP_EXTENSIONS = {'.html', '.htm', '.xml', '.svg', '.vue'}
+HASH_COMMENT_EXTENSIONS = {'.sh', '.bash', '.rb', '.pl', '.yaml', '.yml', '.toml', '.cfg', '.ini', '.r'}
+
+# A leading comment block mentioning any of these is a licence/copyright header
+BOILERPLATE_PATTERN = re.compile(
+    r'copyright|\(c\)\s*\d{4}|licen[cs]ed? under|spdx-license-identifier|all rights reserved'
+    r'|permission is hereby granted|this file is (?:auto(?:matically)?[- ])?generated', re.IGNORECASE)
+
+_BLANK_RUNS = re.compile(r'\n{3,}')
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+# A '/' after one of these (or at the start) begins a regex literal rather than a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                   'throw', 'yield', 'await'}
+_C_LEXER_START = re.compile(r'["\'`/]')
+# Bodies of strings and regex literals, escapes included; an unterminated one ends at the
+# line end rather than swallowing the rest of the file
+_QUOTED_BODY = {
+    '"': re.compile(r'(?:[^"\\\n]|\\.)*"?', re.DOTALL),
+    "'": re.compile(r"(?:[^'\\\n]|\\.)*'?", re.DOTALL),
+    '`': re.compile(r'(?:[^`\\]|\\.)*`?', re.DOTALL),
+}
+_REGEX_BODY = re.compile(r'(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\]?)*/?')
+# Marks text removed by a pass, so lines left empty by it can be dropped outright
+_REMOVED = '\x00'
+
+
+def compaction_kind(path):
+    """'python', 'script', 'style', 'markup', 'hash' or None (only blank-line passes)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PYTHON_EXTENSIONS:
+        return 'python'
+    if ext in SCRIPT_EXTENSIONS:
+        return 'script'
+    if ext in STYLE_EXTENSIONS:
+        return 'style'
+    if ext in MARKUP_EXTENSIONS:
+        return 'markup'
+    if ext in HASH_COMMENT_EXTENSIONS:
+        return 'hash'
+    return None
+
+
+def collapse_blank_lines(text):
+    """Strip trailing whitespace, drop lines emptied by a removal and squeeze blank runs to one."""
+    if _REMOVED in text:
+        text = '\n'.join(line.replace(_REMOVED, '') for line in text.split('\n')
+                         if not (_REMOVED in line and not line.replace(_REMOVED, '').strip()))
+    text = _TRAILING_SPACE.sub('', text)
+    return _BLANK_RUNS.sub('\n\n', text).strip('\n') + '\n' if text.strip() else ''
+
+
+def _leading_comment_end(text, kind):
+    """Offset just past the comment block opening the file (after a shebang), or 0."""
+    pos = len(text) - len(text.lstrip())
+    if text.startswith('#!'):
+        pos = text.find('\n') + 1 or len(text)
+    line_prefix = {'python': '#', 'hash': '#', 'script': '//', 'style': '//'}.get(kind)
+    if kind in ('script', 'style') and text.startswith('/*', pos):
+        end = text.find('*/', pos)
+        return end + 2 if end != -1 else 0
+    if kind == 'markup' and text.startswith('<!--', pos):
+        end = text.find('-->', pos)
+        return end + 3 if end != -1 else 0
+    if line_prefix is None:
+        return 0
+    end = pos
+    for line in text[pos:].splitlines(keepends=True):
+        if not line.lstrip().startswith(line_prefix):
+            break
+        end += len(line)
+    return end
+
+
+def strip_boilerplate_header(text, kind):
+    """Remove a licence or copyright comment block from the top of the file."""
+    end = _leading_comment_end(text, kind)
+    if end and BOILERPLATE_PATTERN.search(text, 0, end):
+        start = text.find('\n') + 1 if text.startswith('#!') else 0
+        return text[:start] + text[end:]
+    return text
+
+
+def strip_python_comments(text):
+    """Remove comments and docstrings (any string-only statement) using the tokenizer.
+
+    A block left with no statements gets 'pass' so the code stays well
+    formed. Source that does not tokenize is returned unchanged.
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return text
+    line_offsets = [0]
+    for line in text.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+    offset = lambda position: line_offsets[position[0] - 1] + position[1]
+
+    skip = (tokenize.NL, tokenize.COMMENT)
+    removals = []
+    line_start = True
+    # Per open block: whether a statement in it is kept, and the index of its first removal
+    blocks = [[True, None]]
+    for i, tok in enumerate(tokens):
+        if tok.type == tokenize.COMMENT:
+            removals.append((offset(tok.start), offset(tok.end), ''))
+            continue
+        if tok.type == tokenize.INDENT:
+            blocks.append([False, None])
+        elif tok.type == tokenize.DEDENT:
+            kept, first_removal = blocks.pop()
+            if not kept and first_removal is not None:
+                # Every statement of the block went; the first one's place keeps it well formed
+                start, end, _ = removals[first_removal]
+                removals[first_removal] = (start, end, 'pass')
+        elif line_start and tok.type not in skip and tok.type not in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            removed = False
+            if tok.type == tokenize.STRING:
+                j = i
+                while tokens[j].type in (tokenize.STRING, tokenize.COMMENT):
+                    j += 1
+                if tokens[j].type == tokenize.NEWLINE:
+                    if blocks[-1][1] is None:
+                        blocks[-1][1] = len(removals)
+                    removals.append((offset(tok.start), offset(tokens[j - 1].end), ''))
+                    removed = True
+            if not removed:
+                blocks[-1][0] = True
+        if tok.type not in skip:
+            line_start = tok.type in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT)
+    return _apply_removals(text, removals)
+
+
+def _apply_removals(text, removals):
+    parts = []
+    pos = 0
+    for start, end, replacement in sorted(removals):
+        if start < pos:
+            continue
+        parts.append(text[pos:start])
+        parts.append(replacement or _REMOVED)
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def c_lexer_spans(text, line_comments=True, regex_literals=True):
+    """Yield (start, end, kind) for each string, comment and regex literal in C-like source.
+
+    kind is 'string', 'comment' or 'regex'. With line_comments off only
+    /* */ opens a comment; with regex_literals off '/' is always division.
+    """
+    n = len(text)
+    i = 0
+    while True:
+        # Jump straight to the next character that can open a string, comment or regex
+        match = _C_LEXER_START.search(text, i)
+        if match is None:
+            return
+        start = i = match.start()
+        ch = text[i]
+        if ch != '/':
+            i = _QUOTED_BODY[ch].match(text, i + 1).end()
+            yield start, i, 'string'
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            yield start, i, 'comment'
+        elif line_comments and text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end == -1 else end
+            yield start, i, 'comment'
+        elif regex_literals and _regex_allowed(text, i):
+            i = _REGEX_BODY.match(text, i + 1).end()
+            yield start, i, 'regex'
+        else:
+            i += 1
+
+
+def strip_c_comments(text, line_comments=True, regex_literals=True):
+    """Remove /* */ (and // when line_comments) comments, skipping strings and regex literals."""
+    return _apply_removals(text, [(start, end, '') for start, end, kind
+                                  in c_lexer_spans(text, line_comments, regex_literals) if kind == 'comment'])
+
+
+def _regex_allowed(text, i):
+    """Whether a '/' at i starts a regex literal, judged by what precedes it."""
+    end = i
+    while end > 0 and text[end - 1].isspace():
+        end -= 1
+    if end == 0 or text[end - 1] in _REGEX_PRECEDERS:
+        return True
+    start = end
+    while start > 0 and (text[start - 1].isalnum() or text[start - 1] in '_$'):
+        start -= 1
+    return text[start:end] in _REGEX_KEYWORDS
+
+
+def strip_comments(text, kind):
+    if kind == 'python':
+        return strip_python_comments(text)
+    if kind == 'script':
+        return strip_c_comments(text)
+    if kind == 'style':
+        # Plain CSS has no // comments, but url(//host/...) is common
+        return strip_c_comments(text, line_comments=False, regex_literals=False)
+    if kind == 'markup':
+        return _HTML_COMMENT.sub(_REMOVED, text)
+    return text
+
+
+def compact_text(text, kind, strip_comments_too=False):
+    """Compact source text for an LLM context: licence headers, comments (optionally) and blank runs.
+
+    The result keeps the original's final newline, or lack of one, and is
+    never longer than the original; text that would not shrink comes back as is.
+    """
+    compacted = strip_boilerplate_header(text, kind)
+    if strip_comments_too:
+        compacted = strip_comments(compacted, kind)
+    compacted = collapse_blank_lines(compacted)
+    if compacted and not text.endswith('\n'):
+        compacted = compacted[:-1]
+    return compacted if len(compacted) < len(text) else text
@@ -0,0 +1,32 @@
+from flask import Response
+from werkzeug.http import parse_etags, quote_etag
+
+
+def encoded_etag(etag, encoding):
+    # Compressed representations are different bytes, so they carry their own strong tag
+    return f'{etag}-{encoding}'
+
+
+def matching_etag(etag, if_none_match, encoding=None):
+    """The tag in an If-None-Match header value naming etag, or None.
+
+    Besides etag itself, the variant compressed with encoding (the coding this
+    request negotiates) matches. A 304 echoes the matched tag, so a cache
+    revalidating a compressed copy is told that copy's own tag.
+    """
+    if not etag or not if_none_match:
+        return None
+    etags = parse_etags(if_none_match)
+    if encoding is not None and etags.is_strong(encoded_etag(etag, encoding)):
+        return encoded_etag(etag, encoding)
+    if etags.is_strong(etag) or etags.star_tag:
+        return etag
+    return None
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.headers['ETag'] = quote_etag(etag)
+    # The 200 for the same request varies by encoding; the 304 has to say so as well
+    response.vary.add('Accept-Encoding')
+    return response
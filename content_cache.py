@@ -0,0 +1,161 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Total bytes of file content (plus derived values) kept in memory
+CONTENT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_MISSING = object()
+
+
+def decode_text(data, errors='strict'):
+    """Decode UTF-8 bytes (or any bytes-like buffer) the way a text-mode open() would."""
+    text = str(data, 'utf-8', errors)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _sizeof(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 0
+
+
+class CacheEntry:
+    __slots__ = ('digest', 'data', 'derived', 'size', 'paths')
+
+    def __init__(self, digest, data):
+        self.digest = digest
+        self.data = data
+        # Values computed from data (decoded text, line counts, ...), shared by every path with this body
+        self.derived = {}
+        self.size = len(data)
+        self.paths = set()
+
+
+class ContentCache:
+    """File contents stored once per distinct body, with byte-bounded LRU eviction.
+
+    Bodies are keyed by their SHA-1, so byte-identical files (vendored
+    copies, generated stubs, the same file under two roots) share one entry
+    and its derived values. Paths map to a body through their (mtime, size),
+    which is what decides whether the file has to be read again.
+    """
+
+    def __init__(self, max_bytes=CONTENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Reads whose body was already cached under another path
+        self.shared = 0
+        self._entries = OrderedDict() # digest -> CacheEntry, least recently used first
+        self._paths = {} # absolute path -> ((mtime, size), digest)
+        self._lock = threading.Lock()
+
+    def _entry(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            known = self._paths.get(path)
+            if known is not None and known[0] == key:
+                entry = self._entries.get(known[1])
+                if entry is not None:
+                    self._entries.move_to_end(entry.digest)
+                    self.hits += 1
+                    return entry
+            self.misses += 1
+        with open(path, 'rb') as f:
+            data = f.read()
+            # Key on what was actually read in case the file changed since the stat
+            st = os.fstat(f.fileno())
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            known = self._paths.get(path)
+            if known is not None and known[1] != digest:
+                self._unlink(path)
+            entry = self._entries.get(digest)
+            if entry is None:
+                entry = CacheEntry(digest, data)
+                if entry.size > self.max_bytes:
+                    return entry
+                self._entries[digest] = entry
+                self.total_bytes += entry.size
+            else:
+                if path not in entry.paths:
+                    self.shared += 1
+                self._entries.move_to_end(digest)
+            entry.paths.add(path)
+            self._paths[path] = ((st.st_mtime_ns, st.st_size), digest)
+            self._evict()
+        return entry
+
+    def _unlink(self, path):
+        known = self._paths.pop(path, None)
+        if known is None:
+            return
+        entry = self._entries.get(known[1])
+        if entry is not None:
+            entry.paths.discard(path)
+            # A body no path points at any more can never be looked up again
+            if not entry.paths:
+                del self._entries[entry.digest]
+                self.total_bytes -= entry.size
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+            for path in entry.paths:
+                self._paths.pop(path, None)
+
+    def invalidate(self, path):
+        """Drop a cached file, e.g. when a watcher reports it changed or was removed."""
+        with self._lock:
+            self._unlink(os.path.abspath(path))
+
+    def read_bytes(self, path):
+        return self._entry(path).data
+
+    def digest(self, path):
+        """SHA-1 hex digest of the current contents of path."""
+        return self._entry(path).digest
+
+    def derive(self, path, name, compute):
+        """Return compute(data) for the current contents of path, memoised alongside them."""
+        entry = self._entry(path)
+        value = entry.derived.get(name, _MISSING)
+        if value is _MISSING:
+            value = compute(entry.data)
+            with self._lock:
+                if name not in entry.derived:
+                    entry.derived[name] = value
+                    entry.size += _sizeof(value)
+                    if self._entries.get(entry.digest) is entry:
+                        self.total_bytes += _sizeof(value)
+                        self._evict()
+        return value
+
+    def read_text(self, path, errors='strict'):
+        return self.derive(path, ('text', errors), lambda data: decode_text(data, errors))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'shared': self.shared,
+                'entries': len(self._entries),
+                'paths': len(self._paths),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+content_cache = ContentCache()
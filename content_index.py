@@ -0,0 +1,223 @@
+import os
+import re
+import time
+import threading
+from bisect import bisect_left
+from content_cache import content_cache
+
+# Files larger than this (minified bundles, data dumps) are left out of the index
+MAX_INDEXED_FILE_BYTES = 2 * 1024 * 1024
+# A search re-stats the indexed files at most this often, unless the directory index changed
+CONTENT_INDEX_RECHECK_SECONDS = 2.0
+# Matching lines reported per file, and the characters kept of each
+MAX_LINES_PER_FILE = 5
+MAX_LINE_LENGTH = 200
+
+DEFAULT_CONTENT_SEARCH_LIMIT = 50
+MAX_CONTENT_SEARCH_LIMIT = 500
+
+_WORD = re.compile(r'[a-z_][a-z0-9_]+')
+
+
+def tokenize(data):
+    """Distinct lower-cased identifier-like words of at least two characters."""
+    # latin-1 maps every byte to one character, so this never fails and only ASCII words match
+    return set(_WORD.findall(data.decode('latin-1').lower()))
+
+
+def query_terms(query):
+    return sorted(set(_WORD.findall(query.lower())))
+
+
+class ContentIndex:
+    """Inverted index from words to the text files of one directory index that contain them.
+
+    Each file is remembered with the (mtime, size) it was tokenized at, so a
+    refresh only re-reads files that changed. Query terms match words by
+    prefix, and candidates are confirmed against the file text.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.generation = None
+        self.checked_at = 0.0
+        # relative path -> (id, mtime_ns, size, words)
+        self.files = {}
+        # id -> file dict from the directory index
+        self.file_info = {}
+        self.postings = {}
+        self._vocabulary = None
+        self._next_id = 0
+        # Set while a watcher keeps the index current, which makes the periodic re-stat unnecessary
+        self.watched = False
+        self._lock = threading.Lock()
+
+    def _remove(self, rel_path):
+        file_id, _, _, words = self.files.pop(rel_path)
+        del self.file_info[file_id]
+        for word in words:
+            ids = self.postings[word]
+            ids.discard(file_id)
+            if not ids:
+                del self.postings[word]
+                self._vocabulary = None
+
+    def _add(self, file_info, mtime_ns, size, data):
+        file_id = self._next_id
+        self._next_id += 1
+        words = tokenize(data)
+        self.files[file_info['relative_path']] = (file_id, mtime_ns, size, words)
+        self.file_info[file_id] = file_info
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                self._vocabulary = None
+            ids.add(file_id)
+
+    def refresh(self, directory_index, force=False):
+        """Bring the index in line with directory_index; returns the number of files re-read."""
+        with self._lock:
+            if (not force and self.generation == directory_index.generation
+                    and (self.watched or time.monotonic() - self.checked_at < CONTENT_INDEX_RECHECK_SECONDS)):
+                return 0
+            seen = set()
+            reindexed = 0
+            for file_info in directory_index.iter_files():
+                rel_path = file_info['relative_path']
+                if file_info['binary'] or file_info['size'] > MAX_INDEXED_FILE_BYTES:
+                    continue
+                try:
+                    st = os.stat(file_info['path'])
+                except OSError:
+                    continue
+                seen.add(rel_path)
+                entry = self.files.get(rel_path)
+                if entry is not None and entry[1] == st.st_mtime_ns and entry[2] == st.st_size:
+                    self.file_info[entry[0]] = file_info
+                    continue
+                if entry is not None:
+                    self._remove(rel_path)
+                if st.st_size > MAX_INDEXED_FILE_BYTES:
+                    continue
+                try:
+                    with open(file_info['path'], 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                self._add(file_info, st.st_mtime_ns, st.st_size, data)
+                reindexed += 1
+            for rel_path in [p for p in self.files if p not in seen]:
+                self._remove(rel_path)
+            self.generation = directory_index.generation
+            self.checked_at = time.monotonic()
+            return reindexed
+
+    def update_files(self, changed, removed, generation):
+        """Apply a watcher's report: re-read the changed file dicts and drop the removed paths.
+
+        Does nothing until the first full refresh has built the index.
+        """
+        with self._lock:
+            if self.generation is None:
+                return
+            for rel_path in removed:
+                if rel_path in self.files:
+                    self._remove(rel_path)
+            for file_info in changed:
+                rel_path = file_info['relative_path']
+                if rel_path in self.files:
+                    self._remove(rel_path)
+                if file_info['binary'] or file_info['size'] > MAX_INDEXED_FILE_BYTES:
+                    continue
+                try:
+                    with open(file_info['path'], 'rb') as f:
+                        st = os.fstat(f.fileno())
+                        data = f.read()
+                except OSError:
+                    continue
+                self._add(file_info, st.st_mtime_ns, st.st_size, data)
+            self.generation = generation
+
+    def _term_ids(self, term):
+        """Ids of files with a word starting with term."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        ids = set()
+        i = bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            ids |= self.postings[vocabulary[i]]
+            i += 1
+        return ids
+
+    def candidates(self, terms):
+        """File dicts containing every term, sorted by relative path."""
+        with self._lock:
+            ids = None
+            # Rarest terms first keeps the intersections small
+            for term_ids in sorted((self._term_ids(term) for term in terms), key=len):
+                ids = term_ids if ids is None else ids & term_ids
+                if not ids:
+                    return []
+            return sorted((self.file_info[file_id] for file_id in ids or ()),
+                          key=lambda file_info: file_info['relative_path'])
+
+    def search(self, query, limit=DEFAULT_CONTENT_SEARCH_LIMIT):
+        """Files containing every word of query, with their matching lines.
+
+        Files holding the whole query as written (case-insensitively) come
+        first. Returns (matches, candidate_count); confirmation stops once
+        `limit` such files are found.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return [], 0
+        phrase = query.strip().lower()
+        candidates = self.candidates(terms)
+        exact = []
+        partial = []
+        for file_info in candidates:
+            if len(exact) >= limit:
+                break
+            try:
+                text = content_cache.read_text(file_info['path'], errors='ignore')
+            except OSError:
+                continue
+            lines, is_exact = matching_lines(text, phrase, terms)
+            if lines:
+                match = dict(file_info, lines=lines, exact=is_exact)
+                (exact if is_exact else partial).append(match)
+        return (exact + partial)[:limit], len(candidates)
+
+
+def matching_lines(text, phrase, terms):
+    """Lines holding the phrase, or failing that any of the terms; returns (lines, found_phrase)."""
+    lowered = text.lower()
+    original_lines = None
+    for needles, is_exact in (((phrase,), True), (terms, False)):
+        if not any(needle in lowered for needle in needles):
+            continue
+        if original_lines is None:
+            original_lines = text.split('\n')
+        lines = []
+        for number, line in enumerate(lowered.split('\n')):
+            if any(needle in line for needle in needles):
+                lines.append({'line': number + 1, 'text': original_lines[number][:MAX_LINE_LENGTH]})
+                if len(lines) == MAX_LINES_PER_FILE:
+                    break
+        return lines, is_exact
+    return [], False
+
+
+_content_indexes = {}
+_content_indexes_lock = threading.Lock()
+
+
+def get_content_index(root, create=True):
+    """The content index for root; with create=False, None if no search has built one yet."""
+    with _content_indexes_lock:
+        index = _content_indexes.get(root)
+        if index is None and create:
+            index = _content_indexes[root] = ContentIndex(root)
+        return index
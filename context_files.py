@@ -0,0 +1,461 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from content_cache import content_cache
+from token_counter import get_tokenizer, apply_token_budget, DEFAULT_TOKENIZER
+from binary_sniffer import is_binary_file
+from large_files import read_window, iter_window_chunks, LARGE_FILE_THRESHOLD
+from compaction import compaction_kind, compact_text
+from skeleton import outline_file, skeleton_kind
+
+# Upper bound on concurrent file reads for one context request
+CONTEXT_READ_WORKERS = 8
+
+# Files above this size are line-counted in chunks instead of being pulled into the content cache
+LINE_COUNT_STREAM_THRESHOLD = 8 * 1024 * 1024
+LINE_COUNT_CHUNK_SIZE = 1024 * 1024
+
+# How binary files are handled in a bundle: replaced by a short stub, left out, or sent as text
+BINARY_FILE_MODES = ('stub', 'skip', 'include')
+
+# Characters read, escaped and written at a time by the streamed context response
+CONTEXT_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def get_display_path(file_path, selected_directory):
+    display_path = os.path.basename(file_path) # Default to basename
+    if selected_directory:
+        norm_selected_dir = os.path.normpath(selected_directory)
+        norm_file_path = os.path.normpath(file_path)
+        if os.path.commonpath([norm_file_path, norm_selected_dir]) == norm_selected_dir:
+            display_path = os.path.relpath(norm_file_path, norm_selected_dir)
+    return display_path.replace('\\', '/')
+
+
+def count_lines(data):
+    # A trailing line without a newline still counts as a line
+    count = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        count += 1
+    return count
+
+
+def count_file_lines(file_path):
+    """Count lines with a binary newline scan, through the content cache for normal-sized files."""
+    if os.path.getsize(file_path) <= LINE_COUNT_STREAM_THRESHOLD:
+        return content_cache.derive(file_path, 'line_count', count_lines)
+    count = 0
+    last = b''
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(LINE_COUNT_CHUNK_SIZE)
+            if not chunk:
+                break
+            count += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last and last != b'\n':
+        count += 1
+    return count
+
+
+class ContextOptions:
+    """Per-request settings for how context files are read and rendered."""
+
+    def __init__(self, tokenizer=None, binary_files='stub', dedupe=False, compact=False, strip_comments=False,
+                 skeleton=False, skeleton_min_bytes=0):
+        self.tokenizer = tokenizer or DEFAULT_TOKENIZER
+        self.count_tokens = get_tokenizer(self.tokenizer)
+        if binary_files not in BINARY_FILE_MODES:
+            raise ValueError(f'Unknown binary_files mode: {binary_files}')
+        self.binary_files = binary_files
+        # Send each distinct body once; later copies refer to the first path that had it
+        self.dedupe = bool(dedupe)
+        # Drop licence headers and blank runs, and with strip_comments comments and docstrings too
+        self.strip_comments = bool(strip_comments)
+        self.compact = bool(compact) or self.strip_comments
+        # Send Python and JS/TS files at least skeleton_min_bytes long as signatures and docstrings only
+        self.skeleton = bool(skeleton)
+        self.skeleton_min_bytes = int(skeleton_min_bytes or 0)
+
+    @classmethod
+    def from_request(cls, data):
+        """Build options from a request payload; raises ValueError for invalid values."""
+        try:
+            return cls(tokenizer=data.get('tokenizer'),
+                       binary_files=data.get('binary_files', 'stub'),
+                       dedupe=data.get('dedupe', False),
+                       compact=data.get('compact', False),
+                       strip_comments=data.get('strip_comments', False),
+                       skeleton=data.get('skeleton', False),
+                       skeleton_min_bytes=data.get('skeleton_min_bytes', 0))
+        except TypeError as e:
+            # Lists or objects where a name or number belongs (e.g. skeleton_min_bytes: [])
+            raise ValueError(f'Invalid context option: {e}')
+
+
+def context_request_params(data):
+    """(concurrency, token_budget, budget_strategy) from a get_context payload; raises ValueError."""
+    try:
+        concurrency = int(data.get('concurrency', CONTEXT_READ_WORKERS))
+        token_budget = data.get('token_budget')
+        token_budget = int(token_budget) if token_budget is not None else None
+    except TypeError:
+        raise ValueError('concurrency and token_budget must be integers')
+    budget_strategy = data.get('budget_strategy', 'drop')
+    if budget_strategy not in ('drop', 'truncate'):
+        raise ValueError(f'Unknown budget_strategy: {budget_strategy}')
+    return concurrency, token_budget, budget_strategy
+
+
+def context_etag(data):
+    """Strong validator for the get_context body a payload produces, at one stat per file.
+
+    Covers every payload field that shapes the body plus each file's
+    (mtime, size), the same test the content cache uses for staleness.
+    """
+    stats = []
+    for file_path in data.get('file_paths', []):
+        try:
+            st = os.stat(file_path)
+            stats.append([st.st_mtime_ns, st.st_size])
+        except OSError:
+            stats.append(None)
+    # Concurrency only changes how the files are read, not the body
+    params = {k: v for k, v in data.items() if k != 'concurrency'}
+    return hashlib.sha1(json.dumps([params, stats], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def duplicate_record(display_path, first_path, options):
+    """Record sent in place of a file whose body already appeared in the bundle under first_path."""
+    content = f"Identical to {first_path}."
+    return {
+        'path': display_path,
+        'content': content,
+        'tokens': options.count_tokens(content),
+        'duplicate_of': first_path
+    }
+
+
+def dedupe_context_files(records, options):
+    """Replace every record whose hash was already seen with a reference to the first one."""
+    first_paths = {}
+    for record in records:
+        digest = record.get('hash')
+        if digest is None:
+            yield record
+        elif digest in first_paths:
+            yield duplicate_record(record['path'], first_paths[digest], options)
+        else:
+            first_paths[digest] = record['path']
+            yield record
+
+
+def build_context_result(files_data, options, token_budget=None, budget_strategy='drop'):
+    """The get_context response body for the records read, with the token budget applied."""
+    result = {'tokenizer': options.tokenizer}
+    if options.dedupe:
+        result['duplicates'] = sum(1 for f in files_data if 'duplicate_of' in f)
+    if options.compact or options.skeleton:
+        result['saved'] = compaction_totals(files_data)
+    if token_budget is not None:
+        files_data, dropped, truncated = apply_token_budget(
+            files_data, token_budget, budget_strategy, options.count_tokens)
+        result.update({'token_budget': token_budget, 'dropped': dropped, 'truncated': truncated})
+    result['files'] = files_data # List of file objects
+    result['total_tokens'] = sum(f['tokens'] for f in files_data)
+    return result
+
+
+class BinaryFileError(Exception):
+    """Raised by read_file_result for files the binary sniffer flags."""
+
+
+def read_file_window(data):
+    """Byte window (offset/length or head/tail) from a read-file payload as ints; raises ValueError."""
+    window = {}
+    for key in ('offset', 'length', 'head', 'tail'):
+        if data.get(key) is not None:
+            try:
+                window[key] = int(data[key])
+            except (TypeError, ValueError):
+                raise ValueError(f'{key} must be an integer')
+    return window
+
+
+def read_file_result(file_path, window):
+    """The read-file response body for file_path, whole or as a byte window.
+
+    Raises BinaryFileError for binary files and UnicodeDecodeError for
+    text that is not UTF-8.
+    """
+    # Sniff the first few KB rather than finding out after reading the whole file
+    if is_binary_file(file_path):
+        raise BinaryFileError(file_path)
+    if window or os.path.getsize(file_path) > LARGE_FILE_THRESHOLD:
+        content, size, ranges = read_window(file_path, errors='strict', **window)
+        return {
+            'content': content,
+            'filename': os.path.basename(file_path),
+            'path': file_path,
+            'size': size,
+            'ranges': ranges,
+            'truncated': ranges != [(0, size)]
+        }
+    return {
+        'content': content_cache.read_text(file_path),
+        'filename': os.path.basename(file_path),
+        'path': file_path
+    }
+
+
+def binary_stub(file_path, display_path, options):
+    """Record used in place of a binary file's content, or None when binaries are skipped."""
+    if options.binary_files == 'skip':
+        return None
+    content = f"Binary file {display_path} omitted ({os.path.getsize(file_path)} bytes)."
+    return {
+        'path': display_path,
+        'content': content,
+        'tokens': options.count_tokens(content),
+        'binary': True
+    }
+
+
+def apply_compaction(record, compacted, compacted_tokens):
+    """Swap a record's content for its compacted form, noting the bytes and tokens saved."""
+    record['saved'] = {
+        'bytes': len(record['content'].encode('utf-8')) - len(compacted.encode('utf-8')),
+        'tokens': record['tokens'] - compacted_tokens
+    }
+    record['content'] = compacted
+    record['tokens'] = compacted_tokens
+
+
+def compaction_totals(files_data):
+    return {
+        'bytes': sum(f['saved']['bytes'] for f in files_data if 'saved' in f),
+        'tokens': sum(f['saved'].get('tokens', 0) for f in files_data if 'saved' in f)
+    }
+
+
+def skeleton_record(file_path, display_path, options):
+    """Record holding just the file's outline, or None when it has no outline or is too small."""
+    if not options.skeleton or skeleton_kind(file_path) is None:
+        return None
+    size = os.path.getsize(file_path)
+    if size < options.skeleton_min_bytes:
+        return None
+    outline = outline_file(file_path)
+    if outline is None:
+        return None
+    count_tokens = options.count_tokens
+    record = {
+        'path': display_path,
+        'content': outline,
+        'tokens': count_tokens(outline),
+        'skeleton': True,
+        'saved': {'bytes': size - len(outline.encode('utf-8'))}
+    }
+    if size <= LARGE_FILE_THRESHOLD:
+        # Whole-file token counts are only known (and memoised) for files the content cache holds
+        content = content_cache.read_text(file_path, errors='ignore')
+        record['saved']['tokens'] = content_cache.derive(
+            file_path, ('tokens', options.tokenizer), lambda data: count_tokens(content)) - record['tokens']
+        if options.dedupe:
+            record['hash'] = content_cache.digest(file_path)
+    return record
+
+
+def read_context_file(file_path, selected_directory, options):
+    """Read one file for a context bundle; returns None for paths that no longer exist."""
+    if not os.path.exists(file_path):
+        return None
+
+    # Stands in for the display path in the error record if computing it fails
+    display_path = os.path.basename(file_path)
+    count_tokens = options.count_tokens
+    try:
+        display_path = get_display_path(file_path, selected_directory)
+        # Binaries are detected from the first few KB, before anything else is read
+        if options.binary_files != 'include' and is_binary_file(file_path):
+            return binary_stub(file_path, display_path, options)
+        record = skeleton_record(file_path, display_path, options)
+        if record is not None:
+            return record
+        if os.path.getsize(file_path) > LARGE_FILE_THRESHOLD:
+            # Large files are served as a capped window and kept out of the content cache
+            content = read_window(file_path)[0]
+            record = {'path': display_path, 'content': content, 'tokens': count_tokens(content)}
+            if options.compact:
+                compacted = compact_text(content, compaction_kind(file_path), options.strip_comments)
+                apply_compaction(record, compacted, count_tokens(compacted))
+            return record
+        content = content_cache.read_text(file_path, errors='ignore')
+        # Token counts are memoised with the content, so they follow the file's mtime
+        tokens = content_cache.derive(file_path, ('tokens', options.tokenizer),
+                                      lambda data: count_tokens(content))
+        record = {'path': display_path, 'content': content, 'tokens': tokens}
+        if options.compact:
+            # Compacted text is memoised per body too, so repeat requests only pay the lookups
+            kind = compaction_kind(file_path)
+            variant = ('compact', kind, options.strip_comments)
+            compacted = content_cache.derive(file_path, variant,
+                                             lambda data: compact_text(content, kind, options.strip_comments))
+            apply_compaction(record, compacted, content_cache.derive(
+                file_path, variant + ('tokens', options.tokenizer), lambda data: count_tokens(compacted)))
+        if options.dedupe:
+            record['hash'] = content_cache.digest(file_path)
+        return record
+    except PermissionError:
+        print(f"Permission denied for file: {file_path}")
+        content = f"Error: Could not read file {display_path} due to permissions."
+    except Exception as e:
+        # Handle other potential errors during file reading for a specific file
+        print(f"Error reading file {file_path}: {e}")
+        content = f"Error: Could not read file {display_path}. {str(e)}"
+    return {
+        'path': display_path,
+        'content': content,
+        'tokens': count_tokens(content)
+    }
+
+
+def iter_context_files(file_paths, selected_directory, options, concurrency=CONTEXT_READ_WORKERS):
+    """Read files on a bounded thread pool, yielding records in the order requested."""
+    concurrency = max(1, min(concurrency, CONTEXT_READ_WORKERS, len(file_paths) or 1))
+    if options.dedupe:
+        yield from dedupe_context_files(_iter_read(file_paths, selected_directory, options, concurrency),
+                                        options)
+    else:
+        yield from _iter_read(file_paths, selected_directory, options, concurrency)
+
+
+def _iter_read(file_paths, selected_directory, options, concurrency):
+    read = lambda path: read_context_file(path, selected_directory, options)
+    if concurrency == 1:
+        for result in map(read, file_paths):
+            if result is not None:
+                yield result
+        return
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for result in executor.map(read, file_paths):
+            if result is not None:
+                yield result
+
+
+def read_context_files(file_paths, selected_directory, options, concurrency=CONTEXT_READ_WORKERS):
+    return list(iter_context_files(file_paths, selected_directory, options, concurrency))
+
+
+def iter_file_chunks(file_path, chunk_size=CONTEXT_STREAM_CHUNK_SIZE):
+    """Yield a file's decoded text in chunks without holding the whole file in memory."""
+    if os.path.getsize(file_path) > LARGE_FILE_THRESHOLD:
+        yield from iter_window_chunks(file_path)
+        return
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_context_json(file_paths, selected_directory, options):
+    """Yield the get_context JSON document incrementally, one escaped chunk at a time.
+
+    Files are read sequentially in chunks and each chunk is JSON-escaped on
+    its own, so peak memory stays around one chunk rather than one bundle.
+    Token counts are summed per chunk and may differ slightly from the
+    whole-file count of the buffered response.
+    """
+    count_tokens = options.count_tokens
+    total_tokens = 0
+    # Hash -> first display path, for dedupe; large files are streamed without hashing
+    first_paths = {}
+    duplicates = 0
+    saved = {'bytes': 0, 'tokens': 0}
+    yield '{"files": ['
+    first = True
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            continue
+        try:
+            display_path = get_display_path(file_path, selected_directory)
+        except ValueError:
+            display_path = None
+        try:
+            is_binary = options.binary_files != 'include' and is_binary_file(file_path)
+        except OSError:
+            is_binary = False
+        record = None
+        digest = None
+        if display_path is None:
+            # read_context_file reports the path error in this file's own record
+            record = read_context_file(file_path, selected_directory, options)
+        elif is_binary:
+            record = binary_stub(file_path, display_path, options)
+            if record is None:
+                continue
+        elif options.dedupe or options.compact or options.skeleton:
+            try:
+                small = os.path.getsize(file_path) <= LARGE_FILE_THRESHOLD
+            except OSError:
+                small = False
+            if small and options.dedupe:
+                try:
+                    digest = content_cache.digest(file_path)
+                except OSError:
+                    pass
+            if digest in first_paths:
+                record = duplicate_record(display_path, first_paths[digest], options)
+                duplicates += 1
+            else:
+                if digest is not None:
+                    first_paths[digest] = display_path
+                if options.skeleton:
+                    try:
+                        record = skeleton_record(file_path, display_path, options)
+                    except OSError:
+                        pass # Streamed below, which reports the error in place of the content
+                if record is None and small and options.compact:
+                    # Compaction needs the whole file; it is at most LARGE_FILE_THRESHOLD
+                    record = read_context_file(file_path, selected_directory, options)
+        if record is not None:
+            yield ('' if first else ', ') + json.dumps(record)
+            first = False
+            total_tokens += record['tokens']
+            if 'saved' in record:
+                saved['bytes'] += record['saved']['bytes']
+                saved['tokens'] += record['saved'].get('tokens', 0)
+            continue
+        yield ('' if first else ', ') + '{"path": ' + json.dumps(display_path)
+        if digest is not None:
+            yield ', "hash": ' + json.dumps(digest)
+        yield ', "content": "'
+        first = False
+        tokens = 0
+        started = False
+        try:
+            for chunk in iter_file_chunks(file_path):
+                started = True
+                tokens += count_tokens(chunk)
+                yield json.dumps(chunk)[1:-1]
+        except Exception as e:
+            print(f"Error reading file {file_path}: {e}")
+            if isinstance(e, PermissionError):
+                error = f"Error: Could not read file {display_path} due to permissions."
+            else:
+                error = f"Error: Could not read file {display_path}. {str(e)}"
+            if started:
+                error = '\n' + error
+            tokens += count_tokens(error)
+            yield json.dumps(error)[1:-1]
+        total_tokens += tokens
+        yield '", "tokens": ' + str(tokens) + '}'
+    yield '], "tokenizer": ' + json.dumps(options.tokenizer)
+    if options.dedupe:
+        yield ', "duplicates": ' + str(duplicates)
+    if options.compact or options.skeleton:
+        yield ', "saved": ' + json.dumps(saved)
+    yield ', "total_tokens": ' + str(total_tokens) + '}'
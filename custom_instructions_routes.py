@@ -10,17 +10,19 @@ INSTRUCTIONS_FILE_NAME = 'custom_instructions.json'
 def get_instructions_file_path():
     return os.path.join(current_app.root_path, INSTRUCTIONS_FILE_NAME)
 
+def load_custom_instructions():
+    instructions_file = get_instructions_file_path()
+    if not os.path.exists(instructions_file):
+        # If file doesn't exist, there are no instructions
+        return ""
+    with open(instructions_file, 'r') as f:
+        data = json.load(f)
+        return data.get("instructions", "")
+
 @custom_instructions_bp.route('/api/custom-instructions', methods=['GET'])
 def get_custom_instructions():
-    instructions_file = get_instructions_file_path()
     try:
-        if os.path.exists(instructions_file):
-            with open(instructions_file, 'r') as f:
-                data = json.load(f)
-                return jsonify({"instructions": data.get("instructions", "")})
-        else:
-            # If file doesn't exist, return empty instructions
-            return jsonify({"instructions": ""})
+        return jsonify({"instructions": load_custom_instructions()})
     except Exception as e:
         current_app.logger.error(f"Error reading custom instructions file: {e}")
         return jsonify({"error": "Failed to load custom instructions"}), 500
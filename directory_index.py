@@ -0,0 +1,520 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from binary_sniffer import is_binary_stat
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# Indexes are persisted here, one JSON file per browsed root
+INDEX_DIR = os.path.join(os.path.dirname(__file__), '.directory_index')
+
+# Bumped whenever the node layout changes so stale on-disk indexes are rebuilt
+INDEX_VERSION = 2
+
+# Directory levels read outside the index (by list_level) kept per index, each validated by its mtime
+LEVEL_CACHE_ENTRIES = 256
+
+# Thread pool bounds for the parallel scanner; directory reads are I/O bound
+DEFAULT_SCAN_WORKERS = 16
+MAX_SCAN_WORKERS = 64
+
+
+def scan_workers(scanner, workers=None):
+    """Thread count for a browse request's scanner; raises ValueError for unknown scanners.
+
+    'sequential' walks on the request thread, 'parallel' fans directories out over a thread pool.
+    """
+    if scanner not in ('sequential', 'parallel'):
+        raise ValueError(f'Unknown scanner: {scanner}')
+    if scanner == 'sequential':
+        return 1
+    return max(1, min(int(workers or DEFAULT_SCAN_WORKERS), MAX_SCAN_WORKERS))
+
+
+@contextmanager
+def generation_lock(path):
+    """Hold an exclusive lock, across worker processes, on the file storing an index's last generation.
+
+    Yields the open file; see read_locked_generation and write_locked_generation.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a+', encoding='utf-8') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_locked_generation(f):
+    f.seek(0)
+    try:
+        return int(f.read().strip() or 0)
+    except ValueError:
+        return 0
+
+
+def write_locked_generation(f, generation):
+    f.seek(0)
+    f.truncate()
+    f.write(str(generation))
+    f.flush()
+
+
+def read_ignore_files(abs_dir, names):
+    """Return [name, mtime_ns, size, lines] for each of the given ignore files in abs_dir."""
+    ignore = []
+    for name in names:
+        path = os.path.join(abs_dir, name)
+        try:
+            st = os.stat(path)
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.read().splitlines()
+        except (OSError, PermissionError):
+            continue
+        ignore.append([name, st.st_mtime_ns, st.st_size, lines])
+    return ignore
+
+
+def ignore_files_changed(abs_dir, node):
+    for name, mtime, size, _ in node.get('ignore', []):
+        try:
+            st = os.stat(os.path.join(abs_dir, name))
+        except OSError:
+            return True
+        if st.st_mtime_ns != mtime or st.st_size != size:
+            return True
+    return False
+
+
+def ignore_lines(node):
+    return [line for ignore_file in node.get('ignore', []) for line in ignore_file[3]]
+
+
+def node_rules(parent_rules, rel_dir, node):
+    """Rules in effect inside a directory: its parent's plus its own ignore files."""
+    return parent_rules.extend(rel_dir.replace(os.sep, '/'), ignore_lines(node))
+
+
+def sniff_entry(entry, st):
+    try:
+        return is_binary_stat(entry.path, st)
+    except (OSError, PermissionError):
+        return False
+
+
+def list_directory(abs_dir, rel_dir, matcher, parent_rules):
+    """Read one directory level into an index node.
+
+    Ignore-file rules are applied here, before any subdirectory is descended
+    into, so ignored subtrees are never entered. File entries are
+    [name, size, binary], where binary comes from the extension or a sniff of
+    the first few KB. Returns (node, rules) where rules is what the
+    directory's children inherit.
+    """
+    mtime = os.stat(abs_dir).st_mtime_ns
+    with os.scandir(abs_dir) as it:
+        entries = list(it)
+    present = set(entry.name for entry in entries)
+    node = {'mtime': mtime, 'dirs': [], 'files': []}
+    ignore = read_ignore_files(abs_dir, [name for name in matcher.ignore_files if name in present])
+    if ignore:
+        node['ignore'] = ignore
+    rules = node_rules(parent_rules, rel_dir, node)
+    prefix = rel_dir.replace(os.sep, '/') + '/' if rel_dir else ''
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not matcher.excludes_dir(entry.name) and not rules.is_ignored(prefix + entry.name, True):
+                    node['dirs'].append(entry.name)
+            elif entry.is_symlink() and entry.is_dir():
+                # Like os.walk, links to directories are not followed: they can loop back
+                # up the tree or list a shared tree (pnpm node_modules) once per link
+                continue
+            elif not matcher.excludes_file(entry.name) and not rules.is_ignored(prefix + entry.name, False):
+                st = entry.stat()
+                node['files'].append([entry.name, st.st_size, sniff_entry(entry, st)])
+        except (OSError, PermissionError):
+            continue
+    node['dirs'].sort()
+    node['files'].sort()
+    return node, rules
+
+
+class DirectoryIndex:
+    """On-disk listing of one root, refreshed by comparing directory mtimes.
+
+    Directories whose mtime is unchanged reuse their cached entries, so a
+    refresh costs one stat per directory rather than one per file. Sizes of
+    files edited in place are only picked up once their directory is rescanned.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.index_file = os.path.join(
+            INDEX_DIR, hashlib.sha1(root.encode('utf-8')).hexdigest() + '.json')
+        self.nodes = None
+        self.generation = 0
+        self.fingerprint = None
+        self.refreshing = False
+        # mtime of the index file when this process last read or wrote it
+        self._disk_mtime = None
+        # rel_dir -> (fingerprint, node) for levels read by list_level while the index was stale
+        self._levels = OrderedDict()
+        self._levels_lock = threading.Lock()
+        # Held while nodes, generation and fingerprint are replaced together, so snapshots see one state
+        self._state_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def loaded(self):
+        return self.nodes is not None
+
+    def _load(self):
+        """Adopt the on-disk index if it is newer than what this process holds."""
+        try:
+            disk_mtime = os.stat(self.index_file).st_mtime_ns
+        except OSError:
+            return
+        if disk_mtime == self._disk_mtime:
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('root') == self.root and data.get('version') == INDEX_VERSION
+                    and (self.nodes is None or data['generation'] > self.generation)):
+                self._publish(data['nodes'], data['generation'], data.get('fingerprint'))
+            self._disk_mtime = disk_mtime
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _publish(self, nodes, generation, fingerprint):
+        with self._state_lock:
+            self.nodes = nodes
+            self.generation = generation
+            self.fingerprint = fingerprint
+
+    def _commit(self, nodes, fingerprint):
+        """Publish and save a changed listing under the next generation.
+
+        Generations are drawn from a counter kept next to the index file and
+        incremented under a file lock, so worker processes sharing the index
+        never hand out the same generation for different listings.
+        """
+        with generation_lock(self.index_file + '.generation') as f:
+            generation = max(self.generation, read_locked_generation(f)) + 1
+            write_locked_generation(f, generation)
+            self._publish(nodes, generation, fingerprint)
+            self._save()
+
+    def sync(self):
+        """Pick up a refresh saved by another worker process, unless one is running here."""
+        if not self.refreshing and self._lock.acquire(blocking=False):
+            try:
+                self._load()
+            finally:
+                self._lock.release()
+
+    def _save(self):
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        # Per-process temporary file, so workers saving at the same time never interleave writes
+        tmp_file = f'{self.index_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'root': self.root,
+                'generation': self.generation,
+                'fingerprint': self.fingerprint,
+                'nodes': self.nodes
+            }, f)
+        os.replace(tmp_file, self.index_file)
+        try:
+            self._disk_mtime = os.stat(self.index_file).st_mtime_ns
+        except OSError:
+            pass
+
+    def refresh(self, matcher, workers=1):
+        """Rescan changed directories; returns True if the listing changed."""
+        it = self.iter_refresh(matcher, workers)
+        while True:
+            try:
+                next(it)
+            except StopIteration as stop:
+                return stop.value
+
+    def _resolve_directory(self, rel_dir, parent_rules, rules_changed, old, matcher):
+        """Reuse or rescan one directory; returns (node, rules, rules_changed, node_changed)."""
+        abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        if (old is not None and not rules_changed
+                and os.stat(abs_dir).st_mtime_ns == old['mtime']
+                and not ignore_files_changed(abs_dir, old)):
+            return old, node_rules(parent_rules, rel_dir, old), rules_changed, False
+        node, rules = list_directory(abs_dir, rel_dir, matcher, parent_rules)
+        # New or edited ignore files change what every descendant keeps
+        if old is None or ignore_lines(node) != ignore_lines(old):
+            rules_changed = True
+        return node, rules, rules_changed, node != old
+
+    def iter_refresh(self, matcher, workers=1):
+        """Refresh the index, yielding (rel_dir, node) in walk order as each directory is resolved.
+
+        With workers > 1, subdirectories are submitted to a thread pool as soon
+        as their parent is resolved, while results are still consumed in the
+        same depth-first order as the sequential walk.
+        """
+        with self._lock:
+            self.refreshing = True
+            executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+            try:
+                # Start from the newest listing any worker process has saved
+                self._load()
+                old_nodes = self.nodes or {}
+                # Changed exclusion rules invalidate every cached directory
+                force = matcher.fingerprint != self.fingerprint
+                new_nodes = {}
+                changed = force or not self.loaded
+
+                def schedule(rel_dir, parent_rules, rules_changed):
+                    args = (rel_dir, parent_rules, rules_changed, old_nodes.get(rel_dir), matcher)
+                    if executor is None:
+                        return args
+                    return executor.submit(self._resolve_directory, *args)
+
+                def resolve(pending):
+                    if executor is None:
+                        return self._resolve_directory(*pending)
+                    return pending.result()
+
+                stack = [('', schedule('', matcher.root_rules, force))]
+                while stack:
+                    rel_dir, pending = stack.pop()
+                    try:
+                        node, rules, rules_changed, node_changed = resolve(pending)
+                    except (OSError, PermissionError):
+                        if rel_dir == '':
+                            raise
+                        changed = changed or rel_dir in old_nodes
+                        continue
+                    changed = changed or node_changed
+                    new_nodes[rel_dir] = node
+                    yield rel_dir, node
+                    children = []
+                    for name in node['dirs']:
+                        child = os.path.join(rel_dir, name) if rel_dir else name
+                        children.append((child, schedule(child, rules, rules_changed)))
+                    stack.extend(reversed(children))
+                if len(new_nodes) != len(old_nodes):
+                    changed = True
+                if changed:
+                    self._commit(new_nodes, matcher.fingerprint)
+                return changed
+            finally:
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                self.refreshing = False
+
+    def refresh_async(self, matcher, workers=1):
+        if self.refreshing:
+            return
+        self.refreshing = True
+
+        def run():
+            try:
+                self.refresh(matcher, workers)
+            except Exception as e:
+                print(f"Error refreshing directory index for {self.root}: {e}")
+                self.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def revalidate(self, matcher, workers=1):
+        """Walk the tree on first use; afterwards serve the cached listing and refresh in the background."""
+        if not self.loaded:
+            self.refresh(matcher, workers)
+        else:
+            self.refresh_async(matcher, workers)
+
+    def snapshot(self):
+        """(generation, refreshing, etag, nodes) of the listing as it stands now.
+
+        The etag is a strong validator for a listing reported with this
+        generation and refreshing flag, and nodes is the listing it names, so
+        a body built from the snapshot never runs ahead of its tag. The index
+        file's mtime is part of the etag, so a rebuilt index that restarts its
+        generation count gets new tags.
+        """
+        with self._state_lock:
+            nodes, generation, fingerprint = self.nodes, self.generation, self.fingerprint
+            refreshing, disk_mtime = self.refreshing, self._disk_mtime
+        etag = hashlib.sha1(json.dumps(
+            [self.root, fingerprint, disk_mtime, generation, refreshing]).encode('utf-8')).hexdigest()
+        return generation, refreshing, etag, nodes
+
+    def listing(self, matcher, workers=1, snapshot=None):
+        """The browse-directory response body: the full file list plus generation.
+
+        The first call walks the tree; later calls serve the cached listing at
+        once and pick up changes in the background. Pass a snapshot() taken
+        after revalidate() to report that state without revalidating again.
+        """
+        if snapshot is None:
+            self.revalidate(matcher, workers)
+            snapshot = self.snapshot()
+        generation, refreshing, _, nodes = snapshot
+        return {
+            'files': list(self.iter_files(nodes)),
+            'generation': generation,
+            'refreshing': refreshing
+        }
+
+    def update_directories(self, rel_dirs, matcher):
+        """Rescan just the given directories, plus any new or newly un-ignored folders beneath them.
+
+        Meant for watchers that know where changes happened. Returns a list
+        of (rel_dir, old_node, new_node) for every directory whose node was
+        replaced; new_node is None for directories that disappeared. Falls
+        back to a full refresh (returning None) when the index is not loaded
+        or the exclusion rules changed.
+        """
+        if not self.loaded or matcher.fingerprint != self.fingerprint:
+            self.refresh(matcher)
+            return None
+        with self._lock:
+            self._load()
+            nodes = dict(self.nodes)
+            changes = []
+            for top in sorted(set(rel_dirs), key=lambda d: d.count(os.sep) if d else -1):
+                if top not in nodes:
+                    # Not indexed: excluded, removed, or new and picked up by rescanning its parent
+                    continue
+                parent_rules = matcher.root_rules
+                prefix = ''
+                for part in (top.split(os.sep) if top else []):
+                    parent_rules = node_rules(parent_rules, prefix, nodes[prefix])
+                    prefix = os.path.join(prefix, part) if prefix else part
+                stack = [(top, parent_rules, True, False)]
+                while stack:
+                    rel_dir, parent_rules, forced, rules_changed = stack.pop()
+                    old = nodes.get(rel_dir)
+                    abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+                    try:
+                        if forced:
+                            node, rules = list_directory(abs_dir, rel_dir, matcher, parent_rules)
+                            rules_changed = old is None or ignore_lines(node) != ignore_lines(old)
+                            node_changed = node != old
+                        else:
+                            node, rules, rules_changed, node_changed = self._resolve_directory(
+                                rel_dir, parent_rules, rules_changed, old, matcher)
+                    except (OSError, PermissionError):
+                        node, node_changed = None, old is not None
+                    if node_changed:
+                        changes.append((rel_dir, old, node))
+                        if node is None:
+                            nodes.pop(rel_dir, None)
+                        else:
+                            nodes[rel_dir] = node
+                    old_dirs = set(old['dirs']) if old is not None else set()
+                    new_dirs = set(node['dirs']) if node is not None else set()
+                    for name in old_dirs - new_dirs:
+                        child = os.path.join(rel_dir, name) if rel_dir else name
+                        for path in [p for p in nodes if p == child or p.startswith(child + os.sep)]:
+                            changes.append((path, nodes.pop(path), None))
+                    for name in sorted(new_dirs):
+                        # Existing folders report their own changes; only new ones, or all of
+                        # them when this directory's ignore files changed, are walked here
+                        if name in old_dirs and not rules_changed:
+                            continue
+                        child = os.path.join(rel_dir, name) if rel_dir else name
+                        stack.append((child, rules, False, rules_changed))
+            if changes:
+                self._commit(nodes, self.fingerprint)
+            return changes
+
+    def list_level(self, rel_dir, matcher):
+        """One directory's node: from the index when still current, otherwise from a single readdir.
+
+        Raises FileNotFoundError when the directory, or one of its ancestors,
+        is excluded or ignored.
+        """
+        abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        mtime = os.stat(abs_dir).st_mtime_ns
+        node = (self.nodes or {}).get(rel_dir) if self.fingerprint == matcher.fingerprint else None
+        if node is None:
+            with self._levels_lock:
+                fingerprint, node = self._levels.get(rel_dir, (None, None))
+            if fingerprint != matcher.fingerprint:
+                node = None
+        if node is not None and mtime == node['mtime'] and not ignore_files_changed(abs_dir, node):
+            return node
+        # Rebuild the inherited rules along the path, reading only the ancestors' ignore files
+        rules = matcher.root_rules
+        prefix = ''
+        for part in (rel_dir.split(os.sep) if rel_dir else []):
+            abs_prefix = os.path.join(self.root, prefix) if prefix else self.root
+            rules = node_rules(rules, prefix, {'ignore': read_ignore_files(abs_prefix, matcher.ignore_files)})
+            prefix = os.path.join(prefix, part) if prefix else part
+            if matcher.excludes_dir(part) or rules.is_ignored(prefix.replace(os.sep, '/'), True):
+                raise FileNotFoundError(f'Directory is excluded: {rel_dir}')
+        node = list_directory(abs_dir, rel_dir, matcher, rules)[0]
+        # Paging through a folder the index has not caught up with reads it once, not once per page
+        with self._levels_lock:
+            self._levels[rel_dir] = (matcher.fingerprint, node)
+            self._levels.move_to_end(rel_dir)
+            while len(self._levels) > LEVEL_CACHE_ENTRIES:
+                self._levels.popitem(last=False)
+        return node
+
+    def iter_files(self, nodes=None):
+        """Yield file dicts in top-down walk order from the cached listing, or from a snapshot's nodes."""
+        nodes = (self.nodes if nodes is None else nodes) or {}
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            node = nodes.get(rel_dir)
+            if node is None:
+                continue
+            yield from self.node_files(rel_dir, node)
+            for name in reversed(node['dirs']):
+                stack.append(os.path.join(rel_dir, name) if rel_dir else name)
+
+    def node_files(self, rel_dir, node):
+        abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        for name, size, binary in node['files']:
+            yield {
+                'name': name,
+                'path': os.path.join(abs_dir, name),
+                'relative_path': os.path.join(rel_dir, name) if rel_dir else name,
+                'size': size,
+                'binary': binary
+            }
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_directory_index(root):
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = DirectoryIndex(root)
+    # Another worker process may have refreshed and saved this index since
+    index.sync()
+    return index
@@ -0,0 +1,91 @@
+from flask import Blueprint, jsonify, request
+import os
+import bisect
+import threading
+from collections import OrderedDict
+from directory_index import get_directory_index
+from exclusion_matcher import get_exclusion_matcher
+
+directory_tree_bp = Blueprint('directory_tree_bp', __name__)
+
+DEFAULT_TREE_PAGE_SIZE = 200
+MAX_TREE_PAGE_SIZE = 1000
+# Sorted levels kept for paging, across all browsed roots
+TREE_LEVEL_CACHE_ENTRIES = 256
+
+_levels = OrderedDict() # (root, rel_dir) -> (node, generation, keys, entries)
+_levels_lock = threading.Lock()
+
+
+def tree_entries(index, rel_dir, node):
+    """Folders first, then files, each keyed by a sortable cursor string."""
+    for name in node['dirs']:
+        yield '0' + name, {
+            'type': 'folder',
+            'name': name,
+            'relative_path': os.path.join(rel_dir, name) if rel_dir else name
+        }
+    for file_info in index.node_files(rel_dir, node):
+        file_info['type'] = 'file'
+        yield '1' + file_info['name'], file_info
+
+
+def sorted_level(index, rel_dir, node):
+    """(keys, entries) of one level in cursor order, built once per node and index generation."""
+    cache_key = (index.root, rel_dir)
+    with _levels_lock:
+        cached = _levels.get(cache_key)
+        if cached is not None and cached[0] is node and cached[1] == index.generation:
+            _levels.move_to_end(cache_key)
+            return cached[2], cached[3]
+    pairs = sorted(tree_entries(index, rel_dir, node), key=lambda pair: pair[0])
+    keys = [key for key, _ in pairs]
+    entries = [entry for _, entry in pairs]
+    with _levels_lock:
+        _levels[cache_key] = (node, index.generation, keys, entries)
+        _levels.move_to_end(cache_key)
+        while len(_levels) > TREE_LEVEL_CACHE_ENTRIES:
+            _levels.popitem(last=False)
+    return keys, entries
+
+
+@directory_tree_bp.route('/api/tree', methods=['POST'])
+def get_tree_level():
+    """List one directory level of the selected directory, paginated by cursor."""
+    try:
+        data = request.get_json()
+        directory = data.get('directory', '')
+        if not directory or not os.path.isdir(directory):
+            return jsonify({'error': 'Directory does not exist'}), 400
+
+        # path is relative to directory; '' is the root
+        rel_dir = os.path.normpath(data.get('path', '').replace('/', os.sep)) if data.get('path') else ''
+        if rel_dir == '.':
+            rel_dir = ''
+        if os.path.isabs(rel_dir) or rel_dir == '..' or rel_dir.startswith('..' + os.sep):
+            return jsonify({'error': 'Unauthorized path'}), 403
+
+        cursor = data.get('cursor') or ''
+        limit = max(1, min(int(data.get('limit', DEFAULT_TREE_PAGE_SIZE)), MAX_TREE_PAGE_SIZE))
+
+        index = get_directory_index(directory)
+        try:
+            node = index.list_level(rel_dir, get_exclusion_matcher())
+        except FileNotFoundError:
+            return jsonify({'error': 'Folder does not exist or is excluded'}), 404
+        except PermissionError:
+            return jsonify({'error': 'Permission denied'}), 403
+
+        keys, entries = sorted_level(index, rel_dir, node)
+        start = bisect.bisect_right(keys, cursor)
+        end = start + limit
+        next_cursor = keys[end - 1] if end < len(keys) else None
+        entries = entries[start:end]
+        return jsonify({
+            'path': rel_dir,
+            'entries': entries,
+            'next_cursor': next_cursor,
+            'total': len(node['dirs']) + len(node['files'])
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
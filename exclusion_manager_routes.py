@@ -7,7 +7,7 @@ EXCLUSION_FILE = os.path.join(os.path.dirname(__file__), 'file_exclude_patterns.
 
 def load_exclusions():
     if not os.path.exists(EXCLUSION_FILE):
-        return {'exclude_dirs': [], 'exclude_files': [], 'exclude_patterns': []}
+        return {'exclude_dirs': [], 'exclude_files': [], 'exclude_patterns': [], 'ignore_files': []}
     with open(EXCLUSION_FILE, 'r', encoding='utf-8') as f:
         return json.load(f)
 
@@ -25,7 +25,7 @@ def set_exclusions():
     if not isinstance(data, dict):
         return jsonify({'error': 'Invalid data'}), 400
     # Ensure all keys exist and are lists
-    for k in ['exclude_dirs', 'exclude_files', 'exclude_patterns']:
+    for k in ['exclude_dirs', 'exclude_files', 'exclude_patterns', 'ignore_files']:
         if k not in data or not isinstance(data[k], list):
             data[k] = []
     save_exclusions(data)
@@ -0,0 +1,79 @@
+import os
+import re
+import json
+import fnmatch
+import threading
+from exclusion_manager_routes import EXCLUSION_FILE, load_exclusions
+from ignore_rules import IgnoreRules
+
+_WILDCARD_CHARS = set('*?[')
+
+
+class ExclusionMatcher:
+    """file_exclude_patterns.json compiled into set lookups plus one regex.
+
+    Literal names and `*.ext` style globs are answered with set lookups, so
+    their cost does not grow with the number of patterns; only the remaining
+    globs go through a single combined regex.
+    """
+
+    def __init__(self, patterns):
+        self.fingerprint = json.dumps(patterns, sort_keys=True)
+        self.exclude_dirs = set(d for d in patterns.get('exclude_dirs', []) if d)
+        self.exclude_files = set(patterns.get('exclude_files', []))
+        # .gitignore-style files read in every directory as the walk descends
+        self.ignore_files = [name for name in patterns.get('ignore_files', []) if name]
+        self.root_rules = IgnoreRules()
+        self.literal_patterns = set()
+        self.suffix_patterns = set()
+        regex_patterns = []
+        for pat in patterns.get('exclude_patterns', []):
+            # fnmatch compares case-normalised names, e.g. case-insensitively on Windows
+            pat = os.path.normcase(pat)
+            if not _WILDCARD_CHARS.intersection(pat):
+                self.literal_patterns.add(pat)
+            elif pat.startswith('*.') and not _WILDCARD_CHARS.intersection(pat[1:]):
+                self.suffix_patterns.add(pat[1:])
+            else:
+                regex_patterns.append(fnmatch.translate(pat))
+        self.pattern_regex = re.compile('|'.join(regex_patterns)) if regex_patterns else None
+
+    def matches_pattern(self, name):
+        name = os.path.normcase(name)
+        if name in self.literal_patterns:
+            return True
+        if self.suffix_patterns:
+            dot = name.find('.')
+            while dot != -1:
+                if name[dot:] in self.suffix_patterns:
+                    return True
+                dot = name.find('.', dot + 1)
+        return self.pattern_regex is not None and self.pattern_regex.match(name) is not None
+
+    def excludes_file(self, name):
+        return name in self.exclude_files or self.matches_pattern(name)
+
+    def excludes_dir(self, name):
+        # Parent directories were already checked on the way down, so only the
+        # entry's own name needs testing against the directory list
+        return name in self.exclude_dirs or self.excludes_file(name)
+
+
+_matcher = None
+_matcher_key = None
+_matcher_lock = threading.Lock()
+
+
+def get_exclusion_matcher():
+    """Return the compiled matcher, recompiling only when the patterns file changes."""
+    global _matcher, _matcher_key
+    try:
+        st = os.stat(EXCLUSION_FILE)
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    with _matcher_lock:
+        if _matcher is None or key != _matcher_key:
+            _matcher = ExclusionMatcher(load_exclusions())
+            _matcher_key = key
+        return _matcher
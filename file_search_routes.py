@@ -0,0 +1,67 @@
+from flask import Blueprint, jsonify, request
+import os
+from directory_index import get_directory_index
+from exclusion_matcher import get_exclusion_matcher
+from path_search import get_path_search_index, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from content_index import get_content_index, DEFAULT_CONTENT_SEARCH_LIMIT, MAX_CONTENT_SEARCH_LIMIT
+
+file_search_bp = Blueprint('file_search_bp', __name__)
+
+# Longer queries are cut down; a path rarely needs more to be told apart
+MAX_QUERY_LENGTH = 64
+MAX_CONTENT_QUERY_LENGTH = 256
+
+
+@file_search_bp.route('/api/search-files', methods=['POST'])
+def search_files():
+    """Fuzzy-match a query against the relative paths of the selected directory."""
+    try:
+        data = request.get_json()
+        directory = data.get('directory', '')
+        if not directory or not os.path.isdir(directory):
+            return jsonify({'error': 'Directory does not exist'}), 400
+
+        query = (data.get('query') or '')[:MAX_QUERY_LENGTH]
+        limit = max(1, min(int(data.get('limit', DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT))
+
+        index = get_directory_index(directory)
+        if not index.loaded:
+            index.refresh(get_exclusion_matcher())
+        matches = get_path_search_index(index).search(query, limit)
+        return jsonify({
+            'query': query,
+            'generation': index.generation,
+            'matches': [dict(file_info, score=score) for score, file_info in matches]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@file_search_bp.route('/api/search-content', methods=['POST'])
+def search_content():
+    """Find text files of the selected directory by the words they contain."""
+    try:
+        data = request.get_json()
+        directory = data.get('directory', '')
+        if not directory or not os.path.isdir(directory):
+            return jsonify({'error': 'Directory does not exist'}), 400
+
+        query = (data.get('query') or '')[:MAX_CONTENT_QUERY_LENGTH]
+        limit = max(1, min(int(data.get('limit', DEFAULT_CONTENT_SEARCH_LIMIT)), MAX_CONTENT_SEARCH_LIMIT))
+
+        index = get_directory_index(directory)
+        if not index.loaded:
+            index.refresh(get_exclusion_matcher())
+        content_index = get_content_index(directory)
+        reindexed = content_index.refresh(index)
+        matches, candidates = content_index.search(query, limit)
+        return jsonify({
+            'query': query,
+            'generation': index.generation,
+            'indexed_files': len(content_index.files),
+            'reindexed': reindexed,
+            'candidates': candidates,
+            'matches': matches
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
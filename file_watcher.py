@@ -0,0 +1,278 @@
+import os
+import zlib
+import queue
+import threading
+from directory_index import get_directory_index
+from exclusion_matcher import get_exclusion_matcher
+from content_cache import content_cache
+from content_index import get_content_index
+from import_graph import get_import_graph
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# How often the polling backend re-stats the tree when watchdog is not installed
+POLL_INTERVAL_SECONDS = 2.0
+# Polling stats the files of directories whose listing changed every pass; in-place edits
+# elsewhere (which leave directory mtimes alone) are caught by a sweep spread over this many passes
+POLL_SWEEP_PASSES = 15
+# Events arriving within this window are applied as one batch
+DEBOUNCE_SECONDS = 0.2
+# Events buffered per subscriber before the slowest client starts losing them
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def diff_nodes(root, rel_dir, old, new):
+    """File dicts added and changed, and relative paths removed, between two versions of a node."""
+    abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+    old_files = {name: (size, binary) for name, size, binary in (old or {}).get('files', [])}
+    new_files = {name: (size, binary) for name, size, binary in (new or {}).get('files', [])}
+    added = []
+    changed = []
+    for name, (size, binary) in new_files.items():
+        if name not in old_files or old_files[name] != (size, binary):
+            (changed if name in old_files else added).append({
+                'name': name,
+                'path': os.path.join(abs_dir, name),
+                'relative_path': os.path.join(rel_dir, name) if rel_dir else name,
+                'size': size,
+                'binary': binary
+            })
+    removed = [os.path.join(rel_dir, name) if rel_dir else name
+               for name in old_files if name not in new_files]
+    return added, changed, removed
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        self.watcher.notify(event.src_path, event.is_directory)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.watcher.notify(dest_path, event.is_directory)
+
+
+class DirectoryWatcher:
+    """Keeps the directory index, content cache and content index of one root current.
+
+    Uses watchdog (inotify, FSEvents, ...) when it is installed and otherwise
+    polls. Each applied batch of changes is published to every subscriber as
+    a dict with the new generation and the added, modified and removed files.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.index = get_directory_index(root)
+        self.backend = 'watchdog' if Observer is not None else 'polling'
+        self._subscribers = []
+        self._pending = set()
+        self._modified = set()
+        self._wakeup = threading.Event()
+        self._stop = None
+        self._thread = None
+        self._observer = None
+        # Polling backend: (mtime_ns, size) of each indexed file when last stat'ed
+        self._stats = None
+        self._poll_pass = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if self._thread is None:
+                self._start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            if not self._subscribers and self._thread is not None:
+                self._shutdown()
+
+    def _start(self):
+        # A fresh event per run, so a thread from an earlier run that is still finishing stays stopped
+        self._stop = threading.Event()
+        if not self.index.loaded:
+            self.index.refresh(get_exclusion_matcher())
+        for derived in (get_content_index(self.root, create=False), get_import_graph(self.root, create=False)):
+            if derived is not None:
+                derived.watched = True
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.root, recursive=True)
+            self._observer.start()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def _shutdown(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        self._thread = None
+        self._stats = None
+        for derived in (get_content_index(self.root, create=False), get_import_graph(self.root, create=False)):
+            if derived is not None:
+                derived.watched = False
+        for subscriber in self._subscribers:
+            subscriber.put(None)
+
+    def notify(self, abs_path, is_directory):
+        """Record a changed path reported by the watchdog backend."""
+        rel_path = os.path.relpath(abs_path, self.root)
+        if rel_path == '.' or rel_path.startswith('..'):
+            return
+        rel_dir = os.path.dirname(rel_path)
+        # Events inside excluded folders are dropped here, as those folders are never indexed
+        if rel_dir not in (self.index.nodes or {}):
+            return
+        with self._lock:
+            self._pending.add(rel_dir)
+            if is_directory:
+                self._pending.add(rel_path)
+            else:
+                self._modified.add(rel_path)
+        self._wakeup.set()
+
+    def _run(self, stop):
+        while not stop.is_set():
+            if Observer is not None:
+                self._wakeup.wait()
+                if stop.wait(DEBOUNCE_SECONDS):
+                    return
+                self._wakeup.clear()
+            try:
+                event = self._poll() if Observer is None else self._apply_pending()
+            except Exception as e:
+                print(f"Error watching {self.root}: {e}")
+                event = None
+            if event is not None:
+                self._publish(event)
+            if Observer is None and stop.wait(POLL_INTERVAL_SECONDS):
+                return
+
+    def _apply_pending(self):
+        with self._lock:
+            rel_dirs, self._pending = self._pending, set()
+            modified, self._modified = self._modified, set()
+        old_nodes = self.index.nodes or {}
+        changes = self.index.update_directories(rel_dirs, get_exclusion_matcher())
+        if changes is None:
+            changes = self._changed_nodes(old_nodes)
+        return self._collect(changes, modified)
+
+    def _poll(self):
+        """One polling pass: the index refresh compares directory mtimes, then files are stat'ed
+        only in directories that changed plus this pass's share of the sweep."""
+        old_nodes = self.index.nodes or {}
+        matcher = get_exclusion_matcher()
+        self.index.refresh(matcher)
+        changes = self._changed_nodes(old_nodes)
+        nodes = self.index.nodes or {}
+        if self._stats is None:
+            # First pass: a baseline for every file, so later edits anywhere can be told apart
+            self._stats = {}
+            check_dirs = nodes
+        else:
+            self._poll_pass += 1
+            sweep = self._poll_pass % POLL_SWEEP_PASSES
+            check_dirs = {rel_dir for rel_dir, _, new in changes if new is not None}
+            check_dirs.update(rel_dir for rel_dir in nodes if zlib.crc32(rel_dir.encode()) % POLL_SWEEP_PASSES == sweep)
+        for rel_dir, old, new in changes:
+            # Forget files that left the listing
+            kept = set(name for name, _, _ in new['files']) if new is not None else set()
+            for name, _, _ in (old or {}).get('files', []):
+                if name not in kept:
+                    self._stats.pop(os.path.join(rel_dir, name) if rel_dir else name, None)
+        modified = set()
+        for rel_dir in check_dirs:
+            node = nodes.get(rel_dir)
+            for file_info in (self.index.node_files(rel_dir, node) if node else ()):
+                try:
+                    st = os.stat(file_info['path'])
+                except OSError:
+                    continue
+                rel_path = file_info['relative_path']
+                previous = self._stats.get(rel_path)
+                self._stats[rel_path] = (st.st_mtime_ns, st.st_size)
+                if previous is not None and previous != self._stats[rel_path]:
+                    modified.add(rel_path)
+        if modified:
+            # Rewriting a file leaves its directory's mtime alone, so the refresh kept the old
+            # node (size, binary flag); rescan the directories holding edited files
+            self.index.update_directories({os.path.dirname(rel_path) for rel_path in modified}, matcher)
+            changes = self._changed_nodes(old_nodes)
+        return self._collect(changes, modified)
+
+    def _changed_nodes(self, old_nodes):
+        new_nodes = self.index.nodes or {}
+        # Unchanged directories keep the very same node object across a refresh
+        return [(rel_dir, old_nodes.get(rel_dir), new_nodes.get(rel_dir))
+                for rel_dir in set(old_nodes) | set(new_nodes)
+                if old_nodes.get(rel_dir) is not new_nodes.get(rel_dir)]
+
+    def _collect(self, changes, modified):
+        """Update the caches for one batch and build its event, or None if nothing changed."""
+        added = []
+        changed = {}
+        removed = []
+        for rel_dir, old, new in changes:
+            node_added, node_changed, node_removed = diff_nodes(self.root, rel_dir, old, new)
+            added.extend(node_added)
+            changed.update((f['relative_path'], f) for f in node_changed)
+            removed.extend(node_removed)
+        # Edits in place keep the size (and the folder's listing) unchanged; report them too
+        nodes = self.index.nodes or {}
+        added_paths = set(f['relative_path'] for f in added)
+        for rel_path in modified:
+            if rel_path in changed or rel_path in added_paths:
+                continue
+            rel_dir, name = os.path.split(rel_path)
+            node = nodes.get(rel_dir)
+            for file_info in (self.index.node_files(rel_dir, node) if node else ()):
+                if file_info['name'] == name:
+                    changed[rel_path] = file_info
+                    break
+        if not (added or changed or removed):
+            return None
+        for rel_path in list(changed) + removed:
+            content_cache.invalidate(os.path.join(self.root, rel_path))
+        for derived in (get_content_index(self.root, create=False), get_import_graph(self.root, create=False)):
+            if derived is not None:
+                derived.update_files(added + list(changed.values()), removed, self.index.generation)
+        return {
+            'generation': self.index.generation,
+            'added': added,
+            'modified': list(changed.values()),
+            'removed': [os.path.join(self.root, rel_path) for rel_path in removed]
+        }
+
+    def _publish(self, event):
+        with self._lock:
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    pass
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(root):
+    with _watchers_lock:
+        watcher = _watchers.get(root)
+        if watcher is None:
+            watcher = _watchers[root] = DirectoryWatcher(root)
+        return watcher
@@ -0,0 +1,109 @@
+import re
+from functools import lru_cache
+
+
+def _translate_segment(segment):
+    """Translate one path segment of a gitignore glob into a regex fragment."""
+    i = 0
+    n = len(segment)
+    out = []
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '\\' and i < n:
+            out.append(re.escape(segment[i]))
+            i += 1
+        elif c == '[':
+            j = i
+            if j < n and segment[j] in '!^':
+                j += 1
+            if j < n and segment[j] == ']':
+                j += 1
+            while j < n and segment[j] != ']':
+                j += 1
+            if j >= n:
+                out.append('\\[')
+            else:
+                body = segment[i:j].replace('\\', '\\\\')
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body + ']')
+                i = j + 1
+        else:
+            out.append(re.escape(c))
+    return ''.join(out)
+
+
+def translate_pattern(pattern, anchored):
+    """Translate a gitignore pattern into a regex matched against '/'-separated relative paths."""
+    segments = pattern.split('/')
+    parts = [] if anchored else ['(?:.*/)?']
+    last = len(segments) - 1
+    for idx, segment in enumerate(segments):
+        if segment == '**':
+            parts.append('.*' if idx == last else '(?:.*/)?')
+        else:
+            parts.append(_translate_segment(segment))
+            if idx != last:
+                parts.append('/')
+    return re.compile(''.join(parts) + '$')
+
+
+@lru_cache(maxsize=4096)
+def parse_ignore_lines(lines):
+    """Parse .gitignore lines into (regex, negated, dir_only) rules, in file order."""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('#'):
+            continue
+        # Trailing spaces are ignored unless escaped with a backslash
+        while line.endswith(' ') and not line.endswith('\\ '):
+            line = line[:-1]
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\!') or line.startswith('\\#'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern to the ignore file's directory
+        anchored = '/' in line
+        rules.append((translate_pattern(line.lstrip('/'), anchored), negated, dir_only))
+    return tuple(rules)
+
+
+class IgnoreRules:
+    """The gitignore rules in effect for one directory, inherited from its ancestors."""
+
+    def __init__(self, rules=()):
+        # Each rule is (base_dir, regex, negated, dir_only); base_dir is '/'-separated
+        self.rules = rules
+
+    def extend(self, base_dir, lines):
+        parsed = parse_ignore_lines(tuple(lines))
+        if not parsed:
+            return self
+        return IgnoreRules(self.rules + tuple((base_dir,) + rule for rule in parsed))
+
+    def is_ignored(self, rel_path, is_dir):
+        # Later rules (deeper files, later lines) take precedence, so scan backwards
+        for base_dir, regex, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if base_dir:
+                # A rule only covers paths below the directory of its ignore file
+                if not rel_path.startswith(base_dir + '/'):
+                    continue
+                path = rel_path[len(base_dir) + 1:]
+            else:
+                path = rel_path
+            if regex.match(path):
+                return not negated
+        return False
@@ -0,0 +1,345 @@
+import ast
+import os
+import re
+import time
+import bisect
+import posixpath
+import threading
+from collections import deque
+
+# Files larger than this (bundles, generated code) are left out of the graph
+MAX_GRAPH_FILE_BYTES = 1024 * 1024
+# A query re-stats the graph's files at most this often, unless the directory index changed
+IMPORT_GRAPH_RECHECK_SECONDS = 2.0
+MAX_EXPAND_DEPTH = 10
+
+PYTHON_EXTENSIONS = ('.py', '.pyi')
+SCRIPT_EXTENSIONS = ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx')
+# Tried in order when a JS/TS specifier leaves out the extension
+SCRIPT_RESOLVE_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs', '.json')
+
+# Candidate import statements; each is confirmed (and its names read) by ast.parse of just that statement
+_PY_IMPORT = re.compile(
+    r'^[ \t]*(from[ \t]+\.*[\w.]*[ \t]+import[ \t]*(?:\([^)]*\)|[^\n;#]*)|import[ \t]+[^\n;#(]*)', re.MULTILINE)
+# Comments and string literals; only triple-quoted strings can hold a line the import regex would match
+_PY_STRING_OR_COMMENT = re.compile(
+    r'#[^\n]*'
+    r'|"""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""'
+    r"|'''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''"
+    r'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    r"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'", re.DOTALL)
+_JS_IMPORT = re.compile(
+    r'''(?:\bimport\s*(?:[\w$*{}\s,]+?\s*from\s*)?|\bexport\s*[\w$*{}\s,]+?\s*from\s*'''
+    r'''|\brequire\s*\(\s*|\bimport\s*\(\s*)(['"])([^'"\n]+)\1''')
+
+
+def graph_kind(path):
+    if path.endswith(PYTHON_EXTENSIONS):
+        return 'python'
+    if path.endswith(SCRIPT_EXTENSIONS):
+        return 'script'
+    return None
+
+
+def _multiline_string_spans(text, limit):
+    """Sorted (start, end) offsets of the triple-quoted strings (docstrings and the like) that start before limit."""
+    if '"""' not in text and "'''" not in text:
+        return []
+    spans = []
+    for m in _PY_STRING_OR_COMMENT.finditer(text):
+        if m.start() > limit:
+            break
+        if len(m.group()) >= 6 and m.group().endswith(('"""', "'''")):
+            spans.append(m.span())
+    return spans
+
+
+def python_imports(text):
+    """(level, module, names) for each import statement; names is () for plain 'import module'.
+
+    Lines that only look like imports because they sit inside a docstring or
+    other triple-quoted string are skipped.
+    """
+    matches = list(_PY_IMPORT.finditer(text))
+    if not matches:
+        return []
+    # Strings are only lexed as far as the last candidate, usually just the module header
+    spans = _multiline_string_spans(text, matches[-1].start())
+    starts = [start for start, _ in spans]
+    specs = []
+    for match in matches:
+        i = bisect.bisect_right(starts, match.start()) - 1
+        if i >= 0 and match.start() < spans[i][1]:
+            continue
+        try:
+            tree = ast.parse(match.group(1).strip())
+        except SyntaxError:
+            continue
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                specs.extend((0, alias.name, ()) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                specs.append((node.level, node.module or '', tuple(alias.name for alias in node.names)))
+    return specs
+
+
+def script_imports(text):
+    """Relative specifiers of import/export-from/require/import() in JS or TS source.
+
+    Bare package names are skipped: they resolve into node_modules, outside the selected directory.
+    """
+    return [spec for _, spec in _JS_IMPORT.findall(text) if spec.startswith(('./', '../', '/')) or spec == '.']
+
+
+def python_module_names(rel_path, package_dirs):
+    """Dotted names a Python file can be imported as: from its source root, and from the root itself."""
+    stem = rel_path[:-len(os.path.splitext(rel_path)[1])]
+    parts = stem.split('/')
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    if not parts:
+        return []
+    # The source root is the first ancestor that is not itself a package
+    top = len(parts) - 1
+    while top > 0 and '/'.join(parts[:top]) in package_dirs:
+        top -= 1
+    names = ['.'.join(parts[top:])]
+    if top:
+        names.append('.'.join(parts))
+    return names
+
+
+class ImportGraph:
+    """Import edges between the Python and JS/TS files of one directory index.
+
+    Each file's import statements are remembered with the (mtime, size)
+    they were read at, so a refresh only re-parses files that changed.
+    Specifiers are resolved to files when a query first needs them, against
+    module and path tables rebuilt whenever the set of files changes.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.generation = None
+        self.checked_at = 0.0
+        # relative path -> (mtime_ns, size, import specs)
+        self.files = {}
+        # relative path -> file dict from the directory index
+        self.file_info = {}
+        # Set while a watcher keeps the graph current, which makes the periodic re-stat unnecessary
+        self.watched = False
+        self._modules = None
+        self._package_dirs = None
+        self._edges = {}
+        self._lock = threading.Lock()
+
+    def _read(self, file_info):
+        """(mtime_ns, size, specs) for a file, or None when it cannot be read."""
+        try:
+            with open(file_info['path'], 'rb') as f:
+                st = os.fstat(f.fileno())
+                if st.st_size > MAX_GRAPH_FILE_BYTES:
+                    return None
+                text = f.read().decode('utf-8', errors='ignore')
+        except OSError:
+            return None
+        rel_path = file_info['relative_path'].replace('\\', '/')
+        specs = python_imports(text) if graph_kind(rel_path) == 'python' else script_imports(text)
+        return st.st_mtime_ns, st.st_size, specs
+
+    def _invalidate(self, files_changed):
+        # Edges depend on which files exist; a content-only change just drops that file's edges
+        if files_changed:
+            self._modules = None
+            self._edges = {}
+
+    def refresh(self, directory_index, force=False):
+        """Bring the graph in line with directory_index; returns the number of files re-parsed."""
+        with self._lock:
+            if (not force and self.generation == directory_index.generation
+                    and (self.watched or time.monotonic() - self.checked_at < IMPORT_GRAPH_RECHECK_SECONDS)):
+                return 0
+            seen = set()
+            reparsed = 0
+            added_or_removed = False
+            for file_info in directory_index.iter_files():
+                rel_path = file_info['relative_path'].replace('\\', '/')
+                if file_info['binary'] or graph_kind(rel_path) is None:
+                    continue
+                seen.add(rel_path)
+                self.file_info[rel_path] = file_info
+                try:
+                    st = os.stat(file_info['path'])
+                except OSError:
+                    continue
+                entry = self.files.get(rel_path)
+                if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                    continue
+                added_or_removed = added_or_removed or entry is None
+                entry = self._read(file_info)
+                self._edges.pop(rel_path, None)
+                if entry is None:
+                    self.files.pop(rel_path, None)
+                    continue
+                self.files[rel_path] = entry
+                reparsed += 1
+            for rel_path in [p for p in self.file_info if p not in seen]:
+                self.file_info.pop(rel_path)
+                self.files.pop(rel_path, None)
+                added_or_removed = True
+            self._invalidate(added_or_removed)
+            self.generation = directory_index.generation
+            self.checked_at = time.monotonic()
+            return reparsed
+
+    def update_files(self, changed, removed, generation):
+        """Apply a watcher's report: re-parse the changed file dicts and drop the removed paths.
+
+        Does nothing until the first full refresh has built the graph.
+        """
+        with self._lock:
+            if self.generation is None:
+                return
+            added_or_removed = False
+            for rel_path in removed:
+                rel_path = rel_path.replace('\\', '/')
+                if self.file_info.pop(rel_path, None) is not None:
+                    self.files.pop(rel_path, None)
+                    added_or_removed = True
+            for file_info in changed:
+                rel_path = file_info['relative_path'].replace('\\', '/')
+                if file_info['binary'] or graph_kind(rel_path) is None:
+                    continue
+                added_or_removed = added_or_removed or rel_path not in self.file_info
+                self.file_info[rel_path] = file_info
+                self._edges.pop(rel_path, None)
+                entry = self._read(file_info)
+                if entry is None:
+                    self.files.pop(rel_path, None)
+                else:
+                    self.files[rel_path] = entry
+            self._invalidate(added_or_removed)
+            self.generation = generation
+
+    def _module_table(self):
+        if self._modules is None:
+            self._package_dirs = {posixpath.dirname(p) for p in self.file_info
+                                  if posixpath.basename(p) in ('__init__.py', '__init__.pyi')}
+            modules = {}
+            for rel_path in self.file_info:
+                if graph_kind(rel_path) == 'python':
+                    for name in python_module_names(rel_path, self._package_dirs):
+                        modules.setdefault(name, []).append(rel_path)
+            self._modules = modules
+        return self._modules
+
+    def _python_module(self, name, importer):
+        candidates = self._module_table().get(name)
+        if not candidates:
+            return None
+        # Several files can claim a name (tests/utils.py and src/utils.py); prefer the nearest
+        return max(candidates, key=lambda p: (len(posixpath.commonprefix([p, importer])), -len(p)))
+
+    def _python_path(self, base, dotted):
+        """File for a module given as a path under base (relative imports)."""
+        path = posixpath.join(base, *dotted.split('.')) if dotted else base
+        for candidate in (path + '.py', path + '.pyi', posixpath.join(path, '__init__.py')):
+            candidate = posixpath.normpath(candidate)
+            if candidate in self.file_info:
+                return candidate
+        return None
+
+    def _resolve_python(self, importer, level, module, names):
+        if level:
+            base = posixpath.dirname(importer)
+            parts = base.split('/') if base else []
+            if level - 1 > len(parts) or (level - 1 == len(parts) and '__init__.py' not in self.file_info):
+                # Climbs above the selected directory, or into it when it is not a package itself
+                return []
+            base = '/'.join(parts[:len(parts) - (level - 1)])
+            lookup = lambda dotted: self._python_path(base, dotted)
+        else:
+            lookup = lambda dotted: self._python_module(dotted, importer)
+        targets = []
+        for name in names:
+            # 'from package import module' imports the submodule when there is one
+            target = lookup(f'{module}.{name}' if module else name) if name != '*' else None
+            if target is not None:
+                targets.append(target)
+        if len(targets) < len(names) or not names:
+            parts = module.split('.') if module else []
+            # 'import a.b.c' falls back to the deepest package that exists
+            while True:
+                target = lookup('.'.join(parts))
+                if target is not None or not parts or level:
+                    break
+                parts.pop()
+            if target is not None:
+                targets.append(target)
+        return targets
+
+    def _resolve_script(self, importer, spec):
+        base = spec.lstrip('/') if spec.startswith('/') else posixpath.join(posixpath.dirname(importer), spec)
+        base = posixpath.normpath(base)
+        stem, ext = posixpath.splitext(base)
+        candidates = [base]
+        # TypeScript sources are imported by their compiled '.js' names
+        if ext in ('.js', '.jsx', '.mjs', '.cjs'):
+            candidates.extend(stem + e for e in SCRIPT_RESOLVE_EXTENSIONS)
+        candidates.extend(base + e for e in SCRIPT_RESOLVE_EXTENSIONS)
+        candidates.extend(posixpath.join(base, 'index' + e) for e in SCRIPT_RESOLVE_EXTENSIONS)
+        for candidate in candidates:
+            if candidate in self.file_info:
+                return candidate
+        return None
+
+    def imports(self, rel_path):
+        """Relative paths of the files rel_path imports, in the order first imported."""
+        edges = self._edges.get(rel_path)
+        if edges is not None:
+            return edges
+        entry = self.files.get(rel_path)
+        targets = []
+        if entry is not None:
+            if graph_kind(rel_path) == 'python':
+                for level, module, names in entry[2]:
+                    targets.extend(self._resolve_python(rel_path, level, module, names))
+            else:
+                targets.extend(filter(None, (self._resolve_script(rel_path, spec) for spec in entry[2])))
+        edges = self._edges[rel_path] = list(dict.fromkeys(t for t in targets if t != rel_path))
+        return edges
+
+    def expand(self, rel_paths, depth=1):
+        """Files reachable from rel_paths in at most depth import hops, nearest first.
+
+        Returns (file_dict, depth, imported_by) for every file not in
+        rel_paths itself; imported_by is the first file found importing it.
+        """
+        depth = max(0, min(int(depth), MAX_EXPAND_DEPTH))
+        with self._lock:
+            seen = set(rel_paths)
+            queue = deque((rel_path, 0) for rel_path in rel_paths if rel_path in self.file_info)
+            found = []
+            while queue:
+                rel_path, level = queue.popleft()
+                if level == depth:
+                    continue
+                for target in self.imports(rel_path):
+                    if target not in seen:
+                        seen.add(target)
+                        found.append((self.file_info[target], level + 1, rel_path))
+                        queue.append((target, level + 1))
+            return found
+
+
+_import_graphs = {}
+_import_graphs_lock = threading.Lock()
+
+
+def get_import_graph(root, create=True):
+    """The import graph for root; with create=False, None if no query has built one yet."""
+    with _import_graphs_lock:
+        graph = _import_graphs.get(root)
+        if graph is None and create:
+            graph = _import_graphs[root] = ImportGraph(root)
+        return graph
@@ -0,0 +1,49 @@
+from flask import Blueprint, jsonify, request
+import os
+from directory_index import get_directory_index
+from exclusion_matcher import get_exclusion_matcher
+from import_graph import get_import_graph
+
+import_graph_bp = Blueprint('import_graph_bp', __name__)
+
+
+@import_graph_bp.route('/api/import-graph/expand', methods=['POST'])
+def expand_imports():
+    """Files the selected ones import, directly or up to `depth` hops away, within the directory."""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        directory = data.get('directory', '')
+        if not directory or not os.path.isdir(directory):
+            return jsonify({'error': 'Directory does not exist'}), 400
+        try:
+            depth = int(data.get('depth', 1))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'depth must be an integer'}), 400
+        file_paths = data.get('file_paths', [])
+        if not isinstance(file_paths, list) or not all(isinstance(p, str) for p in file_paths):
+            return jsonify({'error': 'file_paths must be a list of paths'}), 400
+
+        index = get_directory_index(directory)
+        if not index.loaded:
+            index.refresh(get_exclusion_matcher())
+        graph = get_import_graph(directory)
+        reparsed = graph.refresh(index)
+
+        root = os.path.normpath(directory)
+        seeds = []
+        for file_path in file_paths:
+            rel_path = os.path.relpath(os.path.normpath(file_path), root)
+            if not rel_path.startswith('..'):
+                seeds.append(rel_path.replace('\\', '/'))
+        files = graph.expand(seeds, depth)
+        return jsonify({
+            'generation': index.generation,
+            'graph_files': len(graph.files),
+            'reparsed': reparsed,
+            'files': [dict(file_info, depth=level, imported_by=importer)
+                      for file_info, level, importer in files]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,92 @@
+import os
+import mmap
+from content_cache import decode_text
+
+# Files above this size are memory-mapped and served by window instead of read whole
+LARGE_FILE_THRESHOLD = 4 * 1024 * 1024
+# Hard cap on the bytes served from any single file
+MAX_FILE_BYTES = 16 * 1024 * 1024
+# Bytes decoded at a time when a window is streamed
+WINDOW_CHUNK_BYTES = 64 * 1024
+
+
+def truncation_marker(start, end, size):
+    return f"\n\n... [truncated: bytes {start}-{end} of {size} omitted] ...\n\n"
+
+
+def plan_window(size, offset=None, length=None, head=None, tail=None, max_bytes=MAX_FILE_BYTES):
+    """Work out the (start, end) byte ranges to serve, never more than max_bytes in total.
+
+    An explicit offset/length selects one range; head/tail select the start
+    and/or end of the file. With neither, the whole file is served when it
+    fits the cap, otherwise an even head/tail split of the cap.
+    """
+    if offset is not None or length is not None:
+        start = min(max(int(offset or 0), 0), size)
+        end = size if length is None else min(start + max(int(length), 0), size)
+        return [(start, min(end, start + max_bytes))]
+    if head is not None or tail is not None:
+        head = min(max(int(head or 0), 0), size, max_bytes)
+        tail = min(max(int(tail or 0), 0), size - head, max_bytes - head)
+    elif size <= max_bytes:
+        return [(0, size)]
+    else:
+        head = max_bytes // 2
+        tail = max_bytes - head
+    if head + tail >= size:
+        return [(0, size)]
+    ranges = []
+    if head:
+        ranges.append((0, head))
+    if tail:
+        ranges.append((size - tail, size))
+    return ranges
+
+
+def _char_start(mm, pos, size):
+    # Step back over UTF-8 continuation bytes so no character is split
+    steps = 0
+    while 0 < pos < size and steps < 3 and (mm[pos] & 0xC0) == 0x80:
+        pos -= 1
+        steps += 1
+    return pos
+
+
+def iter_window_chunks(file_path, errors='ignore', chunk_bytes=WINDOW_CHUNK_BYTES, **window):
+    """Yield decoded text for the planned window of a memory-mapped file, with truncation markers.
+
+    Chunks are decoded straight from the mapping, so only one chunk's worth of
+    text is materialised at a time regardless of the file's size.
+    """
+    size = os.path.getsize(file_path)
+    ranges = plan_window(size, **window)
+    if size == 0:
+        return
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            for start, end in ranges:
+                start = _char_start(mm, start, size)
+                end = _char_start(mm, end, size)
+                if start > pos:
+                    yield truncation_marker(pos, start, size)
+                while start < end:
+                    stop = _char_start(mm, min(start + chunk_bytes, end), size)
+                    # Keep \r\n pairs together so newline translation sees both halves
+                    if stop < end and stop - 1 > start and mm[stop - 1] == 0x0D:
+                        stop -= 1
+                    if stop <= start:
+                        stop = end
+                    with memoryview(mm)[start:stop] as part:
+                        yield decode_text(part, errors)
+                    start = stop
+                pos = end
+            if pos < size:
+                yield truncation_marker(pos, size, size)
+
+
+def read_window(file_path, errors='ignore', **window):
+    """Read the planned window of a file; returns (text, size, ranges)."""
+    size = os.path.getsize(file_path)
+    text = ''.join(iter_window_chunks(file_path, errors, **window))
+    return text, size, plan_window(size, **window)
@@ -0,0 +1,127 @@
+import re
+import heapq
+import threading
+
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+
+# Scans the bit string of a candidate mask for set bits
+_SET_BITS = re.compile('1')
+
+
+def subsequence_pattern(query):
+    """Regex matching a path that contains query's characters in order.
+
+    Each step is written as [^c]*(c), which takes the first occurrence of c
+    and can never backtrack, so a match stays linear in the path length.
+    """
+    parts = []
+    for ch in query:
+        not_ch = '\\' + ch if ch in '\\]^-' else ch
+        parts.append(f'[^{not_ch}]*({re.escape(ch)})')
+    return re.compile(''.join(parts))
+
+
+def name_score(query, basename):
+    """Score of a path whose file name contains query: exact names, then prefixes, then substrings."""
+    if basename == query:
+        return 1000
+    if basename.startswith(query):
+        return 800
+    return 600
+
+
+def subsequence_score(query, base_start, match):
+    """Score of a scattered match; compact matches inside the file name rank highest."""
+    span = match.end(len(query)) - match.start(1)
+    score = 200 - (span - len(query)) * 2
+    if match.start(1) >= base_start:
+        score += 100
+    return score
+
+
+class PathSearchIndex:
+    """Lower-cased relative paths of one directory index generation, searchable by fuzzy subsequence.
+
+    For every character the index keeps a bitmask of the paths containing it.
+    ANDing the masks of a query's characters narrows the candidates in a few
+    big-integer operations; only those are matched and scored in Python.
+    """
+
+    def __init__(self, files, generation):
+        self.generation = generation
+        self.files = []
+        self.paths = []
+        self.basenames = []
+        bits = {}
+        for file_info in files:
+            path = file_info['relative_path'].replace('\\', '/').lower()
+            i = len(self.paths)
+            self.files.append(file_info)
+            self.paths.append(path)
+            self.basenames.append(path[path.rfind('/') + 1:])
+            for ch in set(path):
+                bits.setdefault(ch, []).append(i)
+        self.char_masks = {ch: self._mask(ids) for ch, ids in bits.items()}
+
+    def _mask(self, ids):
+        mask = bytearray((len(self.paths) + 7) // 8)
+        for i in ids:
+            mask[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(mask, 'little')
+
+    def candidates(self, query):
+        """Indexes of the paths containing every character of query, in path order."""
+        mask = -1
+        for ch in set(query):
+            mask &= self.char_masks.get(ch, 0)
+            if not mask:
+                return []
+        # bin() lists the highest bit first; reverse it so string offsets are path indexes
+        return [m.start() for m in _SET_BITS.finditer(bin(mask)[:1:-1])]
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """Top `limit` files for query, best first, as (score, file_info) pairs.
+
+        Matches fall into tiers: query inside the file name (600-1000), inside
+        the path (400), or scattered (below 300). A lower tier can never
+        outrank a higher one, so it is only scored when the tiers above hold
+        fewer than `limit` paths. Shorter paths win ties within a tier.
+        """
+        query = ''.join(query.replace('\\', '/').lower().split())
+        if not query:
+            return []
+        paths, basenames = self.paths, self.basenames
+        candidates = self.candidates(query)
+        in_path = [i for i in candidates if query in paths[i]]
+        in_name = [i for i in in_path if query in basenames[i]]
+        scored = [(name_score(query, basenames[i]) - len(paths[i]) * 0.01, -i) for i in in_name]
+        if len(in_name) < limit:
+            in_name = set(in_name)
+            scored.extend((400 - len(paths[i]) * 0.01, -i) for i in in_path if i not in in_name)
+        if len(in_path) < limit:
+            match = subsequence_pattern(query).match
+            in_path = set(in_path)
+            for i in candidates:
+                if i in in_path:
+                    continue
+                m = match(paths[i])
+                if m is not None:
+                    base_start = len(paths[i]) - len(basenames[i])
+                    scored.append((subsequence_score(query, base_start, m) - len(paths[i]) * 0.01, -i))
+        return [(round(score, 2), self.files[-neg_i]) for score, neg_i in heapq.nlargest(limit, scored)]
+
+
+_search_indexes = {}
+_search_indexes_lock = threading.Lock()
+
+
+def get_path_search_index(directory_index):
+    """Search index for the current generation of directory_index, rebuilt when it changes."""
+    with _search_indexes_lock:
+        search_index = _search_indexes.get(directory_index.root)
+        if search_index is None or search_index.generation != directory_index.generation:
+            search_index = PathSearchIndex(directory_index.iter_files(), directory_index.generation)
+            _search_indexes[directory_index.root] = search_index
+        return search_index
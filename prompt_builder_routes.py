@@ -1,12 +1,63 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, current_app
+from custom_instructions_routes import load_custom_instructions
+from context_files import ContextOptions, context_request_params, iter_context_files
+from token_counter import apply_token_budget
 
 prompt_builder_bp = Blueprint('prompt_builder_bp', __name__)
 
+INSTRUCTIONS_HEADER = "Custom Instructions for LLM"
+SECTION_SEPARATOR = "\n\n---\n\n"
+
+
+def format_file_section(file):
+    if 'duplicate_of' in file:
+        return f"File: {file['path']}\n(identical to {file['duplicate_of']})\n"
+    return f"File: {file['path']}\n```\n{file['content']}\n```\n"
+
+
+def assemble_prompt(instructions, files, user_request):
+    """Yield the prompt piece by piece: instructions, then each file, then the user's request."""
+    previous = None # Kind of the last section emitted
+    if instructions:
+        yield f"{INSTRUCTIONS_HEADER}\nUser Instructions: {instructions}"
+        previous = 'instructions'
+    for file in files:
+        if previous == 'instructions':
+            yield SECTION_SEPARATOR
+        elif previous == 'file':
+            yield "\n"
+        yield format_file_section(file)
+        previous = 'file'
+    if user_request:
+        if previous == 'instructions':
+            yield SECTION_SEPARATOR
+        elif previous == 'file':
+            # File sections already end with a newline
+            yield SECTION_SEPARATOR[1:]
+        yield f"User Request:\n{user_request}"
+
+
 @prompt_builder_bp.route('/api/prompt-builder/generate', methods=['POST'])
 def generate_prompt():
-    data = request.json
-    # Placeholder: Process data and build a prompt
-    # Example: context_files = data.get('context_files', [])
-    # Example: custom_instruction = data.get('custom_instruction', '')
-    print(f"Generating prompt with data: {data}")
-    return jsonify({"prompt": "This is a generated prompt based on your selections."})
+    data = request.json or {}
+    file_paths = data.get('file_paths', [])
+    selected_directory = data.get('selected_directory')
+    user_request = (data.get('user_request') or '').strip()
+    try:
+        concurrency, token_budget, budget_strategy = context_request_params(data)
+        options = ContextOptions.from_request(data)
+        instructions = load_custom_instructions().strip() if data.get('include_instructions', True) else ''
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error loading custom instructions for prompt: {e}")
+        return jsonify({"error": "Failed to load custom instructions"}), 500
+
+    files = iter_context_files(file_paths, selected_directory, options, concurrency)
+    if token_budget is not None:
+        # The budget needs every file's token count before anything can be emitted
+        files, _, _ = apply_token_budget(list(files), token_budget, budget_strategy, options.count_tokens)
+
+    return Response(assemble_prompt(instructions, files, user_request),
+                    mimetype='text/plain',
+                    headers={'X-Prompt-Instructions': '1' if instructions else '0'})
@@ -0,0 +1,137 @@
+import zlib
+from flask import request
+from conditional_requests import encoded_etag
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies smaller than this are sent as they are; compressing them saves less than it costs
+MIN_COMPRESS_BYTES = 1024
+# Streamed bodies are compressed and flushed in batches of about this many bytes. Each flush
+# ends a block, so flushing the small fragments a generator yields would forfeit most of the ratio
+STREAM_FLUSH_BYTES = 32 * 1024
+# Per-encoding levels; override with app.config['COMPRESSION_LEVELS']
+DEFAULT_COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/css',
+    'application/javascript', 'text/javascript'
+}
+
+
+def _gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    # A sync flush after every chunk lets the client decode it before the stream ends
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush)
+
+
+def _brotli_compressor(level):
+    compressor = brotli.Compressor(quality=level)
+    return (lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish)
+
+
+def _zstd_compressor(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush)
+
+
+# In order of preference when the client accepts several
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS['zstd'] = _zstd_compressor
+if brotli is not None:
+    ENCODERS['br'] = _brotli_compressor
+ENCODERS['gzip'] = _gzip_compressor
+
+
+def choose_encoding(accept_encoding):
+    """The preferred encoding both sides support, from an Accept-Encoding header, or None."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    for name in ENCODERS:
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+def compress_body(data, encoding, level):
+    compress, finish = ENCODERS[encoding](level)
+    return compress(data) + finish()
+
+
+def compress_stream(chunks, encoding, level, flush_bytes=STREAM_FLUSH_BYTES):
+    """Compress an iterable of str/bytes chunks incrementally, yielding output as it is produced.
+
+    Input is gathered until flush_bytes are pending, then compressed and
+    flushed as one block the client can decode straight away.
+    """
+    compress, finish = ENCODERS[encoding](level)
+    pending = []
+    pending_bytes = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if not chunk:
+            continue
+        pending.append(chunk)
+        pending_bytes += len(chunk)
+        if pending_bytes >= flush_bytes:
+            yield compress(b''.join(pending))
+            pending = []
+            pending_bytes = 0
+    yield (compress(b''.join(pending)) if pending else b'') + finish()
+
+
+def compress_response(response, accept_encoding, levels=None):
+    """Compress a Flask response in place for a client sending accept_encoding, when it qualifies."""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    level = (levels or DEFAULT_COMPRESSION_LEVELS)[encoding]
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_BYTES:
+            return response
+        response.set_data(compress_body(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(encoded_etag(etag, encoding))
+    return response
+
+
+def init_compression(app):
+    """Negotiate gzip (and brotli/zstd when installed) for every compressible response of app."""
+    app.config.setdefault('COMPRESSION_LEVELS', dict(DEFAULT_COMPRESSION_LEVELS))
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, request.headers.get('Accept-Encoding'),
+                                 app.config['COMPRESSION_LEVELS'])
@@ -1,30 +1,121 @@
 #!/usr/bin/env python3
 
+import argparse
 import subprocess
 import sys
 import os
 
+# Threads per process and, for gunicorn, worker processes in production mode
+DEFAULT_THREADS = 8
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
 def install_requirements():
     print("Installing requirements...")
     subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the LLM Context Generator.")
+    parser.add_argument('--mode', choices=['dev', 'production'], default='dev',
+                        help="'dev' runs the Flask debug server with the reloader; "
+                             "'production' runs a WSGI server with debug off")
+    parser.add_argument('--server', choices=['waitress', 'gunicorn', 'uvicorn'], default='waitress',
+                        help="server for production mode: waitress or gunicorn (WSGI, gunicorn is POSIX only), "
+                             "or uvicorn (ASGI, serves the context endpoints async from asgi.py)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="worker processes (gunicorn and uvicorn; waitress serves from one process)")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help="request threads per process (WSGI servers); every open tab holds one "
+                             "for its live-update stream, capped at half the threads")
+    return parser.parse_args(argv)
+
+def run_dev(args):
+    from app import app
+    app.run(debug=True, host=args.host, port=args.port)
+
+def run_waitress(args):
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress is not installed. Install the requirements with: pip install -r requirements.txt")
+        sys.exit(1)
+    if args.workers > 1:
+        print("Note: waitress serves from a single process; --workers is ignored, use --threads.")
+    from app import app
+    app.config['MAX_EVENT_STREAMS'] = max(1, args.threads // 2)
+    # Streamed responses (NDJSON listings, Server-Sent Events) need every chunk sent as soon as it is written
+    serve(app, host=args.host, port=args.port, threads=args.threads, send_bytes=1)
+
+def run_gunicorn(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        if sys.platform == 'win32':
+            print("gunicorn does not run on Windows; use --server waitress or --server uvicorn.")
+        else:
+            print("gunicorn is not installed. Install the requirements with: pip install -r requirements.txt")
+        sys.exit(1)
+
+    workers = max(1, args.workers)
+
+    def post_worker_init(worker):
+        # Each worker holds its own content cache; split the memory budget between them
+        from content_cache import content_cache, CONTENT_CACHE_MAX_BYTES
+        content_cache.max_bytes = CONTENT_CACHE_MAX_BYTES // workers
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{args.host}:{args.port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', max(1, args.threads))
+            # Threaded workers keep long-lived streams (SSE, large contexts) from blocking a whole process
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', 120)
+            self.cfg.set('post_worker_init', post_worker_init)
+
+        def load(self):
+            from app import app
+            app.config['MAX_EVENT_STREAMS'] = max(1, args.threads // 2)
+            return app
+
+    StandaloneApplication().run()
+
+def run_uvicorn(args):
+    try:
+        import uvicorn
+        import asgiref
+    except ImportError:
+        print("uvicorn and asgiref are not installed. Install the requirements with: pip install -r requirements.txt")
+        sys.exit(1)
+    # File reads run on the bounded executor in async_io.py, so no request threads are configured here
+    uvicorn.run('asgi:application', host=args.host, port=args.port, workers=max(1, args.workers),
+                log_level='warning')
+
 def main():
+    args = parse_args()
     if not os.path.exists("requirements.txt"):
         print("Error: requirements.txt not found. Please run setup.py first.")
         sys.exit(1)
-    
+
     try:
         import flask
     except ImportError:
         print("Flask not found. Installing requirements...")
         install_requirements()
-    
-    print("Starting Flask application...")
-    print("Open your browser and go to: http://localhost:5000")
+
+    print(f"Starting Flask application ({args.mode} mode)...")
+    print(f"Open your browser and go to: http://localhost:{args.port}")
     print("Press Ctrl+C to stop the server")
-    
-    from app import app
-    app.run(debug=True, host='0.0.0.0', port=5000)
+
+    if args.mode == 'dev':
+        run_dev(args)
+    elif args.server == 'gunicorn':
+        run_gunicorn(args)
+    elif args.server == 'uvicorn':
+        run_uvicorn(args)
+    else:
+        run_waitress(args)
 
 if __name__ == "__main__":
     main()
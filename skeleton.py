@@ -0,0 +1,247 @@
+import ast
+import os
+import re
+import threading
+from collections import OrderedDict
+from content_cache import content_cache, decode_text
+from large_files import LARGE_FILE_THRESHOLD, MAX_FILE_BYTES
+from compaction import compaction_kind, c_lexer_spans
+
+# Outlines kept in memory, each validated by the file's (mtime, size)
+OUTLINE_CACHE_ENTRIES = 4096
+
+# Declarations found in JS/TS source once strings, comments and regexes are blanked out
+_JS_DECLARATION = re.compile(
+    r'^[ \t]*(?:export[ \t]+(?:default[ \t]+)?)?(?:declare[ \t]+)?(?:'
+    r'(?P<class>(?:abstract[ \t]+)?(?:class|interface)\b)'
+    r'|(?P<function>(?:async[ \t]+)?function\b)'
+    r'|(?P<arrow>(?:(?:const|let|var)[ \t]+)?[\w$.]+[ \t]*(?::[^=\n]+)?=[ \t]*(?:async[ \t]*)?'
+    r'(?:function\b|\([^()]*\)[^=;\n{]*=>|[\w$]+[ \t]*=>)))',
+    re.MULTILINE)
+_JS_MEMBER = re.compile(
+    r'^[ \t]*(?:(?:public|private|protected|static|readonly|abstract|override|async|get|set)[ \t]+)*'
+    r'\*?[ \t]*(?P<name>#?[\w$]+|\[[^\]\n]*\])[ \t]*\??[ \t]*(?:<[^>\n]*>)?[ \t]*\(',
+    re.MULTILINE)
+_JS_CONTROL_WORDS = {'if', 'for', 'while', 'switch', 'catch', 'return', 'function', 'with', 'else', 'do'}
+
+_cache = OrderedDict() # path -> ((mtime, size), outline or None)
+_cache_lock = threading.Lock()
+
+
+def skeleton_kind(path):
+    kind = compaction_kind(path)
+    return kind if kind in ('python', 'script') else None
+
+
+# --- Python -------------------------------------------------------------------
+
+def _docstring_lines(node, indent):
+    doc = ast.get_docstring(node)
+    if doc is None:
+        return []
+    if '"""' in doc or '\\' in doc:
+        return [indent + repr(doc)]
+    lines = doc.split('\n')
+    if len(lines) == 1:
+        return [f'{indent}"""{doc}"""']
+    return [f'{indent}"""{lines[0]}'] + [indent + line if line else '' for line in lines[1:]] + [indent + '"""']
+
+
+def _python_header(node):
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+        return f"class {node.name}({', '.join(bases)}):" if bases else f'class {node.name}:'
+    prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+    returns = f' -> {ast.unparse(node.returns)}' if node.returns is not None else ''
+    return f'{prefix} {node.name}({ast.unparse(node.args)}){returns}:'
+
+
+def _outline_python_body(body, indent, out):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if not indent and out:
+                out.append('')
+            out.extend(f'{indent}@{ast.unparse(decorator)}' for decorator in node.decorator_list)
+            out.append(indent + _python_header(node))
+            inner = indent + '    '
+            out.extend(_docstring_lines(node, inner))
+            emitted = len(out)
+            if isinstance(node, ast.ClassDef):
+                _outline_python_body(node.body, inner, out)
+            if len(out) == emitted:
+                out.append(inner + '...')
+        elif isinstance(node, ast.AnnAssign) and indent:
+            # Annotated class attributes (dataclass fields and the like) are part of the interface
+            out.append(indent + ast.unparse(node))
+
+
+def outline_python(text):
+    """Module docstring, then class and function signatures with their docstrings.
+
+    None if the source is unparsable or defines no class or function, since
+    an outline of a constants module or script would leave out all of it.
+    """
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    if not any(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) for node in tree.body):
+        return None
+    out = _docstring_lines(tree, '')
+    _outline_python_body(tree.body, '', out)
+    return '\n'.join(out) + '\n'
+
+
+# --- JavaScript / TypeScript ----------------------------------------------------
+
+def _blank(segment):
+    return re.sub(r'[^\n]', ' ', segment)
+
+
+def outline_script(text):
+    """Top-level functions, classes and their methods, with preceding JSDoc, bodies elided.
+
+    A line-oriented scan over the source with strings, comments and regex
+    literals blanked out, so braces inside them cannot confuse the nesting.
+    None when the source declares none of them (plain scripts, config and
+    re-export files), so those are sent whole.
+    """
+    parts = []
+    doc_comments = {} # end offset -> start offset of /** */ comments
+    pos = 0
+    for start, end, kind in c_lexer_spans(text):
+        parts.append(text[pos:start])
+        parts.append(_blank(text[start:end]))
+        if kind == 'comment' and text.startswith('/**', start):
+            doc_comments[end] = start
+        pos = end
+    parts.append(text[pos:])
+    masked = ''.join(parts)
+
+    closing = {}
+    stack = []
+    for brace in re.finditer(r'[{}]', masked):
+        if brace.group() == '{':
+            stack.append(brace.start())
+        elif stack:
+            closing[stack.pop()] = brace.start()
+
+    out = []
+
+    def doc_comment(line_start):
+        j = line_start
+        while j > 0 and text[j - 1].isspace():
+            j -= 1
+        start = doc_comments.get(j)
+        if start is None:
+            return None
+        # Keep the comment's own indentation by starting at its line
+        return text[text.rfind('\n', 0, start) + 1:j]
+
+    def body_brace(pos, end):
+        """Offset of the '{' opening the body that follows a signature, or None."""
+        depth = 0
+        for i in range(pos, end):
+            ch = masked[i]
+            if ch in '([<':
+                depth += 1
+            elif ch in ')]>':
+                depth = max(depth - 1, 0)
+            elif depth == 0 and ch == '{':
+                return i
+            elif depth == 0 and ch == ';':
+                return None
+        return None
+
+    def walk(start, end, in_class):
+        pattern = _JS_MEMBER if in_class else _JS_DECLARATION
+        pos = start
+        depth = 0
+        counted = start
+        while True:
+            match = pattern.search(masked, pos, end)
+            if match is None:
+                return
+            depth += masked.count('{', counted, match.start()) - masked.count('}', counted, match.start())
+            counted = match.start()
+            if depth != 0 or (in_class and match.group('name') in _JS_CONTROL_WORDS):
+                pos = match.end()
+                continue
+            line_start = match.start()
+            if (match.groupdict().get('arrow') and match.group().endswith('=>')
+                    and not masked[match.end():end].lstrip().startswith('{')):
+                # Expression-bodied arrow function: the signature is all there is to keep
+                brace = None
+                header = text[line_start:match.end()].rstrip()
+            else:
+                brace = body_brace(match.end(), end)
+                line_end = masked.find('\n', match.end(), end)
+                header = text[line_start:brace if brace is not None else line_end if line_end != -1 else end].rstrip()
+            doc = doc_comment(line_start)
+            if doc:
+                out.append(doc)
+            if brace is None or brace not in closing:
+                out.append(header + (' ...' if match.groupdict().get('arrow') else ''))
+                pos = match.end()
+                continue
+            indent = header[:len(header) - len(header.lstrip())]
+            if (match.groupdict().get('class') or '').endswith('interface'):
+                # An interface is all signature; keep it whole
+                out.append(text[line_start:closing[brace] + 1])
+            elif match.groupdict().get('class'):
+                out.append(header + ' {')
+                walk(brace + 1, closing[brace], True)
+                out.append(indent + '}')
+            else:
+                out.append(header + ' { ... }')
+            pos = closing[brace] + 1
+            depth += masked.count('{', counted, pos) - masked.count('}', counted, pos)
+            counted = pos
+
+    walk(0, len(masked), False)
+    return '\n'.join(out) + '\n' if out else None
+
+
+# --- Files ----------------------------------------------------------------------
+
+def outline_text(text, kind):
+    if kind == 'python':
+        return outline_python(text)
+    if kind == 'script':
+        return outline_script(text)
+    return None
+
+
+def outline_file(path):
+    """Skeleton of a Python or JS/TS file, cached by (mtime, size); None when it has no outline.
+
+    Files past the large-file threshold are read whole for this (up to
+    MAX_FILE_BYTES), since the outline is what keeps them small.
+    """
+    kind = skeleton_kind(path)
+    if kind is None:
+        return None
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            _cache.move_to_end(path)
+            return cached[1]
+    if st.st_size > MAX_FILE_BYTES:
+        # Cached as well, so an oversized file is turned down by the lookup above next time
+        outline = None
+    else:
+        if st.st_size > LARGE_FILE_THRESHOLD:
+            with open(path, 'rb') as f:
+                text = decode_text(f.read(), errors='ignore')
+        else:
+            text = content_cache.read_text(path, errors='ignore')
+        outline = outline_text(text, kind)
+    with _cache_lock:
+        _cache[path] = (key, outline)
+        _cache.move_to_end(path)
+        while len(_cache) > OUTLINE_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return outline
@@ -5,6 +5,13 @@ class ContextGenerator {
         this.selectedDirectory = '';
         this.fileLineCounts = {}; // Cache: filePath -> line count
         this.totalLinesOfCode = 0;
+        this.indexGeneration = null; // Generation of the server-side directory index last loaded
+        this.fileSearchRequest = 0; // Sequence number of the latest path search, to drop stale replies
+        this.directoryEvents = null; // EventSource pushing listing changes for the selected directory
+        this.fileListDirectory = null; // Directory whose full listing fills the per-row selectors
+        this.listingCache = null; // Last full listing with its ETag, reused when the server answers 304
+        this.contextCache = null; // Last preview context request, body and ETag
+        this.folderBrowser = null; // Lazy /api/tree dropdown, created on the first directory pick
         this.init();
     }
 
@@ -21,13 +28,39 @@ class ContextGenerator {
             }
         });
     
+        document.addEventListener('focusin', (e) => {
+            if (e.target.matches('.file-select')) {
+                this.loadFileList();
+            }
+        });
         document.getElementById('pickDirectoryBtn').addEventListener('click', () => this.promptForDirectory());
         document.getElementById('addFileBtn').addEventListener('click', () => this.addFileRow());
+        document.getElementById('addImportsBtn').addEventListener('click', () => this.addImportedFiles());
         document.getElementById('clearAllBtn').addEventListener('click', () => this.clearAllFiles());
         document.getElementById('copyContextBtn').addEventListener('click', () => this.copyContext());
         document.getElementById('previewContextBtn').addEventListener('click', () => this.previewContext());
         document.querySelector('.toast-close').addEventListener('click', () => this.hideToast());
         document.getElementById('clearPreviewBtn').addEventListener('click', () => this.clearPreview());
+
+        const searchInput = document.getElementById('fileSearchInput');
+        let searchTimer = null;
+        searchInput.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => this.searchFiles(searchInput.value), 80);
+        });
+        document.getElementById('fileSearchMode').addEventListener('change', (e) => {
+            searchInput.placeholder = e.target.value === 'contents' ? 'Search files by content...' : 'Search files by path...';
+            this.searchFiles(searchInput.value);
+        });
+        searchInput.addEventListener('keydown', (e) => {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                const first = document.querySelector('#fileSearchResults .file-search-result');
+                if (first) first.click();
+            } else if (e.key === 'Escape') {
+                this.clearFileSearch();
+            }
+        });
     }
 
     promptForDirectory() {
@@ -62,23 +95,22 @@ class ContextGenerator {
         this.updateLinesOfCodeDisplay();
 
         try {
-            const response = await fetch('/api/browse-directory', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ directory })
-            });
-            const data = await response.json();
-            if (!response.ok) {
-                throw new Error(data.error || 'Failed to browse directory');
-            }
-            this.availableFiles = data.files;
+            // One readdir of the root validates the directory; the full recursive listing
+            // is only walked once a file selector is opened (see loadFileList)
+            await HierarchicalDropdown.treeLoader(directory, 1)('', null);
+            this.fileListDirectory = null;
+            this.availableFiles = [];
+            this.updateFileSelectors();
             const fullPath = this.selectedDirectory;
             // Replace backslashes with forward slashes for consistent splitting, then split by forward slash
             const parts = fullPath.replace(/\\/g, '/').split('/');
             // Get the last part, or a default if the path is somehow empty or malformed
             const folderName = parts.pop() || parts.pop() || 'Project'; // Handles trailing slash and gets last element
             document.getElementById('currentProjectNameDisplay').textContent = folderName || 'No Project Selected'; // Ensure a fallback
-            this.updateFileSelectors(); // Update all selectors with new files
+            this.setupFolderBrowser(directory);
+            document.getElementById('fileSearch').style.display = 'block';
+            this.clearFileSearch();
+            this.watchDirectory(directory);
             this.showToast('Directory loaded successfully!');
         } catch (error) {
             this.showError(error.message);
@@ -89,6 +121,253 @@ class ContextGenerator {
         }
     }
 
+    async loadFileList(force = false) {
+        // Full recursive listing for the per-row selectors, fetched the first time one is opened
+        const directory = this.selectedDirectory;
+        if (!directory || (!force && this.fileListDirectory === directory)) return;
+        this.fileListDirectory = directory;
+        try {
+            const cached = this.listingCache && this.listingCache.directory === directory ? this.listingCache : null;
+            const headers = { 'Content-Type': 'application/json' };
+            if (cached) {
+                headers['If-None-Match'] = cached.etag;
+            }
+            const response = await fetch('/api/browse-directory', {
+                method: 'POST',
+                headers,
+                body: JSON.stringify({ directory, stream: true, scanner: 'parallel' })
+            });
+            if (!response.ok && response.status !== 304) {
+                const data = await response.json();
+                throw new Error(data.error || 'Failed to browse directory');
+            }
+            const previousSelections = new Map();
+            document.querySelectorAll('.file-select').forEach(select => previousSelections.set(select.id, select.value));
+            this.availableFiles = [];
+            this.updateFileSelectors();
+            let summary = null;
+            if (response.status === 304) {
+                // Listing unchanged since the last load: reuse it, nothing was transferred
+                this.appendFilesToSelectors(cached.files);
+                summary = cached.summary;
+            } else {
+                // Records arrive as newline-delimited JSON; render each chunk as soon as it is parsed
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                const received = [];
+                let pending = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    pending += decoder.decode(value, { stream: true });
+                    const lines = pending.split('\n');
+                    pending = lines.pop();
+                    const newFiles = [];
+                    for (const line of lines) {
+                        if (!line) continue;
+                        const record = JSON.parse(line);
+                        if (record.error) {
+                            throw new Error(record.error);
+                        } else if (record.end) {
+                            summary = record;
+                        } else {
+                            newFiles.push(record);
+                        }
+                    }
+                    received.push(...newFiles);
+                    this.appendFilesToSelectors(newFiles);
+                }
+                if (!summary) {
+                    throw new Error('Directory listing ended unexpectedly');
+                }
+                const etag = response.headers.get('ETag');
+                this.listingCache = etag ? { directory, etag, files: received, summary } : null;
+            }
+            this.indexGeneration = summary.generation;
+            if (summary.refreshing) {
+                this.pollIndexRefresh(directory);
+            }
+            this.restoreSelections(previousSelections);
+        } catch (error) {
+            this.fileListDirectory = null;
+            this.showError(error.message);
+        }
+    }
+
+    setupFolderBrowser(directory) {
+        // Folder-by-folder picker backed by /api/tree; each expand fetches one directory level
+        const container = document.getElementById('folderBrowser');
+        container.style.display = 'block';
+        if (this.folderBrowser) {
+            // One dropdown for the page; picking another directory only swaps its loader
+            this.folderBrowser.setLoader(HierarchicalDropdown.treeLoader(directory));
+            return;
+        }
+        this.folderBrowser = new HierarchicalDropdown(container, {
+            placeholder: 'Browse folders to add a file...',
+            loadChildren: HierarchicalDropdown.treeLoader(directory),
+            onSelect: (path, text, file) => {
+                this.addSelectedFile(path, file);
+                this.folderBrowser.clear();
+            }
+        });
+    }
+
+    watchDirectory(directory) {
+        // The server watches the directory while this stream is open and pushes each batch of changes
+        if (this.directoryEvents) {
+            this.directoryEvents.close();
+        }
+        if (!window.EventSource) return;
+        this.directoryEvents = new EventSource(`/api/browse-directory/events?directory=${encodeURIComponent(directory)}`);
+        this.directoryEvents.addEventListener('change', (e) => {
+            if (directory === this.selectedDirectory) {
+                this.applyDirectoryChanges(JSON.parse(e.data));
+            }
+        });
+    }
+
+    applyDirectoryChanges(changes) {
+        const removed = new Set(changes.removed);
+        if (removed.size) {
+            this.availableFiles = this.availableFiles.filter(f => !removed.has(f.path));
+            document.querySelectorAll('.file-select option').forEach(option => {
+                if (removed.has(option.value)) {
+                    const select = option.parentElement;
+                    option.remove();
+                    if (!select.value) select.classList.remove('file-select-bold');
+                }
+            });
+        }
+        this.appendFilesToSelectors(changes.added);
+        changes.modified.forEach(file => {
+            delete this.fileLineCounts[file.path];
+            const index = this.availableFiles.findIndex(f => f.path === file.path);
+            if (index !== -1) this.availableFiles[index] = file;
+            document.querySelectorAll(`.file-select option[value="${CSS.escape(file.path)}"]`).forEach(option => {
+                option.textContent = this.createFileOption(file).textContent;
+            });
+        });
+        this.indexGeneration = changes.generation;
+        if (removed.size || changes.modified.length) {
+            this.recalculateTotalLines();
+        }
+    }
+
+    async searchFiles(query) {
+        // Ranked on the server so the browser never filters the full file list per keystroke
+        const requestId = ++this.fileSearchRequest;
+        if (!query.trim() || !this.selectedDirectory) {
+            this.renderFileSearchResults([]);
+            return;
+        }
+        const byContent = document.getElementById('fileSearchMode').value === 'contents';
+        try {
+            const response = await fetch(byContent ? '/api/search-content' : '/api/search-files', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ directory: this.selectedDirectory, query, limit: 20 })
+            });
+            const data = await response.json();
+            if (requestId !== this.fileSearchRequest) return;
+            if (!response.ok) throw new Error(data.error || 'Search failed');
+            this.renderFileSearchResults(data.matches);
+        } catch (error) {
+            if (requestId === this.fileSearchRequest) {
+                this.showError(error.message);
+            }
+        }
+    }
+
+    renderFileSearchResults(matches) {
+        const results = document.getElementById('fileSearchResults');
+        results.innerHTML = '';
+        matches.forEach(file => {
+            const item = document.createElement('div');
+            item.className = 'file-search-result';
+            item.textContent = `${file.relative_path} (${this.formatFileSize(file.size)})${file.binary ? ' [binary]' : ''}`;
+            if (file.lines && file.lines.length) {
+                const snippet = document.createElement('div');
+                snippet.className = 'file-search-snippet';
+                snippet.textContent = `${file.lines[0].line}: ${file.lines[0].text.trim()}`;
+                item.appendChild(snippet);
+            }
+            item.addEventListener('click', () => {
+                this.addSelectedFile(file.path, file);
+                this.clearFileSearch();
+            });
+            results.appendChild(item);
+        });
+        results.style.display = matches.length ? 'block' : 'none';
+    }
+
+    clearFileSearch() {
+        this.fileSearchRequest++;
+        document.getElementById('fileSearchInput').value = '';
+        this.renderFileSearchResults([]);
+    }
+
+    addSelectedFile(path, file = null) {
+        let select = Array.from(document.querySelectorAll('.file-select')).find(s => !s.value);
+        if (!select) {
+            this.addFileRow();
+            select = Array.from(document.querySelectorAll('.file-select')).pop();
+        }
+        if (!Array.from(select.options).some(o => o.value === path)) {
+            file = file || this.availableFiles.find(f => f.path === path);
+            if (!file) return;
+            select.appendChild(this.createFileOption(file));
+        }
+        select.value = path;
+        select.classList.add('file-select-bold');
+        select.closest('.file-row').querySelector('input[type="checkbox"]').checked = true;
+        this.updateActionButtons();
+    }
+
+    async addImportedFiles(depth = 1) {
+        const selectedFiles = this.getSelectedFiles();
+        if (!this.selectedDirectory || selectedFiles.length === 0) {
+            this.showError('Select files first to add what they import.');
+            return;
+        }
+        try {
+            const response = await fetch('/api/import-graph/expand', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ directory: this.selectedDirectory, file_paths: selectedFiles, depth })
+            });
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.error || 'Failed to expand imports');
+            data.files.forEach(file => this.addSelectedFile(file.path, file));
+            this.recalculateTotalLines();
+            this.showToast(data.files.length
+                ? `Added ${data.files.length} imported file(s)`
+                : 'The selected files import nothing else in this directory');
+        } catch (error) {
+            this.showError(`Failed to add imports: ${error.message}`);
+        }
+    }
+
+    async pollIndexRefresh(directory) {
+        // The listing was served from the server-side index while it refreshes; reload once it settles
+        while (directory === this.selectedDirectory) {
+            await new Promise(resolve => setTimeout(resolve, 1500));
+            try {
+                const response = await fetch(`/api/browse-directory/status?directory=${encodeURIComponent(directory)}`);
+                const data = await response.json();
+                if (!response.ok) return;
+                if (!data.refreshing) {
+                    if (data.generation !== this.indexGeneration && directory === this.selectedDirectory) {
+                        this.loadFileList(true);
+                    }
+                    return;
+                }
+            } catch (e) {
+                return;
+            }
+        }
+    }
+
     addFileRow() {
         // After adding a row, update LOC display
         setTimeout(() => this.recalculateTotalLines(), 0);
@@ -150,15 +429,40 @@ class ContextGenerator {
         selects.forEach(select => this.updateFileSelectorsForRow(select));
     }
 
+    appendFilesToSelectors(newFiles) {
+        if (newFiles.length === 0) return;
+        this.availableFiles.push(...newFiles);
+        document.querySelectorAll('.file-select').forEach(select => {
+            const fragment = document.createDocumentFragment();
+            newFiles.forEach(file => fragment.appendChild(this.createFileOption(file)));
+            select.appendChild(fragment);
+        });
+    }
+
+    restoreSelections(previousSelections) {
+        const availablePaths = new Set(this.availableFiles.map(f => f.path));
+        document.querySelectorAll('.file-select').forEach(select => {
+            const previousValue = previousSelections.get(select.id);
+            if (previousValue && availablePaths.has(previousValue)) {
+                select.value = previousValue;
+                select.classList.add('file-select-bold');
+            } else {
+                select.classList.remove('file-select-bold');
+            }
+        });
+    }
+
+    createFileOption(file) {
+        const option = document.createElement('option');
+        option.value = file.path; // Full path for backend
+        option.textContent = `${file.relative_path} (${this.formatFileSize(file.size)})${file.binary ? ' [binary]' : ''}`;
+        return option;
+    }
+
     updateFileSelectorsForRow(selectElement) {
         const currentValue = selectElement.value;
         selectElement.innerHTML = '<option value="">Select a file...</option>'; // Clear existing options
-        this.availableFiles.forEach(file => {
-            const option = document.createElement('option');
-            option.value = file.path; // Full path for backend
-            option.textContent = `${file.relative_path} (${this.formatFileSize(file.size)})`;
-            selectElement.appendChild(option);
-        });
+        this.availableFiles.forEach(file => selectElement.appendChild(this.createFileOption(file)));
         // Restore previous selection if still valid
         if (currentValue && this.availableFiles.some(f => f.path === currentValue)) {
             selectElement.value = currentValue;
@@ -211,62 +515,51 @@ class ContextGenerator {
         }
     }
 
-    async copyContext() {
+    async copyContext(userRequest = '') {
         try {
-            const customInstructionsData = await this.getFormattedCustomInstructions();
             const selectedFiles = this.getSelectedFiles();
-            let contextToCopy = '';
-            let messageParts = [];
-    
-            if (customInstructionsData.rawInstructions) {
-                if (selectedFiles.length === 0) {
-                    contextToCopy = `${customInstructionsData.header}\n${customInstructionsData.userInstructions}`;
-                } else {
-                    contextToCopy = customInstructionsData.fullText;
-                }
-                messageParts.push('custom instructions');
-            } else if (customInstructionsData.error && selectedFiles.length === 0) {
-                this.showError('Failed to load custom instructions. No files selected to copy.');
-                return;
-            }
-    
-    
-            if (selectedFiles.length > 0) {
-                const response = await fetch('/api/get-context', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ file_paths: selectedFiles, selected_directory: this.selectedDirectory })
-                });
+            // The server assembles instructions, files and request into one streamed prompt
+            const response = await fetch('/api/prompt-builder/generate', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    file_paths: selectedFiles,
+                    selected_directory: this.selectedDirectory,
+                    user_request: userRequest
+                })
+            });
+            if (!response.ok) {
                 const data = await response.json();
-                if (!response.ok) {
-                    throw new Error(data.error || 'Failed to generate context for copy');
-                }
-    
-                if (data.files && data.files.length > 0) {
-                    const filesContext = data.files.map(file =>
-                        `File: ${file.path}\n\`\`\`\n${file.content}\n\`\`\`\n`
-                    ).join('\n');
-                    contextToCopy += filesContext; 
-                    messageParts.push(`${selectedFiles.length} file(s)`);
-                } else if (data.error && !customInstructionsData.rawInstructions) { 
-                    throw new Error(data.error);
-                }
+                throw new Error(data.error || 'Failed to generate context for copy');
             }
+            const contextToCopy = await response.text();
     
             if (contextToCopy.trim() === '') {
                 this.showError('No content selected or available to copy.');
-                return;
+                return false;
             }
     
             await navigator.clipboard.writeText(contextToCopy.trim());
+            let messageParts = [];
+            if (response.headers.get('X-Prompt-Instructions') === '1') {
+                messageParts.push('custom instructions');
+            }
+            if (selectedFiles.length > 0) {
+                messageParts.push(`${selectedFiles.length} file(s)`);
+            }
+            if (userRequest) {
+                messageParts.push('your request');
+            }
             let toastMessage = 'Context copied to clipboard!';
             if (messageParts.length > 0) {
                 toastMessage = `Copied ${messageParts.join(' and ')} to clipboard!`;
             }
             this.showToast(toastMessage);
+            return true;
     
         } catch (error) {
             this.showError(`Failed to copy context: ${error.message}`);
+            return false;
         }
     }
     
@@ -307,15 +600,22 @@ class ContextGenerator {
     
     
             if (selectedFiles.length > 0) {
-                const response = await fetch('/api/get-context', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ file_paths: selectedFiles, selected_directory: this.selectedDirectory })
-                });
-                const data = await response.json();
-                if (!response.ok) {
+                const body = JSON.stringify({ file_paths: selectedFiles, selected_directory: this.selectedDirectory, stream: true });
+                const cached = this.contextCache && this.contextCache.body === body ? this.contextCache : null;
+                const headers = { 'Content-Type': 'application/json' };
+                if (cached) {
+                    headers['If-None-Match'] = cached.etag;
+                }
+                const response = await fetch('/api/get-context', { method: 'POST', headers, body });
+                // 304: none of the files changed since the last preview, reuse its bundle
+                const data = response.status === 304 ? cached.data : await response.json();
+                if (!response.ok && response.status !== 304) {
                     throw new Error(data.error || 'Failed to generate context for preview');
                 }
+                const etag = response.headers.get('ETag');
+                if (response.ok && etag) {
+                    this.contextCache = { body, etag, data };
+                }
     
                 if (data.files && data.files.length > 0) {
                     data.files.forEach((file, index) => {
@@ -388,35 +688,31 @@ class ContextGenerator {
         }
     }
     // --- LOC Feature Methods ---
-    async fetchLineCount(filePath) {
-        if (this.fileLineCounts[filePath] !== undefined) {
-            return this.fileLineCounts[filePath];
-        }
+    async fetchLineCounts(filePaths) {
+        // One batch request for every selected file whose count is not cached yet
+        const uncached = [...new Set(filePaths.filter(f => this.fileLineCounts[f] === undefined))];
+        if (uncached.length === 0) return;
         try {
-            const response = await fetch('/api/get-line-count', {
+            const response = await fetch('/api/get-line-counts', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ file_path: filePath, selected_directory: this.selectedDirectory })
+                body: JSON.stringify({ file_paths: uncached, selected_directory: this.selectedDirectory })
             });
             const data = await response.json();
-            if (response.ok && typeof data.line_count === 'number') {
-                this.fileLineCounts[filePath] = data.line_count;
-                return data.line_count;
-            } else {
-                this.fileLineCounts[filePath] = 0;
-                return 0;
-            }
+            const lineCounts = (response.ok && data.line_counts) || {};
+            uncached.forEach(f => {
+                this.fileLineCounts[f] = typeof lineCounts[f] === 'number' ? lineCounts[f] : 0;
+            });
         } catch (e) {
-            this.fileLineCounts[filePath] = 0;
-            return 0;
+            uncached.forEach(f => { this.fileLineCounts[f] = 0; });
         }
     }
 
     async recalculateTotalLines() {
         const selectedFiles = this.getSelectedFiles();
+        await this.fetchLineCounts(selectedFiles);
         let total = 0;
-        const counts = await Promise.all(selectedFiles.map(f => this.fetchLineCount(f)));
-        for (const count of counts) total += count;
+        for (const f of selectedFiles) total += this.fileLineCounts[f] || 0;
         this.totalLinesOfCode = total;
         this.updateLinesOfCodeDisplay();
     }
@@ -11,17 +11,21 @@ document.addEventListener('DOMContentLoaded', function() {
     const excludeDirsList = document.getElementById('excludeDirsList');
     const excludeFilesList = document.getElementById('excludeFilesList');
     const excludePatternsList = document.getElementById('excludePatternsList');
+    const ignoreFilesList = document.getElementById('ignoreFilesList');
     const newExcludeDir = document.getElementById('newExcludeDir');
     const newExcludeFile = document.getElementById('newExcludeFile');
     const newExcludePattern = document.getElementById('newExcludePattern');
+    const newIgnoreFile = document.getElementById('newIgnoreFile');
     const addExcludeDirBtn = document.getElementById('addExcludeDirBtn');
     const addExcludeFileBtn = document.getElementById('addExcludeFileBtn');
     const addExcludePatternBtn = document.getElementById('addExcludePatternBtn');
+    const addIgnoreFileBtn = document.getElementById('addIgnoreFileBtn');
 
     let exclusions = {
         exclude_dirs: [],
         exclude_files: [],
-        exclude_patterns: []
+        exclude_patterns: [],
+        ignore_files: []
     };
 
     function renderList(listElem, items, type) {
@@ -45,12 +49,14 @@ document.addEventListener('DOMContentLoaded', function() {
         renderList(excludeDirsList, exclusions.exclude_dirs, 'exclude_dirs');
         renderList(excludeFilesList, exclusions.exclude_files, 'exclude_files');
         renderList(excludePatternsList, exclusions.exclude_patterns, 'exclude_patterns');
+        renderList(ignoreFilesList, exclusions.ignore_files, 'ignore_files');
     }
     function fetchExclusions() {
         fetch('/api/exclusions')
             .then(res => res.json())
             .then(data => {
                 exclusions = data;
+                exclusions.ignore_files = exclusions.ignore_files || [];
                 renderAll();
             });
     }
@@ -88,6 +94,14 @@ document.addEventListener('DOMContentLoaded', function() {
             renderAll();
         }
     };
+    addIgnoreFileBtn.onclick = function() {
+        const val = newIgnoreFile.value.trim();
+        if (val && !exclusions.ignore_files.includes(val)) {
+            exclusions.ignore_files.push(val);
+            newIgnoreFile.value = '';
+            renderAll();
+        }
+    };
     saveBtn.onclick = function() {
         fetch('/api/exclusions', {
             method: 'POST',
@@ -5,7 +5,10 @@ class HierarchicalDropdown {
         this.selectedText = '';
         this.onSelect = options.onSelect || (() => {});
         this.placeholder = options.placeholder || 'Select a file...';
+        // Optional (path, cursor) => Promise<{entries, next_cursor}> for expanding folders on demand
+        this.loadChildren = options.loadChildren || null;
         this.data = [];
+        this.rootLoaded = false;
         this.isOpen = false;
         
         this.init();
@@ -13,7 +16,7 @@ class HierarchicalDropdown {
     
     init() {
         this.container.innerHTML = '';
-        this.container.className = 'hierarchical-dropdown-container';
+        this.container.classList.add('hierarchical-dropdown-container');
         
         // Create the main dropdown button
         this.button = document.createElement('button');
@@ -47,6 +50,70 @@ class HierarchicalDropdown {
         this.data = treeData;
         this.renderMenu();
     }
+
+    setLoader(loadChildren) {
+        // Point the dropdown at another tree; its root level is fetched the next time it opens
+        this.loadChildren = loadChildren;
+        this.data = [];
+        this.rootLoaded = false;
+        this.menu.innerHTML = '';
+        this.clear();
+        this.close();
+    }
+
+    static treeLoader(directory, limit = 200) {
+        // Loader for the paginated /api/tree endpoint, one folder level per call
+        return async (path, cursor) => {
+            const response = await fetch('/api/tree', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ directory, path, cursor, limit })
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || 'Failed to load folder');
+            }
+            return data;
+        };
+    }
+
+    async loadLevel(path, container, level, cursor = null) {
+        const loading = document.createElement('div');
+        loading.className = 'dropdown-item dropdown-loading';
+        loading.style.paddingLeft = `${level * 20 + 10}px`;
+        loading.textContent = 'Loading...';
+        container.appendChild(loading);
+        const loader = this.loadChildren;
+        try {
+            const page = await loader(path, cursor);
+            loading.remove();
+            if (loader !== this.loadChildren) {
+                // The dropdown moved to another tree while this page was loading
+                return [];
+            }
+            const items = page.entries.map(entry => entry.type === 'folder' ? { ...entry, children: null } : entry);
+            if (path === '') {
+                this.data.push(...items);
+            }
+            this.renderItems(items, container, level);
+            if (page.next_cursor) {
+                const more = document.createElement('div');
+                more.className = 'dropdown-item dropdown-load-more';
+                more.style.paddingLeft = `${level * 20 + 10}px`;
+                more.textContent = 'Load more...';
+                more.onclick = (e) => {
+                    e.stopPropagation();
+                    more.remove();
+                    this.loadLevel(path, container, level, page.next_cursor);
+                };
+                container.appendChild(more);
+            }
+            return items;
+        } catch (error) {
+            loading.textContent = error.message;
+            return [];
+        }
+    }
     
     renderMenu() {
         this.menu.innerHTML = '';
@@ -76,6 +143,12 @@ class HierarchicalDropdown {
                     e.stopPropagation();
                     isExpanded = !isExpanded;
                     submenu.style.display = isExpanded ? 'block' : 'none';
+                    if (isExpanded && item.children === null && this.loadChildren) {
+                        // Lazy folder: fetch its first page the first time it is opened
+                        item.children = [];
+                        this.loadLevel(item.relative_path, submenu, level + 1)
+                            .then(children => item.children.push(...children));
+                    }
                     itemElement.querySelector('.submenu-arrow').className = 
                         isExpanded ? 'fas fa-chevron-down submenu-arrow' : 'fas fa-chevron-right submenu-arrow';
                     itemElement.querySelector('.folder-icon').className = 
@@ -113,7 +186,7 @@ class HierarchicalDropdown {
         this.button.querySelector('.dropdown-text').textContent = this.selectedText;
         this.button.classList.add('has-selection');
         this.close();
-        this.onSelect(this.selectedValue, this.selectedText);
+        this.onSelect(this.selectedValue, this.selectedText, item);
     }
     
     toggle() {
@@ -121,6 +194,12 @@ class HierarchicalDropdown {
     }
     
     open() {
+        if (this.loadChildren && !this.rootLoaded) {
+            this.rootLoaded = true;
+            this.data = [];
+            this.menu.innerHTML = '';
+            this.loadLevel('', this.menu, 0);
+        }
         this.menu.style.display = 'block';
         this.isOpen = true;
         this.button.querySelector('.dropdown-arrow').className = 'fas fa-chevron-up dropdown-arrow';
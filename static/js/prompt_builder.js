@@ -23,6 +23,16 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    // Add specific logic for prompt builder here
+    const generatePromptBtn = document.getElementById('generatePromptBtn');
+    const promptRequestTextarea = document.getElementById('promptRequestTextarea');
+
+    if (generatePromptBtn) {
+        generatePromptBtn.addEventListener('click', async () => {
+            // Assembled server-side and copied to the clipboard by the context generator
+            const copied = await contextGenerator.copyContext(promptRequestTextarea.value.trim());
+            if (copied && promptBuilderModal) promptBuilderModal.style.display = 'none';
+        });
+    }
+
     console.log('Prompt Builder JS loaded');
 });
@@ -0,0 +1,120 @@
+import ast
+import pytest
+from compaction import (c_lexer_spans, compact_text, compaction_kind, strip_boilerplate_header,
+                        strip_c_comments, strip_python_comments)
+
+
+@pytest.mark.parametrize('path, kind', [
+    ('a.py', 'python'),
+    ('a.TSX', 'script'),
+    ('a.scss', 'style'),
+    ('a.html', 'markup'),
+    ('a.yml', 'hash'),
+    ('README', None),
+])
+def test_compaction_kind(path, kind):
+    assert compaction_kind(path) == kind
+
+
+def test_blank_runs_and_trailing_spaces():
+    text = 'a = 1   \n\n\n\nb = 2\t\n'
+    assert compact_text(text, 'python') == 'a = 1\n\nb = 2\n'
+
+
+def test_keeps_a_missing_final_newline():
+    assert compact_text('a = 1\n\n\n\nb = 2', 'python') == 'a = 1\n\nb = 2'
+
+
+def test_text_that_would_not_shrink_is_returned_as_is():
+    for text in ('', 'x', 'x\n', 'a = 1\nb = 2\n'):
+        assert compact_text(text, 'python') == text
+
+
+def test_blank_text_compacts_to_nothing():
+    assert compact_text('\n \n\n', 'python') == ''
+
+
+def test_python_licence_header_after_a_shebang():
+    text = '#!/usr/bin/env python\n# Copyright 2020 Someone\n# Licensed under MIT\nimport os\n'
+    assert strip_boilerplate_header(text, 'python') == '#!/usr/bin/env python\nimport os\n'
+
+
+def test_ordinary_leading_comments_are_kept():
+    text = '# Helpers for the parser\nimport os\n'
+    assert strip_boilerplate_header(text, 'python') == text
+
+
+def test_script_block_licence_header():
+    text = '/*\n * SPDX-License-Identifier: MIT\n */\nexport const x = 1;\n'
+    assert strip_boilerplate_header(text, 'script') == '\nexport const x = 1;\n'
+
+
+def test_python_comments_and_docstrings():
+    text = ('"""Module docstring."""\n'
+            'import os  # trailing comment\n'
+            '\n'
+            'def f():\n'
+            '    """Only statement."""\n'
+            '\n'
+            'def g():\n'
+            '    """Docstring."""\n'
+            '    # comment line\n'
+            '    return "# not a comment"\n')
+    result = compact_text(text, 'python', strip_comments_too=True)
+    assert result == ('import os\n'
+                      '\n'
+                      'def f():\n'
+                      '    pass\n'
+                      '\n'
+                      'def g():\n'
+                      '    return "# not a comment"\n')
+    ast.parse(result)
+
+
+def test_python_source_that_does_not_tokenize_is_unchanged():
+    text = 'x = (1,\n'
+    assert strip_python_comments(text) == text
+
+
+def test_c_comments_skip_strings_and_regex_literals():
+    text = ('const url = "http://example.com"; // remote\n'
+            'const re = /\\/\\/ not a comment/g; /* block */\n'
+            'const half = a / b / c;\n')
+    result = compact_text(text, 'script', strip_comments_too=True)
+    assert result == ('const url = "http://example.com";\n'
+                      'const re = /\\/\\/ not a comment/g;\n'
+                      'const half = a / b / c;\n')
+
+
+def test_lexer_classifies_spans():
+    text = "x = 'a'; y = /re/; // c\nz = q / 2;"
+    kinds = [(text[start:end], kind) for start, end, kind in c_lexer_spans(text)]
+    assert kinds == [("'a'", 'string'), ('/re/', 'regex'), ('// c', 'comment')]
+
+
+def test_unterminated_string_stops_at_the_line_end():
+    text = 'const s = "open\nconst t = 1; // gone\n'
+    assert strip_c_comments(text) == 'const s = "open\nconst t = 1; \x00\n'
+
+
+def test_css_keeps_protocol_relative_urls():
+    text = 'a { background: url(//cdn.example.com/x.png); } /* note */\n'
+    assert compact_text(text, 'style', strip_comments_too=True) == \
+        'a { background: url(//cdn.example.com/x.png); }\n'
+
+
+def test_markup_comments_but_not_conditional_comments():
+    text = '<div>\n<!-- note -->\n<!--[if IE]><p>old</p><![endif]-->\n</div>\n'
+    assert compact_text(text, 'markup', strip_comments_too=True) == \
+        '<div>\n<!--[if IE]><p>old</p><![endif]-->\n</div>\n'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('class A:\n    """doc"""\n\n    "more"\n\ndef f(): ...', 'class A:\n    pass\n\ndef f(): ...'),
+    ('if a:\n    "s"\nelse:\n    "t"\n    "u"\n', 'if a:\n    pass\nelse:\n    pass\n'),
+    ('def f():\n    """d"""\n    def g():\n        "x"\n', 'def f():\n    def g():\n        pass\n'),
+])
+def test_blocks_left_empty_get_pass(text, expected):
+    result = compact_text(text, 'python', strip_comments_too=True)
+    assert result == expected
+    ast.parse(result)
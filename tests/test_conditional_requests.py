@@ -0,0 +1,173 @@
+import os
+import json
+import asyncio
+import pytest
+import directory_index
+from conditional_requests import encoded_etag, matching_etag
+
+
+@pytest.mark.parametrize('header, encoding, matched', [
+    (None, None, None),
+    ('"abc"', None, 'abc'),
+    ('"other", "abc"', None, 'abc'),
+    ('W/"abc"', None, None),
+    ('*', None, 'abc'),
+    ('"abc-gzip"', 'gzip', 'abc-gzip'),
+    ('"abc-gzip"', None, None),
+    ('"abc-gzip"', 'br', None),
+    ('"abc"', 'gzip', 'abc'),
+])
+def test_matching_etag(header, encoding, matched):
+    assert matching_etag('abc', header, encoding) == matched
+
+
+def test_no_match_without_a_validator():
+    assert matching_etag(None, '*') is None
+    assert matching_etag('', '"abc"') is None
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(directory_index, 'INDEX_DIR', str(tmp_path / 'index'))
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    (root / 'big.py').write_text('value = 1\n' * 300)
+    (root / 'small.txt').write_text('hello\n')
+    return root
+
+
+def context_payload(project):
+    return {'file_paths': [str(project / 'big.py'), str(project / 'small.txt')],
+            'selected_directory': str(project)}
+
+
+def test_get_context_revalidates_to_304(client, project):
+    payload = context_payload(project)
+    first = client.post('/api/get-context', json=payload)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    second = client.post('/api/get-context', json=payload, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert 'Accept-Encoding' in second.headers['Vary']
+    assert second.data == b''
+
+
+def test_get_context_etag_follows_files_and_options(client, project):
+    payload = context_payload(project)
+    etag = client.post('/api/get-context', json=payload).headers['ETag']
+
+    # concurrency does not change the body
+    same = client.post('/api/get-context', json=dict(payload, concurrency=1), headers={'If-None-Match': etag})
+    assert same.status_code == 304
+    changed_options = client.post('/api/get-context', json=dict(payload, compact=True),
+                                  headers={'If-None-Match': etag})
+    assert changed_options.status_code == 200
+
+    path = project / 'small.txt'
+    st = os.stat(path)
+    path.write_text('hellO\n')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    changed_file = client.post('/api/get-context', json=payload, headers={'If-None-Match': etag})
+    assert changed_file.status_code == 200
+    assert changed_file.headers['ETag'] != etag
+
+
+def test_compressed_responses_carry_their_own_tag(client, project):
+    payload = context_payload(project)
+    plain = client.post('/api/get-context', json=payload)
+    gzipped = client.post('/api/get-context', json=payload, headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    tag = plain.headers['ETag'].strip('"')
+    assert gzipped.headers['ETag'] == f'"{encoded_etag(tag, "gzip")}"'
+
+    revalidated = client.post('/api/get-context', json=payload,
+                              headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == gzipped.headers['ETag']
+    # The gzip copy's tag does not validate a request that would get the identity body
+    identity = client.post('/api/get-context', json=payload, headers={'If-None-Match': gzipped.headers['ETag']})
+    assert identity.status_code == 200
+
+
+@pytest.fixture
+def background_refresh(monkeypatch):
+    """Stand in for the background refresh so tests decide when it runs and finishes."""
+    started = []
+
+    def refresh_async(self, matcher, workers=1):
+        self.refreshing = True
+        started.append((self, matcher, workers))
+
+    def finish():
+        while started:
+            index, matcher, workers = started.pop()
+            index.refresh(matcher, workers)
+    monkeypatch.setattr(directory_index.DirectoryIndex, 'refresh_async', refresh_async)
+    return finish
+
+
+def test_browse_directory_revalidates_to_304(client, project, background_refresh):
+    payload = {'directory': str(project)}
+    cold = client.post('/api/browse-directory', json=payload)
+    assert cold.status_code == 200
+    assert cold.get_json()['refreshing'] is False
+    # Later requests are served from the index while it refreshes in the background,
+    # which the body reports, so they carry a different tag from the cold walk
+    warm = client.post('/api/browse-directory', json=payload, headers={'If-None-Match': cold.headers['ETag']})
+    assert warm.status_code == 200
+    assert warm.get_json()['refreshing'] is True
+    etag = warm.headers['ETag']
+    background_refresh()
+    unchanged = client.post('/api/browse-directory', json=payload, headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers['ETag'] == etag
+    background_refresh()
+
+    (project / 'new.txt').write_text('new\n')
+    os.utime(project, ns=(0, os.stat(project).st_mtime_ns + 1_000_000_000))
+    # The request that notices the change still serves the listing its tag names
+    stale = client.post('/api/browse-directory', json=payload, headers={'If-None-Match': etag})
+    assert stale.status_code == 304
+    background_refresh()
+    changed = client.post('/api/browse-directory', json=payload, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert 'new.txt' in {os.path.basename(f['path']) for f in changed.get_json()['files']}
+
+
+def asgi_post(path, payload, headers=()):
+    import asgi
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'',
+             'headers': [(b'content-type', b'application/json')] + list(headers)}
+    messages = [{'type': 'http.request', 'body': json.dumps(payload).encode(), 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    start = sent[0]
+    return start['status'], dict(start['headers'])
+
+
+def test_asgi_get_context_revalidates_to_304(client, project):
+    payload = context_payload(project)
+    status, headers = asgi_post('/api/get-context', payload, [(b'accept-encoding', b'gzip')])
+    assert status == 200
+    assert headers[b'content-encoding'] == b'gzip'
+    status, headers = asgi_post('/api/get-context', payload,
+                                [(b'accept-encoding', b'gzip'), (b'if-none-match', headers[b'etag'])])
+    assert status == 304
+    assert headers[b'vary'] == b'Accept-Encoding'
+    assert headers[b'etag'].decode().strip('"').endswith('-gzip')
@@ -0,0 +1,140 @@
+import os
+import pytest
+import context_files
+from content_cache import ContentCache
+from context_files import ContextOptions, read_context_file
+from token_counter import TOKENIZERS, register_tokenizer
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_reads_are_cached_until_the_file_changes(tmp_path):
+    cache = ContentCache()
+    path = write(tmp_path / 'a.txt', b'one\r\ntwo\n')
+    assert cache.read_text(path) == 'one\ntwo\n'
+    assert cache.read_text(path) == 'one\ntwo\n'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_evicts_least_recently_used_body_first(tmp_path):
+    cache = ContentCache(max_bytes=25)
+    a = write(tmp_path / 'a', b'a' * 10)
+    b = write(tmp_path / 'b', b'b' * 10)
+    c = write(tmp_path / 'c', b'c' * 10)
+    cache.read_bytes(a)
+    cache.read_bytes(b)
+    # Touching a makes b the least recently used
+    cache.read_bytes(a)
+    cache.read_bytes(c)
+
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] == 20
+    hits = stats['hits']
+    cache.read_bytes(a)
+    cache.read_bytes(c)
+    assert cache.stats()['hits'] == hits + 2
+    cache.read_bytes(b)
+    assert cache.stats()['misses'] == stats['misses'] + 1
+
+
+def test_bodies_larger_than_the_cache_are_returned_but_not_kept(tmp_path):
+    cache = ContentCache(max_bytes=4)
+    path = write(tmp_path / 'big', b'0123456789')
+    assert cache.read_bytes(path) == b'0123456789'
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['bytes'] == 0
+
+
+def test_derived_values_count_towards_the_byte_limit(tmp_path):
+    cache = ContentCache(max_bytes=30)
+    a = write(tmp_path / 'a', b'a' * 10)
+    b = write(tmp_path / 'b', b'b' * 10)
+    cache.read_text(a)
+    assert cache.stats()['bytes'] == 20
+    cache.read_text(b)
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 20
+
+
+def test_same_size_rewrite_is_picked_up(tmp_path):
+    cache = ContentCache()
+    path = write(tmp_path / 'a.txt', b'first')
+    assert cache.read_text(path) == 'first'
+    st = os.stat(path)
+
+    write(path, b'other')
+    # Set a different mtime explicitly, coarse filesystem clocks can leave it unchanged
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert os.stat(path).st_size == st.st_size
+    assert cache.read_text(path) == 'other'
+    assert cache.digest(path) == ContentCache().digest(path)
+    # The old body had no other path pointing at it, so it is gone
+    assert cache.stats()['entries'] == 1
+
+
+def test_invalidate_forces_a_reread(tmp_path):
+    cache = ContentCache()
+    path = write(tmp_path / 'a.txt', b'first')
+    cache.read_text(path)
+    st = os.stat(path)
+
+    write(path, b'other')
+    # Same size and mtime: only an explicit invalidation can tell
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.read_text(path) == 'first'
+    cache.invalidate(path)
+    assert cache.read_text(path) == 'other'
+
+
+def test_identical_bodies_share_one_entry_and_its_derived_values(tmp_path):
+    cache = ContentCache()
+    a = write(tmp_path / 'a', b'same body')
+    b = write(tmp_path / 'b', b'same body')
+    calls = []
+    compute = lambda data: calls.append(data) or len(data)
+    assert cache.derive(a, 'length', compute) == 9
+    assert cache.derive(b, 'length', compute) == 9
+    assert len(calls) == 1
+    assert cache.stats()['shared'] == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_derive_memoises_per_name(tmp_path):
+    cache = ContentCache()
+    path = write(tmp_path / 'a', b'some text here')
+    calls = []
+    assert cache.derive(path, ('tokens', 'a'), lambda data: calls.append('a') or 1) == 1
+    assert cache.derive(path, ('tokens', 'b'), lambda data: calls.append('b') or 2) == 2
+    assert cache.derive(path, ('tokens', 'a'), lambda data: calls.append('a') or 3) == 1
+    assert calls == ['a', 'b']
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = ContentCache()
+    monkeypatch.setattr(context_files, 'content_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def words_tokenizer():
+    register_tokenizer('test-words', lambda text: len(text.split()))
+    yield 'test-words'
+    del TOKENIZERS['test-words']
+
+
+def test_context_token_counts_are_kept_per_tokenizer(tmp_path, fresh_cache, words_tokenizer):
+    path = write(tmp_path / 'a.txt', b'one two three four five six seven eight\n')
+    heuristic = read_context_file(path, str(tmp_path), ContextOptions())
+    words = read_context_file(path, str(tmp_path), ContextOptions(tokenizer=words_tokenizer))
+    assert heuristic['tokens'] == 10
+    assert words['tokens'] == 8
+    # Both counts stay memoised side by side
+    assert read_context_file(path, str(tmp_path), ContextOptions())['tokens'] == 10
+    assert read_context_file(path, str(tmp_path), ContextOptions(tokenizer=words_tokenizer))['tokens'] == 8
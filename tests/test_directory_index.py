@@ -0,0 +1,47 @@
+import os
+import pytest
+import directory_index
+from directory_index import DirectoryIndex
+from exclusion_matcher import ExclusionMatcher
+
+PATTERNS = {'exclude_dirs': [], 'exclude_files': [], 'exclude_patterns': [], 'ignore_files': []}
+
+needs_symlinks = pytest.mark.skipif(not hasattr(os, 'symlink') or os.name == 'nt',
+                                    reason='directory symlinks need privileges on Windows')
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(directory_index, 'INDEX_DIR', str(tmp_path / 'index'))
+
+
+def listed(root, workers=1):
+    index = DirectoryIndex(str(root))
+    index.refresh(ExclusionMatcher(PATTERNS), workers)
+    return index, sorted(f['relative_path'].replace('\\', '/') for f in index.iter_files())
+
+
+@needs_symlinks
+@pytest.mark.parametrize('workers', [1, 4])
+def test_symlink_loops_are_not_followed(tmp_path, workers):
+    root = tmp_path / 'loop'
+    (root / 'a').mkdir(parents=True)
+    (root / 'a' / 'f.txt').write_text('x\n')
+    os.symlink('..', root / 'a' / 'up')
+    index, files = listed(root, workers)
+    assert files == ['a/f.txt']
+    assert sorted(index.nodes) == ['', 'a']
+
+
+@needs_symlinks
+def test_linked_directories_are_listed_once(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'store' / 'pkg').mkdir(parents=True)
+    (root / 'store' / 'pkg' / 'index.js').write_text('x\n')
+    (root / 'node_modules').mkdir()
+    os.symlink(root / 'store' / 'pkg', root / 'node_modules' / 'pkg')
+    # Links to files are still listed, as os.walk did
+    os.symlink(root / 'store' / 'pkg' / 'index.js', root / 'main.js')
+    index, files = listed(root)
+    assert files == ['main.js', 'store/pkg/index.js']
+    assert index.list_level('node_modules', ExclusionMatcher(PATTERNS))['dirs'] == []
@@ -0,0 +1,83 @@
+import os
+import fnmatch
+import random
+import pytest
+from exclusion_matcher import ExclusionMatcher
+
+
+def legacy_is_excluded(filename, rel_root, patterns):
+    """The per-entry loop ExclusionMatcher replaced (app.is_excluded before the matcher)."""
+    for ex_dir in patterns.get('exclude_dirs', []):
+        if ex_dir and ex_dir in rel_root.split(os.sep):
+            return True
+    if filename in patterns.get('exclude_files', []):
+        return True
+    for pat in patterns.get('exclude_patterns', []):
+        if fnmatch.fnmatch(filename, pat):
+            return True
+    return False
+
+
+def legacy_walk_excludes(rel_path, patterns):
+    """Whether the old os.walk listing dropped rel_path, pruning excluded folders on the way down."""
+    parts = rel_path.split('/')
+    for depth in range(1, len(parts)):
+        if legacy_is_excluded(parts[depth - 1], os.sep.join(parts[:depth]), patterns):
+            return True
+    return legacy_is_excluded(parts[-1], os.sep.join(parts[:-1]) or '.', patterns)
+
+
+def matcher_walk_excludes(matcher, rel_path):
+    parts = rel_path.split('/')
+    if any(matcher.excludes_dir(part) for part in parts[:-1]):
+        return True
+    return matcher.excludes_file(parts[-1])
+
+
+PATTERNS = {
+    'exclude_dirs': ['.git', 'node_modules', ''],
+    'exclude_files': ['secrets.env', 'Thumbs.db'],
+    'exclude_patterns': ['*.pyc', '*.tar.gz', '*.min.*', 'build', 'tmp?', '[._]cache*', '*~', 'data[0-9].csv'],
+    'ignore_files': []
+}
+
+
+@pytest.mark.parametrize('name', [
+    'a.pyc', '.pyc', 'a.py', 'x.tar.gz', 'x.gz', 'app.min.js', 'appmin.js', 'build', 'builds',
+    'tmp1', 'tmp', 'tmp12', '.cache', '_cache_dir', 'cache', 'notes~', 'data7.csv', 'dataX.csv',
+    'secrets.env', 'Thumbs.db', 'thumbs.db.bak', 'node_modules',
+])
+def test_file_names_match_the_fnmatch_loop(name):
+    matcher = ExclusionMatcher(PATTERNS)
+    assert matcher.excludes_file(name) == legacy_is_excluded(name, '.', PATTERNS)
+
+
+@pytest.mark.parametrize('rel_path', [
+    '.git/config', 'src/.git/HEAD', 'node_modules/pkg/index.js', 'src/build/out.js',
+    'src/app.py', 'src/app.pyc', 'tmp1/x.txt', 'docs/_cache/x', 'a/b/c/data1.csv',
+])
+def test_walk_pruning_matches_the_fnmatch_loop(rel_path):
+    matcher = ExclusionMatcher(PATTERNS)
+    assert matcher_walk_excludes(matcher, rel_path) == legacy_walk_excludes(rel_path, PATTERNS)
+
+
+def test_randomised_patterns_and_names_match_the_fnmatch_loop():
+    rng = random.Random(1234)
+    pieces = ['a', 'b', 'ab', '.', '.py', '.c', 'x', '1', '_']
+    wild = ['*', '?', '[ab]', '[!a]', '*.', '.*']
+
+    def word(parts, extra=()):
+        return ''.join(rng.choice(list(parts) + list(extra)) for _ in range(rng.randint(1, 4)))
+
+    for _ in range(200):
+        patterns = {'exclude_dirs': [], 'exclude_files': [word(pieces) for _ in range(2)],
+                    'exclude_patterns': [word(pieces, wild) for _ in range(rng.randint(0, 6))]}
+        matcher = ExclusionMatcher(patterns)
+        for _ in range(30):
+            name = word(pieces)
+            assert matcher.excludes_file(name) == legacy_is_excluded(name, '.', patterns), (patterns, name)
+
+
+def test_fingerprint_follows_the_patterns():
+    assert ExclusionMatcher(PATTERNS).fingerprint == ExclusionMatcher(dict(PATTERNS)).fingerprint
+    assert ExclusionMatcher(PATTERNS).fingerprint != ExclusionMatcher(dict(PATTERNS, exclude_files=[])).fingerprint
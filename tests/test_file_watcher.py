@@ -0,0 +1,62 @@
+import os
+import pytest
+import directory_index
+import file_watcher
+from exclusion_matcher import get_exclusion_matcher
+
+
+@pytest.fixture
+def polling_watcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(directory_index, 'INDEX_DIR', str(tmp_path / 'index'))
+    monkeypatch.setattr(file_watcher, 'Observer', None)
+    # Every pass sweeps every directory, so edits are found on the next pass
+    monkeypatch.setattr(file_watcher, 'POLL_SWEEP_PASSES', 1)
+    root = tmp_path / 'project'
+    (root / 'sub').mkdir(parents=True)
+    (root / 'a.txt').write_text('ab')
+    (root / 'sub' / 'b.txt').write_text('b\n')
+    watcher = file_watcher.DirectoryWatcher(str(root))
+    watcher.index.refresh(get_exclusion_matcher())
+    # The first pass only records a baseline
+    assert watcher._poll() is None
+    return watcher
+
+
+def rewrite(path, text):
+    st = os.stat(path)
+    mtime = os.stat(os.path.dirname(path)).st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert os.stat(os.path.dirname(path)).st_mtime_ns == mtime
+
+
+def sizes(watcher):
+    return {f['relative_path']: f['size'] for f in watcher.index.iter_files()}
+
+
+def test_poll_updates_the_index_for_files_edited_in_place(polling_watcher, tmp_path):
+    generation = polling_watcher.index.generation
+    rewrite(tmp_path / 'project' / 'a.txt', 'a')
+    event = polling_watcher._poll()
+    assert [(f['relative_path'], f['size']) for f in event['modified']] == [('a.txt', 1)]
+    assert event['added'] == [] and event['removed'] == []
+    assert sizes(polling_watcher)['a.txt'] == 1
+    assert event['generation'] == polling_watcher.index.generation > generation
+    assert polling_watcher._poll() is None
+
+
+def test_poll_reports_same_size_edits(polling_watcher, tmp_path):
+    rewrite(tmp_path / 'project' / 'sub' / 'b.txt', 'c\n')
+    event = polling_watcher._poll()
+    assert [f['relative_path'] for f in event['modified']] == [os.path.join('sub', 'b.txt')]
+    assert sizes(polling_watcher)[os.path.join('sub', 'b.txt')] == 2
+
+
+def test_poll_reports_added_and_removed_files(polling_watcher, tmp_path):
+    root = tmp_path / 'project'
+    (root / 'new.txt').write_text('new\n')
+    os.remove(root / 'sub' / 'b.txt')
+    event = polling_watcher._poll()
+    assert [f['relative_path'] for f in event['added']] == ['new.txt']
+    assert event['removed'] == [str(root / 'sub' / 'b.txt')]
+    assert event['modified'] == []
@@ -0,0 +1,110 @@
+import pytest
+from ignore_rules import IgnoreRules, parse_ignore_lines
+
+
+def rules(lines, base_dir=''):
+    return IgnoreRules().extend(base_dir, lines)
+
+
+@pytest.mark.parametrize('path, is_dir, ignored', [
+    ('debug.log', False, True),
+    ('src/deep/debug.log', False, True),
+    ('debug.log.txt', False, False),
+])
+def test_unanchored_pattern_matches_at_any_depth(path, is_dir, ignored):
+    assert rules(['*.log']).is_ignored(path, is_dir) is ignored
+
+
+def test_leading_slash_anchors_to_the_ignore_files_directory():
+    r = rules(['/build'])
+    assert r.is_ignored('build', True)
+    assert not r.is_ignored('src/build', True)
+
+
+def test_inner_slash_anchors_the_pattern():
+    r = rules(['doc/frotz'])
+    assert r.is_ignored('doc/frotz', True)
+    assert not r.is_ignored('a/doc/frotz', True)
+
+
+def test_trailing_slash_matches_directories_only():
+    r = rules(['logs/'])
+    assert r.is_ignored('logs', True)
+    assert r.is_ignored('app/logs', True)
+    assert not r.is_ignored('logs', False)
+
+
+def test_negation_reincludes_and_last_match_wins():
+    r = rules(['*.log', '!keep.log'])
+    assert r.is_ignored('other.log', False)
+    assert not r.is_ignored('keep.log', False)
+    # Order matters: a later pattern overrides the negation again
+    assert rules(['!keep.log', '*.log']).is_ignored('keep.log', False)
+
+
+def test_child_rules_override_inherited_ones_only_below_their_directory():
+    r = rules(['*.txt']).extend('sub', ['!notes.txt'])
+    assert not r.is_ignored('sub/notes.txt', False)
+    assert not r.is_ignored('sub/inner/notes.txt', False)
+    assert r.is_ignored('other/notes.txt', False)
+    assert r.is_ignored('sub/todo.txt', False)
+
+
+def test_anchored_child_rule_is_relative_to_its_directory():
+    r = rules([]).extend('sub', ['/out'])
+    assert r.is_ignored('sub/out', True)
+    assert not r.is_ignored('out', True)
+    assert not r.is_ignored('sub/inner/out', True)
+
+
+@pytest.mark.parametrize('pattern, path, ignored', [
+    ('**/foo', 'foo', True),
+    ('**/foo', 'a/b/foo', True),
+    ('a/**/b', 'a/b', True),
+    ('a/**/b', 'a/x/y/b', True),
+    ('a/**/b', 'x/a/b', False),
+    ('abc/**', 'abc/x/y', True),
+    ('abc/**', 'abc', False),
+    ('[ab].txt', 'a.txt', True),
+    ('[!ab].txt', 'a.txt', False),
+    ('[!ab].txt', 'c.txt', True),
+    ('?.py', 'x.py', True),
+    ('?.py', 'dir/x.py', True),
+    ('*.py', 'dir/x.py', True),
+])
+def test_glob_forms(pattern, path, ignored):
+    assert rules([pattern]).is_ignored(path, False) is ignored
+
+
+def test_comments_blank_lines_escapes_and_trailing_spaces():
+    r = rules(['# comment', '', '\\#hash', '\\!bang', 'spaced   ', 'kept\\ '])
+    assert r.is_ignored('#hash', False)
+    assert r.is_ignored('!bang', False)
+    assert r.is_ignored('spaced', False)
+    assert r.is_ignored('kept ', False)
+    assert not r.is_ignored('comment', False)
+    assert not r.is_ignored('# comment', False)
+
+
+def test_empty_files_add_no_rules():
+    base = IgnoreRules()
+    assert base.extend('sub', ['# only a comment', '']) is base
+    assert parse_ignore_lines(('', '#x')) == ()
+
+
+def test_directory_walk_honours_nested_ignore_files(tmp_path, monkeypatch):
+    import directory_index
+    from exclusion_matcher import ExclusionMatcher
+    monkeypatch.setattr(directory_index, 'INDEX_DIR', str(tmp_path / 'index'))
+    root = tmp_path / 'root'
+    (root / 'src' / 'gen').mkdir(parents=True)
+    (root / 'logs').mkdir()
+    (root / '.gitignore').write_text('*.log\nlogs/\n/gen\n')
+    (root / 'src' / '.gitignore').write_text('!keep.log\ngen/\n')
+    for rel in ('a.py', 'a.log', 'logs/x.txt', 'src/b.py', 'src/keep.log', 'src/drop.log', 'src/gen/c.py'):
+        (root / rel).write_text('x\n')
+    index = directory_index.DirectoryIndex(str(root))
+    index.refresh(ExclusionMatcher({'exclude_dirs': [], 'exclude_files': [], 'exclude_patterns': [],
+                                    'ignore_files': ['.gitignore']}))
+    listed = sorted(f['relative_path'].replace('\\', '/') for f in index.iter_files())
+    assert listed == ['.gitignore', 'a.py', 'src/.gitignore', 'src/b.py', 'src/keep.log']
@@ -0,0 +1,118 @@
+import pytest
+import directory_index
+from directory_index import DirectoryIndex
+from exclusion_matcher import ExclusionMatcher
+from import_graph import ImportGraph, python_imports, python_module_names, script_imports
+
+PATTERNS = {'exclude_dirs': [], 'exclude_files': [], 'exclude_patterns': [], 'ignore_files': []}
+
+
+def test_python_imports():
+    text = ('import os, json as j\n'
+            'from . import sibling\n'
+            'from ..pkg.mod import (a,\n    b)\n'
+            'if True:\n'
+            '    import nested  # comment\n')
+    assert python_imports(text) == [(0, 'os', ()), (0, 'json', ()), (1, '', ('sibling',)),
+                                    (2, 'pkg.mod', ('a', 'b')), (0, 'nested', ())]
+
+
+def test_python_imports_inside_strings_are_skipped():
+    text = ('"""Usage:\n'
+            'import not_real\n'
+            '"""\n'
+            "s = '''\nfrom fake import thing\n'''\n"
+            'import real\n')
+    assert python_imports(text) == [(0, 'real', ())]
+
+
+def test_script_imports_keep_relative_specifiers_only():
+    text = ("import React from 'react';\n"
+            "import { a } from './a';\n"
+            "export * from '../b.js';\n"
+            "const c = require('./c');\n"
+            "const d = await import('/d');\n")
+    assert script_imports(text) == ['./a', '../b.js', './c', '/d']
+
+
+def test_python_module_names_from_the_source_root():
+    packages = {'src/pkg', 'src/pkg/sub'}
+    assert python_module_names('src/pkg/sub/mod.py', packages) == ['pkg.sub.mod', 'src.pkg.sub.mod']
+    assert python_module_names('src/pkg/__init__.py', packages) == ['pkg', 'src.pkg']
+    assert python_module_names('tool.py', packages) == ['tool']
+
+
+@pytest.fixture
+def make_graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(directory_index, 'INDEX_DIR', str(tmp_path / 'index'))
+
+    def make(files):
+        root = tmp_path / 'project'
+        for rel_path, text in files.items():
+            path = root / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        index = DirectoryIndex(str(root))
+        index.refresh(ExclusionMatcher(PATTERNS))
+        graph = ImportGraph(str(root))
+        graph.refresh(index)
+        return graph
+    return make
+
+
+def test_resolves_absolute_and_relative_python_imports(make_graph):
+    graph = make_graph({
+        'src/pkg/__init__.py': '',
+        'src/pkg/core.py': 'from . import util\nfrom .sub import leaf\nimport os\n',
+        'src/pkg/util.py': 'from pkg.sub.leaf import thing\n',
+        'src/pkg/sub/__init__.py': '',
+        'src/pkg/sub/leaf.py': 'from .. import core\nimport pkg.sub.missing\n',
+    })
+    assert graph.imports('src/pkg/core.py') == ['src/pkg/util.py', 'src/pkg/sub/leaf.py']
+    assert graph.imports('src/pkg/util.py') == ['src/pkg/sub/leaf.py']
+    # 'import pkg.sub.missing' falls back to the deepest package that exists
+    assert graph.imports('src/pkg/sub/leaf.py') == ['src/pkg/core.py', 'src/pkg/sub/__init__.py']
+
+
+def test_relative_imports_stop_at_the_root(make_graph):
+    graph = make_graph({
+        'top.py': '',
+        'pkg/__init__.py': '',
+        'pkg/mod.py': 'from .. import top\nfrom ... import beyond\n',
+    })
+    # The selected directory has no __init__.py, so it is not a package to import from
+    assert graph.imports('pkg/mod.py') == []
+
+
+def test_nearest_module_wins_when_names_clash(make_graph):
+    graph = make_graph({
+        'app/main.py': 'import utils\n',
+        'app/utils.py': '',
+        'tests/utils.py': '',
+    })
+    assert graph.imports('app/main.py') == ['app/utils.py']
+
+
+def test_resolves_script_specifiers(make_graph):
+    graph = make_graph({
+        'web/main.ts': ("import { a } from './a.js';\n"
+                        "import b from './lib';\n"
+                        "import c from '../shared/c';\n"
+                        "import x from 'external';\n"),
+        'web/a.ts': '',
+        'web/lib/index.tsx': '',
+        'shared/c.js': '',
+    })
+    assert graph.imports('web/main.ts') == ['web/a.ts', 'web/lib/index.tsx', 'shared/c.js']
+
+
+def test_expand_follows_imports_to_the_requested_depth(make_graph):
+    graph = make_graph({
+        'a.py': 'import b\n',
+        'b.py': 'import c\n',
+        'c.py': 'import a\n',
+    })
+    assert [(f['relative_path'], depth, by) for f, depth, by in graph.expand(['a.py'], 1)] == [('b.py', 1, 'a.py')]
+    assert [(f['relative_path'], depth, by) for f, depth, by in graph.expand(['a.py'], 5)] == \
+        [('b.py', 1, 'a.py'), ('c.py', 2, 'b.py')]
+    assert graph.expand(['a.py'], 0) == []
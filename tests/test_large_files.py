@@ -0,0 +1,69 @@
+import pytest
+from large_files import iter_window_chunks, plan_window, read_window, truncation_marker
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('size, window, ranges', [
+    (100, {}, [(0, 100)]),
+    (100, {'max_bytes': 40}, [(0, 20), (80, 100)]),
+    (100, {'head': 10}, [(0, 10)]),
+    (100, {'tail': 10}, [(90, 100)]),
+    (100, {'head': 10, 'tail': 5}, [(0, 10), (95, 100)]),
+    (100, {'head': 60, 'tail': 60}, [(0, 100)]),
+    (100, {'head': 30, 'tail': 30, 'max_bytes': 40}, [(0, 30), (90, 100)]),
+    (100, {'offset': 10, 'length': 20}, [(10, 30)]),
+    (100, {'offset': 90, 'length': 20}, [(90, 100)]),
+    (100, {'offset': 500}, [(100, 100)]),
+    (100, {'offset': -5, 'length': 5}, [(0, 5)]),
+    (100, {'offset': 0, 'max_bytes': 40}, [(0, 40)]),
+])
+def test_plan_window(size, window, ranges):
+    assert plan_window(size, **window) == ranges
+
+
+def test_whole_file_within_the_cap(tmp_path):
+    path = write(tmp_path / 'a.txt', b'line one\r\nline two\n')
+    text, size, ranges = read_window(path)
+    assert text == 'line one\nline two\n'
+    assert size == 19
+    assert ranges == [(0, 19)]
+
+
+def test_empty_file(tmp_path):
+    path = write(tmp_path / 'empty', b'')
+    assert read_window(path) == ('', 0, [(0, 0)])
+
+
+def test_head_and_tail_are_joined_by_truncation_markers(tmp_path):
+    data = bytes(range(48, 58)) * 10
+    path = write(tmp_path / 'digits', data)
+    text, size, ranges = read_window(path, head=10, tail=10)
+    assert ranges == [(0, 10), (90, 100)]
+    assert text == data[:10].decode() + truncation_marker(10, 90, 100) + data[90:].decode()
+
+
+def test_offset_window_marks_both_omitted_ends(tmp_path):
+    path = write(tmp_path / 'digits', b'0123456789' * 10)
+    text = read_window(path, offset=40, length=10)[0]
+    assert text == truncation_marker(0, 40, 100) + '0123456789' + truncation_marker(50, 100, 100)
+
+
+def test_chunks_never_split_characters_or_crlf_pairs(tmp_path):
+    text = ('héllo wörld ✓ 𝄞\r\n' * 200)
+    path = write(tmp_path / 'unicode.txt', text.encode('utf-8'))
+    for chunk_bytes in (1, 2, 3, 5, 7, 64):
+        chunks = list(iter_window_chunks(path, 'strict', chunk_bytes=chunk_bytes))
+        assert ''.join(chunks) == text.replace('\r\n', '\n')
+        assert all('\r' not in chunk for chunk in chunks)
+
+
+def test_window_edges_move_back_to_a_character_start(tmp_path):
+    # 'é' is two bytes; byte 3 is in the middle of the second one
+    path = write(tmp_path / 'accents', 'éé'.encode('utf-8') + b'abc')
+    text = read_window(path, offset=3, errors='strict')[0]
+    assert text == truncation_marker(0, 2, 7) + 'éabc'
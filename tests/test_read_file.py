@@ -0,0 +1,51 @@
+import json
+import asyncio
+import pytest
+from async_context_routes import handle_read_file
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_text('0123456789' * 10)
+    return str(path)
+
+
+def read_async(payload):
+    return asyncio.run(handle_read_file(json.loads(json.dumps(payload))))
+
+
+def test_window_params(client, text_file):
+    response = client.post('/api/read-file', json={'file_path': text_file, 'offset': '10', 'length': 5})
+    assert response.status_code == 200
+    assert response.get_json()['ranges'] == [[10, 15]]
+    body, status, _ = read_async({'file_path': text_file, 'head': 5})
+    assert status == 200 and body['ranges'] == [(0, 5)]
+
+
+@pytest.mark.parametrize('window', [{'offset': 'x'}, {'length': []}, {'head': {}}, {'tail': '1.5'}])
+def test_invalid_window_params_are_a_400(client, text_file, window):
+    response = client.post('/api/read-file', json=dict(window, file_path=text_file))
+    assert response.status_code == 400
+    assert 'must be an integer' in response.get_json()['error']
+    body, status, _ = read_async(dict(window, file_path=text_file))
+    assert status == 400
+    assert body == response.get_json()
+
+
+@pytest.mark.parametrize('name, data', [('image.bin', b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'),
+                                        ('latin1.txt', 'caf\xe9\n'.encode('latin-1'))])
+def test_binary_and_non_utf8_files_are_a_400(client, tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    response = client.post('/api/read-file', json={'file_path': str(path)})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'File is not a text file or uses unsupported encoding'}
+    body, status, _ = read_async({'file_path': str(path)})
+    assert (body, status) == (response.get_json(), 400)
@@ -0,0 +1,47 @@
+import zlib
+import pytest
+from response_compression import choose_encoding, compress_body, compress_stream
+
+
+@pytest.mark.parametrize('header, encoding', [
+    (None, None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('*;q=0, gzip', 'gzip'),
+    ('GZIP;q=0.5', 'gzip'),
+])
+def test_choose_encoding(header, encoding):
+    assert choose_encoding(header) == encoding
+
+
+def fragments(count):
+    for i in range(count):
+        yield '{"path": "src/module_%d.py", "content": "' % i
+        yield 'x = %d\\nprint(\\"hello\\")\\n' % i
+        yield '", "tokens": 5}'
+        yield ', ' if i < count - 1 else ''
+
+
+def test_stream_round_trips():
+    body = ''.join(fragments(50)).encode()
+    assert zlib.decompress(b''.join(compress_stream(fragments(50), 'gzip', 6)), 31) == body
+    assert zlib.decompress(compress_body(body, 'gzip', 6), 31) == body
+
+
+def test_small_fragments_compress_about_as_well_as_a_buffered_body():
+    body = ''.join(fragments(300)).encode()
+    streamed = b''.join(compress_stream(fragments(300), 'gzip', 6))
+    buffered = compress_body(body, 'gzip', 6)
+    assert len(streamed) < len(buffered) * 1.2
+
+
+def test_each_flushed_batch_decodes_before_the_stream_ends():
+    chunks = ['a' * 100] * 50
+    decompressor = zlib.decompressobj(31)
+    out = compress_stream(chunks, 'gzip', 6, flush_bytes=1000)
+    first = next(out)
+    # Ten 100-byte chunks make the first batch; all of it is readable straight away
+    assert decompressor.decompress(first) == b'a' * 1000
+    rest = b''.join(decompressor.decompress(part) for part in out)
+    assert rest == b'a' * 4000
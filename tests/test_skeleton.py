@@ -0,0 +1,117 @@
+import os
+import skeleton
+from skeleton import outline_file, outline_python, outline_script
+
+
+def test_python_signatures_and_docstrings():
+    text = ('"""Module docs."""\n'
+            'import os\n'
+            'LIMIT = 3\n'
+            '\n'
+            '@decorator(1)\n'
+            'def load(path: str, *, strict=False) -> dict:\n'
+            '    """Load a file."""\n'
+            '    return {}\n'
+            '\n'
+            'class Store(Base, metaclass=Meta):\n'
+            '    """A store.\n'
+            '\n'
+            '    Holds things.\n'
+            '    """\n'
+            '    size: int = 0\n'
+            '\n'
+            '    async def fetch(self, key):\n'
+            '        return key\n')
+    assert outline_python(text) == ('"""Module docs."""\n'
+                                    '\n'
+                                    '@decorator(1)\n'
+                                    'def load(path: str, *, strict=False) -> dict:\n'
+                                    '    """Load a file."""\n'
+                                    '    ...\n'
+                                    '\n'
+                                    'class Store(Base, metaclass=Meta):\n'
+                                    '    """A store.\n'
+                                    '\n'
+                                    '    Holds things.\n'
+                                    '    """\n'
+                                    '    size: int = 0\n'
+                                    '    async def fetch(self, key):\n'
+                                    '        ...\n')
+
+
+def test_python_outline_is_valid_python():
+    text = 'class A:\n    def f(self):\n        """Say "hi" \\\\ twice."""\n        return 1\n'
+    compile(outline_python(text), '<outline>', 'exec')
+
+
+def test_unparsable_python_has_no_outline():
+    assert outline_python('def broken(:\n') is None
+
+
+def test_files_without_definitions_have_no_outline():
+    assert outline_python('"""Settings."""\nX = 1\nY = [X]\n') is None
+    assert outline_script('const a = 1;\nconsole.log(a);\n') is None
+    assert outline_script("export { a } from './a';\n") is None
+
+
+def test_skeleton_mode_sends_files_without_definitions_whole(tmp_path):
+    from context_files import ContextOptions, read_context_file
+    options = ContextOptions(skeleton=True)
+    for name, text in (('consts.py', 'X = 1\nY = 2\n'), ('s.js', 'const a = 1; console.log(a)\n')):
+        path = tmp_path / name
+        path.write_text(text)
+        record = read_context_file(str(path), str(tmp_path), options)
+        assert record['content'] == text
+        assert 'skeleton' not in record and 'saved' not in record
+
+
+def test_script_functions_classes_and_doc_comments():
+    text = ('import x from "y";\n'
+            '/** Adds. */\n'
+            'export function add(a, b) {\n'
+            '  if (a) { return "}"; }\n'
+            '  return a + b;\n'
+            '}\n'
+            'const square = (n) => n * n;\n'
+            'export default class Shape extends Base {\n'
+            '  constructor(name) { this.name = name; }\n'
+            '  static async area(r) {\n'
+            '    for (const x of r) { }\n'
+            '  }\n'
+            '}\n'
+            'interface Point { x: number; y: number }\n')
+    assert outline_script(text) == ('/** Adds. */\n'
+                                    'export function add(a, b) { ... }\n'
+                                    'const square = (n) => ...\n'
+                                    'export default class Shape extends Base {\n'
+                                    '  constructor(name) { ... }\n'
+                                    '  static async area(r) { ... }\n'
+                                    '}\n'
+                                    'interface Point { x: number; y: number }\n')
+
+
+def test_nested_functions_are_not_outlined():
+    text = 'function outer() {\n  function inner() {}\n}\n'
+    assert outline_script(text) == 'function outer() { ... }\n'
+
+
+def test_outline_file_caches_until_the_file_changes(tmp_path):
+    path = tmp_path / 'mod.py'
+    path.write_text('def a():\n    pass\n')
+    assert outline_file(str(path)) == 'def a():\n    ...\n'
+    st = os.stat(path)
+    path.write_text('def b():\n    pass\n')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert outline_file(str(path)) == 'def b():\n    ...\n'
+
+
+def test_outline_file_skips_other_kinds_and_oversized_files(tmp_path, monkeypatch):
+    other = tmp_path / 'notes.txt'
+    other.write_text('def a():\n    pass\n')
+    assert outline_file(str(other)) is None
+
+    big = tmp_path / 'big.py'
+    big.write_text('def a():\n    pass\n' * 10)
+    monkeypatch.setattr(skeleton, 'MAX_FILE_BYTES', 16)
+    assert outline_file(str(big)) is None
+    assert skeleton._cache[str(big)][1] is None
@@ -0,0 +1,71 @@
+import pytest
+from token_counter import (TRUNCATION_MARKER, apply_token_budget, estimate_tokens, get_tokenizer,
+                           truncate_to_tokens)
+
+
+def record(path, tokens):
+    return {'path': path, 'content': 'x' * (tokens * 4), 'tokens': tokens}
+
+
+def test_estimate_rounds_up_to_whole_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd') == 1
+    assert estimate_tokens('abcde') == 2
+
+
+def test_unknown_tokenizer_is_a_value_error():
+    with pytest.raises(ValueError):
+        get_tokenizer('no-such-tokenizer')
+    assert get_tokenizer(None) is estimate_tokens
+
+
+def test_keeps_everything_that_fits():
+    files = [record('a', 10), record('b', 20)]
+    kept, dropped, truncated = apply_token_budget(files, 30, 'drop', estimate_tokens)
+    assert [r['path'] for r in kept] == ['a', 'b']
+    assert dropped == [] and truncated == []
+
+
+def test_drop_keeps_the_longest_prefix_that_fits():
+    files = [record('a', 10), record('b', 50), record('c', 5)]
+    kept, dropped, truncated = apply_token_budget(files, 40, 'drop', estimate_tokens)
+    # c would fit on its own but comes after the first file that does not
+    assert [r['path'] for r in kept] == ['a']
+    assert dropped == ['b', 'c']
+    assert truncated == []
+
+
+def test_truncate_cuts_the_first_file_that_does_not_fit():
+    files = [record('a', 10), record('b', 50), record('c', 5)]
+    kept, dropped, truncated = apply_token_budget(files, 40, 'truncate', estimate_tokens)
+    assert [r['path'] for r in kept] == ['a', 'b']
+    assert kept[1]['content'].endswith(TRUNCATION_MARKER)
+    assert kept[1]['tokens'] <= 30
+    assert sum(r['tokens'] for r in kept) <= 40
+    assert truncated == ['b']
+    assert dropped == ['c']
+    # The input records are left alone
+    assert files[1]['tokens'] == 50
+
+
+def test_truncate_drops_when_only_the_marker_would_fit():
+    marker_tokens = estimate_tokens(TRUNCATION_MARKER)
+    files = [record('a', 10), record('b', 50)]
+    kept, dropped, truncated = apply_token_budget(files, 10 + marker_tokens, 'truncate', estimate_tokens)
+    assert [r['path'] for r in kept] == ['a']
+    assert dropped == ['b'] and truncated == []
+
+
+def test_truncate_to_tokens_returns_the_longest_fitting_prefix():
+    text = 'abcdefghij' * 20
+    result = truncate_to_tokens(text, 20, estimate_tokens)
+    assert result.endswith(TRUNCATION_MARKER)
+    prefix = result[:-len(TRUNCATION_MARKER)]
+    assert text.startswith(prefix)
+    budget = 20 - estimate_tokens(TRUNCATION_MARKER)
+    assert estimate_tokens(prefix) <= budget
+    assert estimate_tokens(text[:len(prefix) + 1]) > budget
+
+
+def test_truncate_to_tokens_with_no_room_for_the_marker():
+    assert truncate_to_tokens('some text', estimate_tokens(TRUNCATION_MARKER), estimate_tokens) == ''
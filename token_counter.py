@@ -0,0 +1,89 @@
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_TOKENIZER = 'heuristic'
+TRUNCATION_MARKER = '\n... [truncated to fit token budget]'
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text and source code
+    return (len(text) + 3) // 4
+
+
+TOKENIZERS = {
+    'heuristic': estimate_tokens
+}
+
+
+def register_tokenizer(name, count_tokens):
+    """Make a tokenizer available by name; count_tokens takes a str and returns an int."""
+    TOKENIZERS[name] = count_tokens
+
+
+if tiktoken is not None:
+    _encodings = {}
+
+    def _tiktoken_counter(encoding_name):
+        def count_tokens(text):
+            encoding = _encodings.get(encoding_name)
+            if encoding is None:
+                encoding = _encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+            return len(encoding.encode(text, disallowed_special=()))
+        return count_tokens
+
+    register_tokenizer('cl100k_base', _tiktoken_counter('cl100k_base'))
+    register_tokenizer('o200k_base', _tiktoken_counter('o200k_base'))
+
+
+def get_tokenizer(name):
+    name = name or DEFAULT_TOKENIZER
+    if name not in TOKENIZERS:
+        raise ValueError(f'Unknown tokenizer: {name}')
+    return TOKENIZERS[name]
+
+
+def truncate_to_tokens(text, max_tokens, count_tokens):
+    """Longest prefix of text that fits max_tokens together with the truncation marker."""
+    budget = max_tokens - count_tokens(TRUNCATION_MARKER)
+    if budget <= 0:
+        return ''
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + TRUNCATION_MARKER
+
+
+def apply_token_budget(files_data, token_budget, strategy, count_tokens):
+    """Trim files_data to token_budget; files are prioritised in request order.
+
+    The longest prefix of files that fits is kept. With the 'truncate'
+    strategy the first file that does not fit is cut down to the remaining
+    budget instead of being dropped. Returns (kept, dropped_paths, truncated_paths).
+    """
+    kept = []
+    dropped = []
+    truncated = []
+    remaining = token_budget
+    exhausted = False
+    for record in files_data:
+        if exhausted:
+            dropped.append(record['path'])
+        elif record['tokens'] <= remaining:
+            kept.append(record)
+            remaining -= record['tokens']
+        else:
+            # Nothing of lower priority is included once a file fails to fit
+            exhausted = True
+            if strategy == 'truncate' and remaining > count_tokens(TRUNCATION_MARKER):
+                content = truncate_to_tokens(record['content'], remaining, count_tokens)
+                kept.append(dict(record, content=content, tokens=count_tokens(content)))
+                truncated.append(record['path'])
+            else:
+                dropped.append(record['path'])
+    return kept, dropped, truncated